@@ -1,5 +1,11 @@
 import os
-import re
+import sys
+
+# Os módulos compartilhados de TSP (leitor de instâncias, resolvedores) ficam no diretório 1-caixeiro-viajante
+TSP_MODULES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '1-caixeiro-viajante')
+sys.path.append(os.path.normpath(TSP_MODULES_DIRECTORY))
+
+from instance_loader import load_coordinates, parse_instance_name  # noqa: E402
 
 
 def read_coordinates(file_path):
@@ -8,6 +14,7 @@ def read_coordinates(file_path):
 
         This function reads a file where each line contains an index and the x and y coordinates of a point,
         separated by spaces. It returns a list of tuples where each tuple represents the coordinates of a point.
+        The file is parsed in bulk by NumPy and later reads use the binary (.npy) cache of the instance.
 
         Parameters:
         file_path (str): The path to the file.
@@ -15,13 +22,7 @@ def read_coordinates(file_path):
         Returns:
         list: A list of tuples where each tuple represents the coordinates (x, y) of a point.
         """
-    coordinates = []
-    with open(file_path, 'r') as file:
-        lines = file.readlines()
-        for line in lines:
-            index, x, y = map(int, line.split())
-            coordinates.append((x, y))
-    return coordinates
+    return [tuple(point) for point in load_coordinates(file_path).tolist()]
 
 
 def choose_file(directory):
@@ -37,7 +38,7 @@ def choose_file(directory):
         Returns:
         str: The path to the chosen file.
         """
-    files = os.listdir(directory)
+    files = [name for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name))]
     while True:
         for i, filename in enumerate(files):
             print(f'{i}: {filename}')
@@ -64,13 +65,7 @@ def extract_info_from_filename(file_path):
         Returns:
         tuple: A tuple containing the number of cities and the number of travelers.
         """
-    filename = os.path.basename(file_path)
-    match = re.match(r'mTSP-n(\d+)-m(\d+)', filename)
-    if match:
-        num_cities, num_travelers = map(int, match.groups())
-        return num_cities, num_travelers
-    else:
-        raise ValueError(f"O nome do arquivo '{filename}' não está no formato esperado.")
+    return parse_instance_name(file_path)
 
 
 def test_read_coordinates():
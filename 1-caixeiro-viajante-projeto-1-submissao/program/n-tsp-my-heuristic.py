@@ -1,8 +1,20 @@
 import time
 import math
+import sys
 import re
 import os
 
+import numpy as np
+
+# Os módulos compartilhados de TSP (matriz de distâncias, resolvedores) ficam no diretório 1-caixeiro-viajante
+TSP_MODULES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '1-caixeiro-viajante')
+sys.path.append(os.path.normpath(TSP_MODULES_DIRECTORY))
+
+from instance_loader import load_coordinates, load_instance, parse_instance_name  # noqa: E402
+from local_search import improve_routes  # noqa: E402
+from mtsp import solve_mtsp  # noqa: E402
+from tsp_distances import get_distances, tour_lengths  # noqa: E402
+
 
 def distance_between_two_points_1(p1, p2):
     """
@@ -32,13 +44,14 @@ def distance_between_two_points_2(p1, p2):
     return math.dist(p1, p2)
 
 
-def n_tsp_my_heuristic(coords, num_viajantes):
+def n_tsp_my_heuristic(coords, num_viajantes, distancias=None):
     """
     Implementa uma heurística para o problema do caixeiro viajante.
 
     Parâmetros:
         coords (lista): Uma lista de coordenadas das cidades. Cada coordenada é uma tupla (x, y).
         num_viajantes (int): O número de viajantes.
+        distancias (ndarray, opcional): Matriz de distâncias já calculada para a instância.
 
     Retorna:
         rotas (lista): Uma lista de rotas para cada viajante. Cada rota é uma lista de índices das cidades.
@@ -104,16 +117,13 @@ def n_tsp_my_heuristic(coords, num_viajantes):
         distancia_total = 48.0833
     """
 
-    n = len(coords)
-    # Calcula a distância entre todas as cidades
-    distancias = [[distance_between_two_points_2(coords[i], coords[j]) for j in range(n)] for i in range(n)]
+    # Matriz de distâncias compartilhada, calculada uma única vez por instância
+    if distancias is None:
+        distancias = get_distances(coords)
 
-    # Lista de cidades a serem visitadas
+    # Lista de cidades a serem visitadas, ordenadas com base na distância até a origem
     # Começa em 1 porque a cidade 0 é a inicial
-    cidades_restantes = list(range(1, n))
-
-    # Ordena as cidades restantes com base na distância até a origem
-    cidades_restantes.sort(key=lambda x: distancias[0][x])
+    cidades_restantes = (np.argsort(distancias[0][1:], kind='stable') + 1).tolist()
 
     # Inicializa as rotas dos viajantes: Todos os viajantes começam na cidade 0
     rotas = [[0] for _ in range(num_viajantes)]
@@ -137,6 +147,25 @@ def n_tsp_my_heuristic(coords, num_viajantes):
     return rotas
 
 
+def n_tsp_cluster_heuristic(coords, num_viajantes, metodo='sweep', objetivo='total', capacidade=None):
+    """
+    Modo alternativo ao n_tsp_my_heuristic: agrupa as cidades (varredura angular ou k-means em torno da origem),
+    resolve cada grupo como um TSP com a busca local 2-opt / Or-opt e rebalanceia as rotas com realocações e trocas de
+    cidades entre viajantes.
+
+    Parâmetros:
+        coords (lista): Uma lista de coordenadas das cidades. Cada coordenada é uma tupla (x, y).
+        num_viajantes (int): O número de viajantes.
+        metodo (str): 'sweep' (varredura angular) ou 'kmeans'.
+        objetivo (str): 'total' (distância total) ou 'makespan' (maior rota).
+        capacidade (int, opcional): Número máximo de cidades por viajante.
+
+    Retorna:
+        rotas (lista): Uma lista de rotas para cada viajante, começando e terminando na cidade 0.
+    """
+    return solve_mtsp(coords, num_viajantes, method=metodo, objective=objetivo, capacity=capacidade)
+
+
 def get_coords_from_tour(tour, coords):
     """
     Obtém as coordenadas de cada cidade no tour.
@@ -163,10 +192,9 @@ def calculate_total_distance(coords):
         Retorna:
         float: A distância euclidiana total do percurso.
     """
-    total_distance = 0
-    for i in range(len(coords) - 1):
-        total_distance += distance_between_two_points_1(coords[i], coords[i + 1])
-    return total_distance
+    if len(coords) < 2:
+        return 0.0
+    return tour_lengths(np.arange(len(coords)), coords=coords, closed=False)
 
 
 def read_coordinates(file_path):
@@ -175,6 +203,7 @@ def read_coordinates(file_path):
 
         Esta função lê um arquivo onde cada linha contém um índice e as coordenadas x e y de um ponto,
         separados por espaços. Retorna uma lista de tuplas onde cada tupla representa as coordenadas de um ponto.
+        O arquivo é convertido em lote pelo NumPy e as leituras seguintes usam o cache binário (.npy) da instância.
 
         Parâmetros:
         caminho_arquivo (str): O caminho para o arquivo.
@@ -182,13 +211,7 @@ def read_coordinates(file_path):
         Retorna:
         lista: Uma lista de tuplas onde cada tupla representa as coordenadas (x, y) de um ponto.
         """
-    coordinates = []
-    with open(file_path, 'r') as file:
-        lines = file.readlines()
-        for line in lines:
-            index, x, y = map(int, line.split())
-            coordinates.append((x, y))
-    return coordinates
+    return [tuple(point) for point in load_coordinates(file_path).tolist()]
 
 
 def extract_city_count(filename):
@@ -213,7 +236,7 @@ def choose_file(directory):
         Retorna:
         str: O caminho para o arquivo escolhido.
         """
-    files = os.listdir(directory)
+    files = [name for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name))]
     while True:
         for i, filename in enumerate(files):
             print(f'{i}: {filename}')
@@ -241,13 +264,7 @@ def extract_info_from_filename(file_path):
         Retorna:
         tupla: Uma tupla contendo o número de cidades e o número de viajantes.
         """
-    filename = os.path.basename(file_path)
-    match = re.match(r'mTSP-n(\d+)-m(\d+)', filename)
-    if match:
-        num_cities, num_travelers = map(int, match.groups())
-        return num_cities, num_travelers
-    else:
-        raise ValueError(f"O nome do arquivo '{filename}' não está no formato esperado.")
+    return parse_instance_name(file_path)
 
 
 def run_tests():
@@ -264,10 +281,10 @@ def run_tests():
 
     directory = laptop_directory  # Alterar para mac_directory ou desktop_directory conforme o sistema operacional
     file_path = choose_file(directory)  # Escolher o arquivo de instância
-    coordinates = read_coordinates(file_path)  # Ler as coordenadas do arquivo
-
-    # Extrair numero de cidades e viajantes do nome do arquivo
-    num_cities, num_travelers = extract_info_from_filename(file_path)
+    # Ler as coordenadas do arquivo e extrair o número de cidades e de viajantes do nome do arquivo
+    instance = load_instance(file_path)
+    coordinates = [tuple(point) for point in instance.coords.tolist()]
+    num_cities, num_travelers = instance.num_cities, instance.num_travelers
 
     # Executa a heurística, armazena o tour e calcula o tempo de execução da função
     start_time = time.time()
@@ -296,6 +313,18 @@ def run_tests():
     total_distance = round(total_distance, 3)
     print(f"Distância total de todos os viajantes: {total_distance}")
 
+    # Pós-processamento: melhora a ordem das cidades de cada rota com a busca local 2-opt / Or-opt
+    improved_tour = improve_routes(tour, coords=coordinates)
+    improved_distance = sum(tour_lengths(route, coords=coordinates, closed=False) for route in improved_tour)
+    print(f"Rotas após busca local: {improved_tour}")
+    print(f"Distância total após busca local: {round(improved_distance, 3)}")
+
+    # Modo por agrupamento: rotas construídas por grupo e rebalanceadas entre os viajantes
+    cluster_tour = n_tsp_cluster_heuristic(coordinates, num_travelers)
+    cluster_distance = sum(tour_lengths(route, coords=coordinates, closed=False) for route in cluster_tour)
+    print(f"Rotas por agrupamento: {cluster_tour}")
+    print(f"Distância total por agrupamento: {round(cluster_distance, 3)}")
+
 
 def main():
     print("Bem-vindo ao programa de resolução do problema do caixeiro viajante!")
@@ -0,0 +1,191 @@
+from collections import namedtuple
+import math
+import threading
+import time
+
+import numpy as np
+
+from branch_and_bound import branch_and_bound, nearest_neighbor_tour, tour_cost
+from brute_force import brute_force_tsp, MAX_CITIES as BRUTE_FORCE_MAX_CITIES
+from held_karp import held_karp, MAX_CITIES as HELD_KARP_MAX_CITIES
+from lin_kernighan import lin_kernighan
+from local_search import improve_tour
+from spatial_index import grid_nearest_neighbor_tour
+from tsp_distances import get_distances, tour_lengths, LazyDistanceMatrix
+
+EXACT_MAX_CITIES = 12     # Até este número de cidades o método 'auto' usa o Held-Karp
+SEARCH_MAX_CITIES = 150   # Até este número de cidades o método 'auto' usa o branch-and-bound; acima, o Lin-Kernighan
+UNLIMITED_TIME = 1e9      # Tempo passado aos resolvedores quando os limites ficam a cargo do SearchControl
+SEARCH_TIME = 10.0        # Tempo máximo do branch-and-bound quando nenhum limite é informado
+SEARCH_NODES = 100000     # Número máximo de nós do branch-and-bound quando nenhum limite é informado
+EPSILON = 1e-9            # Melhoria relativa mínima para um tour substituir o incumbente
+
+SolverResult = namedtuple('SolverResult', ['cost', 'tour', 'status', 'nodes', 'elapsed'])
+
+
+class SearchControl:
+    """
+    Limites, incumbente e cancelamento compartilhados por uma execução de resolvedor.
+
+    Os resolvedores consultam stopped() nos seus laços principais e param de forma cooperativa quando o tempo ou o
+    número de nós se esgota ou quando cancel() é chamado (de outra thread, por exemplo). Cada tour melhor que o
+    incumbente é entregue por offer(), que chama o callback, então o chamador sempre tem o melhor tour até o momento.
+
+    Parâmetros:
+    time_limit (float, opcional): Tempo máximo em segundos.
+    node_limit (int, opcional): Número máximo de nós (estados, ramos ou movimentos, de acordo com o resolvedor).
+    callback (função, opcional): Chamada como callback(custo, tour) a cada novo incumbente.
+    cancel_event (threading.Event ou multiprocessing.Event, opcional): Evento que interrompe a busca quando ligado.
+    """
+
+    def __init__(self, time_limit=None, node_limit=None, callback=None, cancel_event=None):
+        self.start_time = time.time()
+        self.deadline = None if time_limit is None else self.start_time + time_limit
+        self.node_limit = node_limit
+        self.callback = callback
+        self.cancel_event = cancel_event if cancel_event is not None else threading.Event()
+        self.nodes = 0
+        self.cost = math.inf
+        self.tour = None
+        self.status = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def remaining(self):
+        """Tempo restante em segundos, ou None se não houver limite de tempo."""
+        return None if self.deadline is None else max(self.deadline - time.time(), 0.0)
+
+    def stopped(self, nodes=0):
+        """Soma nodes ao contador de nós e informa se a busca deve parar (o motivo fica em status)."""
+        self.nodes += nodes
+        if self.status is None:
+            if self.cancel_event.is_set():
+                self.status = 'cancelled'
+            elif self.node_limit is not None and self.nodes >= self.node_limit:
+                self.status = 'node_limit'
+            elif self.deadline is not None and time.time() > self.deadline:
+                self.status = 'time_limit'
+        return self.status is not None
+
+    def offer(self, cost, tour):
+        """Registra um tour se ele for melhor que o incumbente; retorna True nesse caso."""
+        if self.tour is not None and cost >= self.cost - EPSILON * abs(self.cost):
+            return False
+        self.cost, self.tour = cost, [int(city) for city in tour]
+        if self.callback is not None:
+            self.callback(self.cost, list(self.tour))
+        return True
+
+    def result(self, optimal=False):
+        """Resultado da execução: o status é o motivo da parada, 'optimal' ou 'completed' (heurística concluída)."""
+        status = self.status or ('optimal' if optimal else 'completed')
+        return SolverResult(self.cost, self.tour, status, self.nodes, time.time() - self.start_time)
+
+
+def solve_tsp(distances=None, coords=None, method='auto', time_limit=None, node_limit=None, callback=None,
+              cancel_event=None, control=None):
+    """
+    Interface comum e interrompível dos resolvedores de TSP.
+
+    Um tour inicial (vizinho mais próximo seguido da busca local) é registrado antes do resolvedor escolhido, de modo
+    que sempre existe um incumbente, mesmo que a busca seja interrompida logo no início. O resolvedor então entrega
+    cada tour melhor ao callback e para assim que o limite de tempo ou de nós é atingido ou a execução é cancelada,
+    devolvendo o melhor tour encontrado.
+
+    Sem limite de tempo nem de nós a execução sempre termina: o Lin-Kernighan para no primeiro ótimo local (sem
+    perturbações) e o branch-and-bound usa o orçamento próprio de SEARCH_TIME segundos e SEARCH_NODES nós; se esse
+    orçamento acabar antes da prova de otimalidade, o status é 'completed'.
+
+    Parâmetros:
+    distances (ndarray, opcional): Matriz (n, n) de distâncias simétrica.
+    coords (lista ou ndarray, opcional): Coordenadas das cidades (obrigatórias para o Lin-Kernighan em instâncias
+        grandes, que não montam a matriz de distâncias).
+    method (str): 'brute_force', 'held_karp', 'branch_and_bound', 'lin_kernighan' ou 'auto' (escolhe pelo tamanho).
+    time_limit (float, opcional): Tempo máximo em segundos.
+    node_limit (int, opcional): Número máximo de nós.
+    callback (função, opcional): Chamada como callback(custo, tour) a cada novo incumbente.
+    cancel_event (threading.Event, opcional): Evento que cancela a execução quando ligado.
+    control (SearchControl, opcional): Controle já criado pelo chamador; substitui os quatro parâmetros anteriores.
+
+    Retorna:
+    SolverResult: Custo e tour do incumbente (começando pela cidade 0), status ('optimal', 'completed', 'time_limit',
+    'node_limit' ou 'cancelled'), nós contados e tempo gasto.
+    """
+    if coords is None and distances is None:
+        raise ValueError("Informe as coordenadas ou a matriz de distâncias.")
+    if control is None:
+        control = SearchControl(time_limit, node_limit, callback, cancel_event)
+    n = len(coords) if coords is not None else len(distances)
+    unlimited = control.deadline is None and control.node_limit is None
+    if method == 'auto':
+        method = ('held_karp' if n <= EXACT_MAX_CITIES else
+                  'branch_and_bound' if n <= SEARCH_MAX_CITIES else 'lin_kernighan')
+    limits = {'brute_force': BRUTE_FORCE_MAX_CITIES, 'held_karp': HELD_KARP_MAX_CITIES, 'branch_and_bound': None,
+              'lin_kernighan': None}
+    if method not in limits:
+        raise ValueError(f"Método desconhecido: {method}. Disponíveis: {list(limits) + ['auto']}.")
+    if limits[method] is not None and n > limits[method]:
+        raise ValueError(f"O método {method} suporta no máximo {limits[method]} cidades.")
+    if n < 4:
+        tour = list(range(n))
+        control.offer(tour_lengths(tour, coords, distances) if n > 1 else 0.0, tour)
+        return control.result(optimal=True)
+
+    if method == 'lin_kernighan':
+        if coords is not None or isinstance(distances, LazyDistanceMatrix):
+            initial = grid_nearest_neighbor_tour(coords if coords is not None else distances.points)
+        else:
+            initial = nearest_neighbor_tour(distances)
+        control.offer(tour_lengths(initial, coords, distances), initial)
+        lin_kernighan(initial, coords, distances, time_limit=None if unlimited else UNLIMITED_TIME, control=control)
+        return control.result()
+
+    if distances is None:
+        distances = get_distances(coords)
+    distances = distances.to_dense() if isinstance(distances, LazyDistanceMatrix) else np.asarray(distances)
+    initial = improve_tour(nearest_neighbor_tour(distances), distances=distances)
+    control.offer(tour_cost(distances, initial), initial)
+    if control.stopped():
+        return control.result()
+    if method == 'brute_force':
+        brute_force_tsp(distances, upper_bound=control.cost, control=control)
+        return control.result(optimal=True)
+    if method == 'held_karp':
+        held_karp(distances, control=control)
+        return control.result(optimal=True)
+    result = branch_and_bound(distances, initial_tour=control.tour,
+                              time_limit=SEARCH_TIME if unlimited else UNLIMITED_TIME,
+                              node_limit=SEARCH_NODES if unlimited else math.inf, control=control)
+    return control.result(optimal=result.optimal)
+
+
+def test_solve_tsp():
+    random_generator = np.random.default_rng(17)
+    for n_cities, method, time_limit in [(12, 'auto', None), (80, 'branch_and_bound', 2.0),
+                                         (2000, 'lin_kernighan', 3.0), (140, 'auto', None), (200, 'auto', None)]:
+        coordinates = random_generator.uniform(0, 1000, size=(n_cities, 2))
+        improvements = []
+        result = solve_tsp(coords=coordinates, method=method, time_limit=time_limit,
+                           callback=lambda cost, tour: improvements.append(cost))
+
+        print(f"Número de cidades:  {n_cities} ({method})")
+        print(f"Distância:          {result.cost:.3f}")
+        print(f"Status:             {result.status}, {result.nodes} nós, {len(improvements)} incumbentes")
+        print(f"Tempo de execução:  {result.elapsed:.3f} segundos\n")
+        assert sorted(result.tour) == list(range(n_cities))
+
+    # Cancelamento cooperativo a partir de outra thread
+    coordinates = random_generator.uniform(0, 1000, size=(5000, 2))
+    control = SearchControl()
+    threading.Timer(1.0, control.cancel).start()
+    result = solve_tsp(coords=coordinates, method='lin_kernighan', control=control)
+    print(f"Cancelado: status {result.status} depois de {result.elapsed:.3f} segundos, distância {result.cost:.3f}")
+
+
+def main():
+    test_solve_tsp()
+
+
+if __name__ == "__main__":
+    main()
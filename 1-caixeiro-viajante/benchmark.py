@@ -0,0 +1,416 @@
+from collections import namedtuple
+import argparse
+import csv
+import functools
+import importlib.util
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from branch_and_bound import branch_and_bound
+from brute_force import brute_force_tsp
+from held_karp import held_karp
+from lin_kernighan import lin_kernighan
+from memetic import solve_mtsp_memetic
+from local_search import improve_tour, distance_function
+from mtsp import solve_mtsp, solve_mtsp_split, route_length
+from multi_start import multi_start_search
+from route_plot import FigureExporter, FORMATS as FIGURE_FORMATS
+from spatial_index import grid_nearest_neighbor_tour
+from tsp_distances import get_distances, clear_distance_cache
+from tsplib import read_tsplib
+
+MODULE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+SUBMISSION_DIRECTORY = os.path.join(MODULE_DIRECTORY, '..', '1-caixeiro-viajante-projeto-1-submissao', 'program')
+RANDOM_SIZES = [8, 12, 50, 200, 1000, 5000]  # Tamanhos padrão das instâncias aleatórias
+RANDOM_TRAVELERS = 3      # Número de viajantes das instâncias aleatórias
+TIME_TOLERANCE = 0.25     # Aumento relativo de tempo tolerado em relação à linha de base
+MEMORY_TOLERANCE = 0.25   # Aumento relativo do pico de memória tolerado
+LENGTH_TOLERANCE = 1e-6   # Aumento relativo da distância tolerado
+MIN_TIME = 0.05           # Tempos abaixo deste valor (s) são ruído de medição e não contam como regressão
+FIELDS = ['instance', 'n', 'm', 'problem', 'solver', 'status', 'time', 'peak_memory_mb', 'length', 'routes',
+          'reference', 'gap']
+
+Solver = namedtuple('Solver', ['function', 'problem', 'max_cities', 'exact'])
+
+
+@functools.lru_cache(maxsize=None)
+def load_script(path):
+    """Carrega um script do repositório cujo nome não é um identificador Python válido (ex.: 'n-tsp-my-heuristic')."""
+    name = os.path.splitext(os.path.basename(path))[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def closed(tour):
+    """Converte um tour aberto em uma lista com uma única rota fechada."""
+    tour = [int(city) for city in tour]
+    index = tour.index(0)
+    tour = tour[index:] + tour[:index]
+    return [tour + [0]]
+
+
+def solve_brute_force(coords, num_viajantes):
+    module = load_script(os.path.join(MODULE_DIRECTORY, 'caixeiro-viajante-brute-force.py'))
+    tour, _ = module.brute_force_traveling_salesman([tuple(point) for point in coords.tolist()])
+    return closed(tour)
+
+
+def solve_brute_force_pruned(coords, num_viajantes):
+    _, tour = brute_force_tsp(get_distances(coords))
+    return closed(tour)
+
+
+def solve_held_karp(coords, num_viajantes):
+    _, tour = held_karp(get_distances(coords))
+    return closed(tour)
+
+
+def solve_branch_and_bound(coords, num_viajantes):
+    return closed(branch_and_bound(get_distances(coords), time_limit=10.0).tour)
+
+
+def solve_nearest_neighbor(coords, num_viajantes):
+    module = load_script(os.path.join(MODULE_DIRECTORY, 'caixeiro-viajante-heuristicas.py'))
+    distances = get_distances(coords)
+    return closed(module.nearest_neighbor_algorithm(distances, len(coords)))
+
+
+def solve_grid_nearest_neighbor(coords, num_viajantes):
+    return closed(grid_nearest_neighbor_tour(coords))
+
+
+def solve_local_search(coords, num_viajantes):
+    return closed(improve_tour(grid_nearest_neighbor_tour(coords), coords=coords))
+
+
+def solve_lin_kernighan(coords, num_viajantes):
+    return closed(lin_kernighan(grid_nearest_neighbor_tour(coords), coords=coords, time_limit=5.0))
+
+
+def solve_multi_start(coords, num_viajantes):
+    return closed(multi_start_search(coords=coords, n_starts=16, k_best=1, time_limit=10.0, workers=1)[0][1])
+
+
+def solve_my_heuristic(coords, num_viajantes):
+    module = load_script(os.path.join(SUBMISSION_DIRECTORY, 'n-tsp-my-heuristic.py'))
+    return module.n_tsp_my_heuristic([tuple(point) for point in coords.tolist()], num_viajantes)
+
+
+def solve_definitive(coords, num_viajantes):
+    module = load_script(os.path.join(MODULE_DIRECTORY, 'n-caixeiros-viajantes.py'))
+    return module.n_tsp_definitive([tuple(point) for point in coords.tolist()], num_viajantes)
+
+
+def solve_cluster(coords, num_viajantes):
+    return solve_mtsp(coords, num_viajantes)
+
+
+def solve_split(coords, num_viajantes):
+    return solve_mtsp_split(coords, num_viajantes)
+
+
+def solve_memetic(coords, num_viajantes):
+    return solve_mtsp_memetic(coords, num_viajantes, time_limit=10.0, islands=2, workers=1)
+
+
+SOLVERS = {
+    'brute_force': Solver(solve_brute_force, 'tsp', 9, True),
+    'brute_force_pruned': Solver(solve_brute_force_pruned, 'tsp', 14, True),
+    'held_karp': Solver(solve_held_karp, 'tsp', 16, True),
+    'branch_and_bound': Solver(solve_branch_and_bound, 'tsp', 100, False),
+    'nearest_neighbor': Solver(solve_nearest_neighbor, 'tsp', 2000, False),
+    'grid_nearest_neighbor': Solver(solve_grid_nearest_neighbor, 'tsp', None, False),
+    'local_search': Solver(solve_local_search, 'tsp', None, False),
+    'lin_kernighan': Solver(solve_lin_kernighan, 'tsp', None, False),
+    'multi_start': Solver(solve_multi_start, 'tsp', 2000, False),  # Memória medida só no processo principal
+    'mtsp_my_heuristic': Solver(solve_my_heuristic, 'mtsp', 2000, False),
+    'mtsp_definitive': Solver(solve_definitive, 'mtsp', None, False),
+    'mtsp_cluster': Solver(solve_cluster, 'mtsp', None, False),
+    'mtsp_split': Solver(solve_split, 'mtsp', None, False),
+    'mtsp_memetic': Solver(solve_memetic, 'mtsp', 5000, False),  # Memória medida só no processo principal
+}
+
+
+def repository_instances():
+    """
+    Instâncias de instances.py (diretório da submissão).
+
+    Retorna:
+    list: Lista de tuplas (nome, coordenadas (n, 2), número de viajantes).
+    """
+    module = load_script(os.path.join(SUBMISSION_DIRECTORY, 'instances.py'))
+    found = []
+    for name, value in vars(module).items():
+        if name.startswith('mTSP_n'):
+            num_travelers = int(name.rsplit('_m', 1)[1])
+            found.append((name, np.asarray(value, dtype=np.float64), num_travelers))
+    return sorted(found, key=lambda item: len(item[1]))
+
+
+def random_instances(sizes, num_travelers=RANDOM_TRAVELERS, seed=0):
+    """
+    Instâncias aleatórias uniformes (coordenadas inteiras em [0, 1000]) de tamanhos crescentes, reprodutíveis pela
+    semente.
+
+    Retorna:
+    list: Lista de tuplas (nome, coordenadas (n, 2), número de viajantes).
+    """
+    found = []
+    for n in sizes:
+        random_generator = np.random.default_rng(seed + n)
+        coords = random_generator.integers(0, 1001, size=(n, 2)).astype(np.float64)
+        found.append((f'random_n{n}_m{num_travelers}', coords, num_travelers))
+    return found
+
+
+def tsplib_instances(paths, num_travelers=RANDOM_TRAVELERS):
+    """
+    Instâncias TSPLIB (.tsp) com coordenadas. Os resolvedores usam a distância euclidiana real sobre as coordenadas,
+    então os comprimentos não são arredondados como nas métricas inteiras do TSPLIB; instâncias sem coordenadas
+    (EXPLICIT sem DISPLAY_DATA_SECTION) são ignoradas com um aviso.
+
+    Retorna:
+    list: Lista de tuplas (nome, coordenadas (n, 2), número de viajantes).
+    """
+    found = []
+    for path in paths:
+        instance = read_tsplib(path)
+        if instance.coords is None:
+            print(f"Instância {instance.name} ignorada: o arquivo não tem coordenadas.")
+            continue
+        found.append((f'{instance.name}_m{num_travelers}', np.asarray(instance.coords, dtype=np.float64),
+                      num_travelers))
+    return found
+
+
+def measure(function, coords, num_viajantes, trace_memory=True):
+    """
+    Executa um resolvedor medindo o tempo de parede e, opcionalmente, o pico de memória alocada (tracemalloc, que
+    também registra as alocações do NumPy).
+
+    Retorna:
+    tuple: (rotas, tempo em segundos, pico de memória em MiB ou None).
+    """
+    clear_distance_cache()  # Cada resolvedor paga o custo de calcular as próprias distâncias
+    if trace_memory:
+        tracemalloc.start()
+    start_time = time.perf_counter()
+    try:
+        routes = function(coords, num_viajantes)
+    finally:
+        interval = time.perf_counter() - start_time
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+    return routes, interval, peak
+
+
+def check_routes(routes, n, problem):
+    """Confere se as rotas começam e terminam na cidade 0 e visitam cada cidade exatamente uma vez."""
+    if any(route[0] != 0 or route[-1] != 0 for route in routes):
+        raise ValueError("Todas as rotas devem começar e terminar na cidade 0.")
+    if problem == 'tsp' and len(routes) != 1:
+        raise ValueError("Um resolvedor de TSP deve devolver uma única rota.")
+    if sorted(city for route in routes for city in route[1:-1]) != list(range(1, n)):
+        raise ValueError("As rotas não visitam cada cidade exatamente uma vez.")
+
+
+def run_benchmark(instances, solver_names=None, trace_memory=True, verbose=True, exporter=None):
+    """
+    Executa os resolvedores sobre as instâncias, sem interação com o usuário.
+
+    Os resolvedores de TSP rodam com um único viajante e os de mTSP com o número de viajantes da instância. Resolvedores
+    com limite de cidades são registrados como 'skipped' nas instâncias maiores, e exceções como 'error'. O gap de cada
+    resultado é relativo ao ótimo, quando um resolvedor exato rodou, ou à melhor distância obtida para o mesmo problema.
+    No mTSP alguns resolvedores podem deixar viajantes parados e outros usam sempre os m viajantes; como as duas
+    variantes não são comparáveis, o gap só compara resultados que usam o mesmo número de rotas não vazias ('routes').
+
+    Parâmetros:
+    instances (lista): Tuplas (nome, coordenadas, número de viajantes).
+    solver_names (lista, opcional): Nomes dos resolvedores em SOLVERS; por padrão todos.
+    trace_memory (bool): Se o pico de memória deve ser medido (o tracemalloc deixa o código Python mais lento).
+    verbose (bool): Se cada resultado deve ser impresso.
+    exporter (route_plot.FigureExporter, opcional): Recebe a figura das rotas de cada resultado 'ok'. Sem
+        trace_memory, as figuras são gravadas em segundo plano enquanto os próximos resolvedores rodam (os tempos
+        medidos incluem a disputa pela CPU com o Matplotlib). Com trace_memory, as rotas ficam guardadas e as figuras
+        só são agendadas depois de todas as medições, pois o tracemalloc também contaria as alocações das threads.
+
+    Retorna:
+    list: Um dicionário por (instância, resolvedor) com os campos de FIELDS.
+    """
+    solver_names = list(solver_names or SOLVERS)
+    unknown = [name for name in solver_names if name not in SOLVERS]
+    if unknown:
+        raise ValueError(f"Resolvedores desconhecidos: {unknown}. Disponíveis: {list(SOLVERS)}.")
+
+    records = []
+    figures = []
+    for name, coords, num_travelers in instances:
+        n = len(coords)
+        dist = distance_function(coords=coords)
+        results = []
+        for solver_name in solver_names:
+            solver = SOLVERS[solver_name]
+            m = 1 if solver.problem == 'tsp' else num_travelers
+            record = {'instance': name, 'n': n, 'm': m, 'problem': solver.problem, 'solver': solver_name,
+                      'status': 'skipped', 'time': None, 'peak_memory_mb': None, 'length': None, 'routes': None}
+            if solver.max_cities is None or n <= solver.max_cities:
+                try:
+                    routes, record['time'], record['peak_memory_mb'] = measure(solver.function, coords, m,
+                                                                               trace_memory)
+                    check_routes(routes, n, solver.problem)
+                    record['length'] = sum(route_length(route, dist) for route in routes)
+                    record['routes'] = sum(1 for route in routes if len(route) > 2)
+                    record['status'] = 'ok'
+                    if exporter is not None:
+                        figures.append((f'{name}-{solver_name}', coords, routes,
+                                        f"{name} / {solver_name}: {record['length']:.3f}"))
+                        if not trace_memory:
+                            submit_figures(exporter, figures)
+                except Exception as error:  # Um resolvedor com erro não interrompe o benchmark
+                    record['status'] = f'error: {error}'
+            results.append((solver, record))
+
+        groups = {(record['problem'], record['routes']) for _, record in results if record['status'] == 'ok'}
+        for problem, used in groups:
+            solved = [(solver, record) for solver, record in results
+                      if record['status'] == 'ok' and (record['problem'], record['routes']) == (problem, used)]
+            exact = [record['length'] for solver, record in solved if solver.exact]
+            best = min(exact) if exact else min((record['length'] for _, record in solved), default=None)
+            for _, record in solved:
+                record['reference'] = 'optimal' if exact else 'best'
+                record['gap'] = (record['length'] - best) / best if best else 0.0
+
+        for _, record in results:
+            record.setdefault('reference', None)
+            record.setdefault('gap', None)
+            records.append(record)
+            if verbose:
+                print(format_record(record))
+
+    if exporter is not None:
+        submit_figures(exporter, figures)
+    return records
+
+
+def submit_figures(exporter, figures):
+    """Agenda no exporter as figuras pendentes, tuplas (nome, coordenadas, rotas, título), e esvazia a lista."""
+    for name, coords, routes, title in figures:
+        exporter.submit(name, coords, routes, title=title)
+    figures.clear()
+
+
+def format_record(record):
+    if record['status'] != 'ok':
+        return f"{record['instance']:22} {record['solver']:22} {record['status']}"
+    memory = f"{record['peak_memory_mb']:9.2f} MiB" if record['peak_memory_mb'] is not None else ' ' * 13
+    return (f"{record['instance']:22} {record['solver']:22} {record['time']:9.3f} s {memory} "
+            f"{record['length']:14.3f}  rotas {record['routes']:3d}  gap {100 * record['gap']:7.3f}% "
+            f"({record['reference']})")
+
+
+def write_report(records, path):
+    """Grava os resultados em CSV ou JSON, de acordo com a extensão do arquivo."""
+    if path.endswith('.json'):
+        metadata = {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+                    'cpus': os.cpu_count(), 'created': time.strftime('%Y-%m-%d %H:%M:%S')}
+        with open(path, 'w') as file:
+            json.dump({'metadata': metadata, 'records': records}, file, indent=2)
+    else:
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+
+
+def load_report(path):
+    """Lê um relatório JSON gravado por write_report."""
+    with open(path) as file:
+        return json.load(file)['records']
+
+
+def compare_with_baseline(records, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE,
+                          length_tolerance=LENGTH_TOLERANCE):
+    """
+    Compara os resultados com uma linha de base e aponta as regressões: resolvedores que passaram a falhar, ficaram
+    mais lentos, usaram mais memória ou encontraram rotas mais longas do que o tolerado.
+
+    Retorna:
+    list: Mensagens descrevendo cada regressão encontrada.
+    """
+    previous = {(record['instance'], record['solver']): record for record in baseline}
+    regressions = []
+    for record in records:
+        old = previous.get((record['instance'], record['solver']))
+        if old is None or old['status'] != 'ok':
+            continue
+        key = f"{record['instance']} / {record['solver']}"
+        if record['status'] != 'ok':
+            regressions.append(f"{key}: {record['status']} (antes: ok)")
+            continue
+        if record['time'] > max(old['time'] * (1 + time_tolerance), MIN_TIME):
+            regressions.append(f"{key}: tempo {old['time']:.3f} s -> {record['time']:.3f} s")
+        if (record['peak_memory_mb'] is not None and old['peak_memory_mb'] is not None
+                and record['peak_memory_mb'] > old['peak_memory_mb'] * (1 + memory_tolerance) + 1):
+            regressions.append(f"{key}: memória {old['peak_memory_mb']:.2f} MiB -> {record['peak_memory_mb']:.2f} MiB")
+        if record['length'] > old['length'] * (1 + length_tolerance):
+            regressions.append(f"{key}: distância {old['length']:.3f} -> {record['length']:.3f}")
+    return regressions
+
+
+def parse_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos resolvedores de TSP e mTSP.")
+    parser.add_argument('--solvers', nargs='+', choices=list(SOLVERS), help="Resolvedores executados (padrão: todos).")
+    parser.add_argument('--sizes', nargs='*', type=int, default=RANDOM_SIZES,
+                        help="Tamanhos das instâncias aleatórias.")
+    parser.add_argument('--travelers', type=int, default=RANDOM_TRAVELERS,
+                        help="Número de viajantes das instâncias aleatórias.")
+    parser.add_argument('--seed', type=int, default=0, help="Semente das instâncias aleatórias.")
+    parser.add_argument('--tsplib', nargs='*', default=[], help="Arquivos .tsp do TSPLIB incluídos no benchmark.")
+    parser.add_argument('--no-repository', action='store_true', help="Não executa as instâncias de instances.py.")
+    parser.add_argument('--no-memory', action='store_true', help="Não mede o pico de memória (mais rápido).")
+    parser.add_argument('--output', nargs='*', default=['benchmark.csv', 'benchmark.json'],
+                        help="Relatórios gravados (.csv ou .json).")
+    parser.add_argument('--plots', help="Diretório onde a figura das rotas de cada resultado é gravada. Com a medição "
+                                        "de memória (padrão), as figuras só são gravadas ao final do benchmark e as "
+                                        "rotas ficam em memória até lá; com --no-memory, são gravadas em paralelo "
+                                        "com os resolvedores, disputando a CPU com as medições de tempo.")
+    parser.add_argument('--plot-format', choices=FIGURE_FORMATS, default='png', help="Formato das figuras.")
+    parser.add_argument('--baseline', help="Relatório JSON usado como linha de base para detectar regressões.")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    options = parse_arguments(arguments)
+    instances = [] if options.no_repository else repository_instances()
+    instances += random_instances(options.sizes, options.travelers, options.seed)
+    instances += tsplib_instances(options.tsplib, options.travelers)
+    exporter = FigureExporter(options.plots, options.plot_format) if options.plots else None
+    try:
+        records = run_benchmark(instances, options.solvers, trace_memory=not options.no_memory, exporter=exporter)
+    finally:
+        if exporter is not None:
+            exporter.close()
+    for path in options.output:
+        write_report(records, path)
+        print(f"Relatório gravado em {path}")
+
+    if options.baseline:
+        regressions = compare_with_baseline(records, load_report(options.baseline))
+        for message in regressions:
+            print(f"REGRESSÃO {message}")
+        print(f"{len(regressions)} regressões em relação a {options.baseline}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
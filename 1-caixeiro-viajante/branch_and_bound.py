@@ -0,0 +1,348 @@
+from collections import namedtuple
+import heapq
+import os
+import time
+
+import numpy as np
+
+from local_search import improve_tour
+from tsp_distances import get_distances
+
+ROOT_ITERATIONS = 200     # Iterações do subgradiente no nó raiz
+NODE_ITERATIONS = 30      # Iterações do subgradiente nos demais nós (partindo das penalidades do nó pai)
+TOLERANCE = 1e-9          # Tolerância relativa usada para podar nós com limite igual ao incumbente
+
+INSTANCES_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                                   '1-caixeiro-viajante-projeto-1-submissao', 'instances')
+
+BranchAndBoundResult = namedtuple('BranchAndBoundResult',
+                                  ['cost', 'tour', 'lower_bound', 'gap', 'nodes', 'optimal', 'elapsed'])
+
+Node = namedtuple('Node', ['included', 'excluded', 'penalties'])
+
+
+def tour_cost(distances, tour):
+    """Calcula o comprimento de um tour fechado (volta à cidade inicial); inteiro se a matriz for inteira."""
+    tour = np.asarray(tour)
+    return distances[tour, np.roll(tour, -1)].sum().item()
+
+
+def nearest_neighbor_tour(distances, start=0):
+    """
+    Constrói um tour pelo vizinho mais próximo sobre a matriz de distâncias, usado como limite superior inicial.
+
+    Parâmetros:
+    distances (ndarray): Matriz (n, n) de distâncias.
+    start (int): Cidade inicial.
+
+    Retorna:
+    list: Tour começando em start.
+    """
+    n = len(distances)
+    visited = np.zeros(n, dtype=bool)
+    tour = [start]
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, distances[tour[-1]])
+        city = int(row.argmin())
+        tour.append(city)
+        visited[city] = True
+    return tour
+
+
+def one_tree(costs):
+    """
+    Calcula a 1-árvore mínima: árvore geradora mínima sobre as cidades 1..n-1 mais as duas arestas mais baratas da
+    cidade 0 (algoritmo de Prim em O(n²) com operações vetorizadas).
+
+    Parâmetros:
+    costs (ndarray): Matriz (n, n) de custos; -inf força uma aresta e +inf a proíbe.
+
+    Retorna:
+    tuple: (arestas, graus) onde arestas é um array (n, 2) ou None se não existir 1-árvore viável.
+    """
+    n = len(costs)
+    in_tree = np.zeros(n, dtype=bool)
+    in_tree[0] = True
+    key = costs[1].copy()
+    link = np.ones(n, dtype=np.int64)
+    in_tree[1] = True
+    key[in_tree] = np.inf
+    edges = np.empty((n, 2), dtype=np.int64)
+    for k in range(n - 2):
+        city = int(key.argmin())
+        if key[city] == np.inf:
+            return None, None
+        edges[k] = link[city], city
+        in_tree[city] = True
+        key[city] = np.inf
+        closer = ~in_tree & (costs[city] < key)
+        key[closer] = costs[city][closer]
+        link[closer] = city
+
+    # Conecta a cidade 0 pelas duas arestas mais baratas
+    nearest = np.argpartition(costs[0, 1:], 1)[:2] + 1
+    if (costs[0, nearest] == np.inf).any():
+        return None, None
+    edges[n - 2] = 0, nearest[0]
+    edges[n - 1] = 0, nearest[1]
+    degrees = np.bincount(edges.ravel(), minlength=n)
+    return edges, degrees
+
+
+def edges_to_tour(edges, n):
+    """Converte as arestas de uma 1-árvore onde todos os graus são 2 em um tour a partir da cidade 0."""
+    neighbors = [[] for _ in range(n)]
+    for a, b in edges:
+        neighbors[a].append(int(b))
+        neighbors[b].append(int(a))
+    tour = [0]
+    previous, city = 0, neighbors[0][0]
+    while city != 0:
+        tour.append(city)
+        previous, city = city, neighbors[city][0] if neighbors[city][0] != previous else neighbors[city][1]
+    return tour
+
+
+def node_costs(distances, node):
+    """Monta a matriz de custos de um nó: arestas incluídas valem -inf e arestas excluídas valem +inf."""
+    costs = distances.copy()
+    np.fill_diagonal(costs, np.inf)
+    for edges, value in ((node.excluded, np.inf), (node.included, -np.inf)):
+        if edges:
+            a, b = np.array(edges).T
+            costs[a, b] = costs[b, a] = value
+    return costs
+
+
+def held_karp_bound(distances, node, upper_bound, iterations):
+    """
+    Limite inferior de Held-Karp (1-árvore com penalidades lagrangianas ajustadas pelo método do subgradiente).
+
+    Parâmetros:
+    distances (ndarray): Matriz (n, n) de distâncias.
+    node (Node): Nó da árvore de busca com as arestas incluídas/excluídas e as penalidades iniciais.
+    upper_bound (float): Custo do melhor tour conhecido, usado no tamanho do passo.
+    iterations (int): Número máximo de iterações do subgradiente.
+
+    Retorna:
+    tuple: (limite inferior, penalidades, arestas da melhor 1-árvore, graus da melhor 1-árvore).
+    """
+    base_costs = node_costs(distances, node)
+    penalties = node.penalties.copy()
+    best = (-np.inf, penalties, None, None)
+    step_scale = 2.0
+    stagnation = 0
+    for _ in range(iterations):
+        edges, degrees = one_tree(base_costs + penalties[:, None] + penalties[None, :])
+        if edges is None:
+            return np.inf, penalties, None, None
+        length = (distances[edges[:, 0], edges[:, 1]] + penalties[edges[:, 0]] + penalties[edges[:, 1]]).sum()
+        bound = length - 2 * penalties.sum()
+        if bound > best[0]:
+            best = (bound, penalties.copy(), edges, degrees)
+            stagnation = 0
+        else:
+            stagnation += 1
+            if stagnation >= 5:
+                step_scale /= 2
+                stagnation = 0
+
+        subgradient = degrees - 2
+        norm = (subgradient * subgradient).sum()
+        if norm == 0 or bound >= upper_bound * (1 - TOLERANCE):
+            break  # A 1-árvore é um tour ou o nó já pode ser podado
+        penalties = penalties + step_scale * (upper_bound - bound) / norm * subgradient
+    return best
+
+
+def propagate(node, n):
+    """
+    Propaga as restrições de um nó: cidades com duas arestas incluídas têm as demais arestas excluídas e a aresta
+    que fecharia um subciclo entre as pontas de um caminho de arestas incluídas é excluída.
+
+    Retorna:
+    Node ou None: O nó com as exclusões propagadas, ou None se as arestas incluídas forem inviáveis.
+    """
+    degree = np.zeros(n, dtype=np.int64)
+    parent = list(range(n))
+
+    def find(city):
+        while parent[city] != city:
+            parent[city] = parent[parent[city]]
+            city = parent[city]
+        return city
+
+    for a, b in node.included:
+        degree[a] += 1
+        degree[b] += 1
+        root_a, root_b = find(a), find(b)
+        if root_a == root_b and len(node.included) < n:
+            return None  # Subciclo
+        parent[root_a] = root_b
+    if (degree > 2).any():
+        return None
+
+    excluded = set(node.excluded)
+    included = set(node.included)
+    for city in np.flatnonzero(degree == 2).tolist():
+        for other in range(n):
+            edge = (min(city, other), max(city, other))
+            if other != city and edge not in included:
+                excluded.add(edge)
+
+    # Exclui a aresta que fecharia um subciclo entre as pontas de cada caminho
+    endpoints = {}
+    sizes = {}
+    for city in range(n):
+        root = find(city)
+        sizes[root] = sizes.get(root, 0) + 1
+        if degree[city] == 1:
+            endpoints.setdefault(root, []).append(city)
+    for root, (a, b) in ((r, e) for r, e in endpoints.items() if len(e) == 2):
+        if sizes[root] < n:
+            excluded.add((min(a, b), max(a, b)))
+    return node._replace(excluded=tuple(sorted(excluded)))
+
+
+def branch(node, degrees, edges, n):
+    """
+    Ramifica um nó a partir de uma cidade com grau maior que 2 na 1-árvore (esquema de Volgenant e Jonker).
+
+    Retorna:
+    list: Lista de nós filhos (antes da propagação).
+    """
+    included = set(node.included)
+    city = int(np.flatnonzero(degrees > 2)[0])
+    free = [(min(a, b), max(a, b)) for a, b in edges.tolist()
+            if city in (a, b) and (min(a, b), max(a, b)) not in included]
+    fixed = sum(1 for edge in included if city in edge)
+    first = free[0]
+    children = [node._replace(excluded=node.excluded + (first,))]
+    if fixed == 1 or len(free) < 2:
+        children.append(node._replace(included=node.included + (first,)))
+        return children
+    second = free[1]
+    children.append(node._replace(included=node.included + (first,), excluded=node.excluded + (second,)))
+    children.append(node._replace(included=node.included + (first, second)))
+    return children
+
+
+def branch_and_bound(distances, initial_tour=None, time_limit=10.0, node_limit=100000, control=None):
+    """
+    Resolve o TSP de forma exata por branch-and-bound, com limites inferiores de 1-árvore (Held-Karp) e busca pelo
+    melhor limite (best-first).
+
+    O limite superior inicial vem de um tour heurístico. A busca para ao esgotar a fila (solução ótima provada), ao
+    atingir o limite de nós ou o limite de tempo; nesses casos o resultado informa o melhor tour encontrado, o maior
+    limite inferior provado e o gap entre eles.
+
+    Parâmetros:
+    distances (ndarray): Matriz (n, n) de distâncias simétrica.
+    initial_tour (lista, opcional): Tour inicial; por padrão o melhor tour do vizinho mais próximo melhorado pela
+        busca local 2-opt/Or-opt.
+    time_limit (float): Tempo máximo de execução em segundos.
+    node_limit (int): Número máximo de nós expandidos.
+    control (anytime.SearchControl, opcional): Limites e cancelamento adicionais; cada novo incumbente é entregue a
+        control.offer.
+
+    Retorna:
+    BranchAndBoundResult: Custo e tour do incumbente, limite inferior, gap relativo, nós expandidos, se a solução é
+    ótima provada e o tempo gasto.
+    """
+    start_time = time.time()
+    distances = np.asarray(distances, dtype=np.float64)
+    n = len(distances)
+    if n <= 3:
+        tour = list(range(n))
+        cost = tour_cost(distances, tour) if n > 1 else 0.0
+        return BranchAndBoundResult(cost, tour, cost, 0.0, 0, True, time.time() - start_time)
+
+    if initial_tour is None:
+        initial_tour = min((improve_tour(nearest_neighbor_tour(distances, start), distances=distances)
+                            for start in range(min(n, 10))), key=lambda candidate: tour_cost(distances, candidate))
+    best_tour = list(initial_tour)
+    upper_bound = tour_cost(distances, best_tour)
+    if control is not None:
+        control.offer(upper_bound, best_tour)
+
+    root = Node((), (), np.zeros(n))
+    bound, penalties, edges, degrees = held_karp_bound(distances, root, upper_bound, ROOT_ITERATIONS)
+    if (degrees == 2).all():
+        tour = edges_to_tour(edges, n)  # A 1-árvore da raiz já é um tour ótimo
+        cost = tour_cost(distances, tour)
+        if cost < upper_bound:
+            upper_bound, best_tour = cost, tour
+            if control is not None:
+                control.offer(cost, tour)
+    queue = [(bound, 0, root._replace(penalties=penalties), edges, degrees)]
+    lower_bound = bound
+    counter = 1
+    nodes = 0
+
+    while queue:
+        bound, _, node, edges, degrees = queue[0]
+        lower_bound = min(bound, upper_bound)
+        if bound >= upper_bound * (1 - TOLERANCE):
+            queue.clear()
+            break
+        if nodes >= node_limit or time.time() - start_time > time_limit:
+            break
+        if control is not None and control.stopped(1 if nodes else 0):  # Conta o nó expandido na iteração anterior
+            break
+        heapq.heappop(queue)
+        nodes += 1
+
+        if (degrees == 2).all():
+            continue  # Já foi tratado como tour ao ser inserido na fila
+
+        for child in branch(node, degrees, edges, n):
+            child = propagate(child, n)
+            if child is None:
+                continue
+            child_bound, child_penalties, child_edges, child_degrees = held_karp_bound(
+                distances, child, upper_bound, NODE_ITERATIONS)
+            if child_edges is None:
+                continue
+            if (child_degrees == 2).all():
+                tour = edges_to_tour(child_edges, n)
+                cost = tour_cost(distances, tour)
+                if cost < upper_bound:
+                    upper_bound, best_tour = cost, tour
+                    if control is not None:
+                        control.offer(cost, tour)
+                continue
+            if child_bound < upper_bound * (1 - TOLERANCE):
+                heapq.heappush(queue, (child_bound, counter, child._replace(penalties=child_penalties),
+                                       child_edges, child_degrees))
+                counter += 1
+
+    optimal = not queue
+    if optimal:
+        lower_bound = upper_bound
+    gap = (upper_bound - lower_bound) / upper_bound if upper_bound > 0 else 0.0
+    return BranchAndBoundResult(upper_bound, best_tour, lower_bound, gap, nodes, optimal, time.time() - start_time)
+
+
+def test_branch_and_bound():
+    for filename in ['mTSP-n31-m3', 'mTSP-n47-m3', 'mTSP-n59-m3', 'mTSP-n91-m5']:
+        coordinates = np.loadtxt(os.path.join(INSTANCES_DIRECTORY, filename), usecols=(1, 2))
+        distances = get_distances(coordinates)
+        result = branch_and_bound(distances, time_limit=10.0)
+
+        print(f"Instância:          {filename}")
+        print(f"Melhor tour:        {result.tour}")
+        print(f"Distância:          {result.cost:.3f}")
+        print(f"Limite inferior:    {result.lower_bound:.3f}")
+        print(f"Gap:                {100 * result.gap:.3f}%")
+        print(f"Ótimo provado:      {result.optimal}")
+        print(f"Nós expandidos:     {result.nodes}")
+        print(f"Tempo de execução:  {result.elapsed:.3f} segundos\n")
+
+
+def main():
+    test_branch_and_bound()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+from concurrent.futures import ProcessPoolExecutor
+import math
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from branch_and_bound import nearest_neighbor_tour, tour_cost
+from local_search import improve_tour
+from tsp_distances import get_distances
+
+MAX_CITIES = 16           # Acima deste número de cidades a enumeração deixa de ser um oráculo prático
+PREFIX_LENGTH = 3         # Cidades fixas no início de cada parte da busca paralela (incluindo a cidade 0)
+REFRESH_LEVELS = 4        # Níveis finais da busca em que o melhor custo compartilhado não é relido
+
+_shard_state = {}         # Estado de cada processo trabalhador: estruturas da busca e o melhor custo compartilhado
+
+
+def search_data(distances):
+    """
+    Prepara as estruturas da enumeração: linhas da matriz como listas Python (acesso mais rápido do que em um ndarray),
+    a ordem dos vizinhos de cada cidade e a menor aresta que sai de cada cidade, usada no limite inferior. Matrizes
+    inteiras (integer_distances) viram inteiros Python, então os custos acumulados são exatos e as comparações da poda
+    são entre inteiros.
+
+    Retorna:
+    tuple: (linhas, vizinhos ordenados por distância, menor aresta de saída de cada cidade).
+    """
+    matrix = np.asarray(distances)
+    if not np.issubdtype(matrix.dtype, np.integer):
+        matrix = matrix.astype(np.float64)
+    rows = matrix.tolist()
+    masked = matrix.astype(np.float64) + np.diag(np.full(len(matrix), np.inf))
+    order = np.argsort(masked, axis=1, kind='stable')[:, :-1].tolist()
+    min_out = masked.min(axis=1).astype(matrix.dtype).tolist() if len(matrix) > 1 else [0]
+    return rows, order, min_out
+
+
+def enumerate_tours(rows, order, min_out, prefix, incumbent, shared=None, control=None):
+    """
+    Busca em profundidade sobre os tours que começam por prefix (prefix[0] == 0), acumulando o custo aresta a aresta.
+
+    Apenas um de cada par de tours espelhados é visitado: a cidade 1 precisa aparecer antes da cidade 2. Um ramo é
+    cortado quando o custo parcial mais a menor aresta de saída da cidade atual e de cada cidade não visitada já
+    ultrapassa a melhor solução conhecida. Como a poda é estrita, o primeiro tour de custo mínimo na ordem da busca
+    nunca é cortado, o que torna o resultado independente do momento em que o limite é atualizado.
+
+    Parâmetros:
+    rows (lista): Linhas da matriz de distâncias.
+    order (lista): Vizinhos de cada cidade ordenados pela distância.
+    min_out (lista): Menor aresta que sai de cada cidade.
+    prefix (lista): Início fixo do tour.
+    incumbent (float): Custo da melhor solução conhecida.
+    shared (multiprocessing.Value, opcional): Melhor custo compartilhado entre processos; é lido nos níveis rasos da
+        busca para apertar a poda e atualizado a cada melhoria.
+    control (anytime.SearchControl, opcional): Consultado nos mesmos níveis rasos (cada um conta como um nó); a busca
+        para quando ele indica parada e cada melhoria é entregue a control.offer.
+
+    Retorna:
+    tuple: (custo, tour) do melhor tour com custo até incumbent, ou (inf, None) se não houver.
+    """
+    n = len(rows)
+    visited = [False] * n
+    for city in prefix:
+        visited[city] = True
+    if n > 2 and visited[2] and not visited[1]:
+        return math.inf, None
+    tour = list(prefix)
+    cost = sum(rows[tour[i]][tour[i + 1]] for i in range(len(tour) - 1))
+    remaining = sum(min_out[city] for city in range(n) if not visited[city])
+    bound = [incumbent]
+    best = [math.inf, None]
+    refresh_depth = n - REFRESH_LEVELS
+
+    def dfs(current, depth, cost, remaining):
+        if depth == n:
+            total = cost + rows[current][0]
+            if total <= bound[0] and total < best[0]:
+                best[0], best[1] = total, list(tour)
+                bound[0] = total
+                if shared is not None:
+                    with shared.get_lock():
+                        shared.value = min(shared.value, total)
+                if control is not None:
+                    control.offer(total, tour)
+            return
+        if depth < refresh_depth:
+            if shared is not None:
+                bound[0] = min(bound[0], shared.value)
+            if control is not None and control.stopped(1):
+                return
+        for city in order[current]:
+            if visited[city] or (city == 2 and not visited[1]):
+                continue
+            new_cost = cost + rows[current][city]
+            new_remaining = remaining - min_out[city]
+            if new_cost + min_out[city] + new_remaining > bound[0]:
+                continue
+            visited[city] = True
+            tour.append(city)
+            dfs(city, depth + 1, new_cost, new_remaining)
+            tour.pop()
+            visited[city] = False
+
+    if cost + (min_out[tour[-1]] if len(tour) < n else 0.0) + remaining <= incumbent:
+        dfs(tour[-1], len(tour), cost, remaining)
+    return best[0], best[1]
+
+
+def initial_solution(distances, upper_bound=None):
+    """Tour inicial (vizinho mais próximo seguido da busca local) e o limite superior usado na poda."""
+    tour = improve_tour(nearest_neighbor_tour(distances, 0), distances=distances)
+    cost = tour_cost(distances, tour)
+    if upper_bound is not None and upper_bound < cost:
+        return None, upper_bound
+    return tour, cost
+
+
+def brute_force_tsp(distances, upper_bound=None, control=None):
+    """
+    Enumeração exata do TSP com poda, para uso como oráculo de verificação.
+
+    Em vez das n! permutações, a enumeração fixa a cidade inicial (rotações são o mesmo tour), visita apenas um de cada
+    par de tours espelhados e acumula o custo ao longo da busca em profundidade, cortando os ramos cujo limite inferior
+    ultrapassa a melhor solução conhecida. A solução inicial vem do vizinho mais próximo seguido da busca local, então a
+    poda é efetiva desde o início; instâncias de 13 a 14 cidades são resolvidas em segundos.
+
+    Parâmetros:
+    distances (ndarray): Matriz (n, n) de distâncias simétrica.
+    upper_bound (float, opcional): Custo de um tour conhecido; por padrão é calculado pela heurística.
+    control (anytime.SearchControl, opcional): Limites, cancelamento e callback de incumbentes; se a busca for
+        interrompida, o resultado é o melhor tour encontrado até então.
+
+    Retorna:
+    tuple: (custo mínimo, tour ótimo começando pela cidade 0).
+    """
+    n = len(distances)
+    if n > MAX_CITIES:
+        raise ValueError(f"A enumeração exata suporta no máximo {MAX_CITIES} cidades.")
+    if n <= 3:
+        tour = list(range(n))
+        return tour_cost(distances, tour) if n > 1 else 0.0, tour
+
+    initial, initial_cost = initial_solution(distances, upper_bound)
+    if control is not None and initial is not None:
+        control.offer(initial_cost, initial)
+    rows, order, min_out = search_data(distances)
+    cost, tour = enumerate_tours(rows, order, min_out, [0], initial_cost, control=control)
+    if tour is None:
+        if initial is None:
+            raise ValueError("Nenhum tour tem custo menor ou igual a upper_bound.")
+        return initial_cost, initial
+    return cost, tour
+
+
+def shard_prefixes(rows, length):
+    """
+    Divide o espaço de busca pelos inícios fixos [0, a, b, ...] de um dado comprimento, descartando os que violam a
+    regra dos espelhados (cidade 2 antes da cidade 1), ordenados pelo custo parcial para que as partes mais promissoras
+    rodem primeiro.
+    """
+    n = len(rows)
+    prefixes = [[0]]
+    for _ in range(min(length, n) - 1):
+        prefixes = [prefix + [city] for prefix in prefixes for city in range(1, n)
+                    if city not in prefix and not (city == 2 and 1 not in prefix)]
+    return sorted(prefixes, key=lambda prefix: sum(rows[prefix[i]][prefix[i + 1]] for i in range(len(prefix) - 1)))
+
+
+def _shard_init(distances, incumbent):
+    _shard_state['data'] = search_data(distances)
+    _shard_state['incumbent'] = incumbent
+
+
+def _solve_shard(prefix):
+    rows, order, min_out = _shard_state['data']
+    incumbent = _shard_state['incumbent']
+    return enumerate_tours(rows, order, min_out, prefix, incumbent.value, incumbent)
+
+
+def parallel_brute_force_tsp(distances, workers=None, prefix_length=PREFIX_LENGTH, upper_bound=None):
+    """
+    Versão paralela de brute_force_tsp: o espaço de busca é dividido pelos inícios fixos dos tours e as partes são
+    distribuídas entre os núcleos com um ProcessPoolExecutor.
+
+    Os processos compartilham o custo do melhor tour conhecido em um multiprocessing.Value, de modo que uma melhoria
+    encontrada em um processo aperta imediatamente a poda dos demais. Como a poda é estrita, cada parte que contém um
+    tour ótimo devolve sempre o mesmo tour, e a combinação escolhe o menor custo e, no empate, a primeira parte na
+    ordem fixa de shard_prefixes; o resultado não depende da ordem em que as partes terminam.
+
+    Parâmetros:
+    distances (ndarray): Matriz (n, n) de distâncias simétrica.
+    workers (int, opcional): Número de processos; por padrão o número de núcleos.
+    prefix_length (int): Número de cidades fixas no início de cada parte (incluindo a cidade 0).
+    upper_bound (float, opcional): Custo de um tour conhecido.
+
+    Retorna:
+    tuple: (custo mínimo, tour ótimo começando pela cidade 0).
+    """
+    n = len(distances)
+    if n <= prefix_length + 2:
+        return brute_force_tsp(distances, upper_bound)
+    if n > MAX_CITIES:
+        raise ValueError(f"A enumeração exata suporta no máximo {MAX_CITIES} cidades.")
+
+    initial, initial_cost = initial_solution(distances, upper_bound)
+    distances = np.asarray(distances)
+    prefixes = shard_prefixes(distances.tolist(), prefix_length)
+    incumbent = multiprocessing.Value('d', initial_cost)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=_shard_init,
+                             initargs=(distances, incumbent)) as executor:
+        results = list(executor.map(_solve_shard, prefixes))
+
+    cost, _, tour = min((cost, index, tour) for index, (cost, tour) in enumerate(results))
+    if tour is None:
+        if initial is None:
+            raise ValueError("Nenhum tour tem custo menor ou igual a upper_bound.")
+        return initial_cost, initial
+    return cost, tour
+
+
+def test_brute_force_tsp():
+    for n_cities in [10, 12, 13, 14]:
+        random_generator = np.random.default_rng(n_cities)
+        coordinates = random_generator.uniform(0, 100, size=(n_cities, 2))
+        distances = get_distances(coordinates)
+
+        start_time = time.time()
+        cost, tour = brute_force_tsp(distances)
+        interval = time.time() - start_time
+
+        print(f"Número de cidades:  {n_cities}")
+        print(f"Melhor tour:        {tour}")
+        print(f"Menor distância:    {cost:.3f}")
+        print(f"Tempo de execução:  {interval:.3f} segundos\n")
+        assert math.isclose(cost, tour_cost(distances, tour))
+
+
+def test_parallel_brute_force_tsp():
+    n_cities = 15
+    random_generator = np.random.default_rng(n_cities)
+    coordinates = random_generator.uniform(0, 100, size=(n_cities, 2))
+    distances = get_distances(coordinates)
+
+    for description, solver in [('Serial', brute_force_tsp), ('Paralelo', parallel_brute_force_tsp)]:
+        start_time = time.time()
+        cost, tour = solver(distances)
+        interval = time.time() - start_time
+        print(f"{description}: {cost:.3f} em {interval:.3f} segundos ({os.cpu_count()} núcleos)")
+
+
+def main():
+    test_brute_force_tsp()
+    test_parallel_brute_force_tsp()
+
+
+if __name__ == "__main__":
+    main()
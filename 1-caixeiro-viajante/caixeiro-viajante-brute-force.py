@@ -1,7 +1,12 @@
 from itertools import permutations
 import matplotlib.pyplot as plt
-import random
 import math
+import time
+
+from brute_force import brute_force_tsp
+from instance_generator import random_coordinates
+from route_plot import save_routes
+from tsp_distances import get_distances
 
 
 # Até n = 10 cidades (10! = 3.628.800 Três milhões Seiscentos e vinte e oito mil e oitocentos) o algoritmo de força
@@ -23,12 +28,8 @@ def generate_random_coordinates(min, max, n_cities):
     if n_cities > (max - min) ** 2:
         raise ValueError("The number of cities is too large for the given interval")
 
-    coordinates = [(0, 0)]  # A primeira coordenada é (0,0)
-    for i in range(n_cities - 1):  # Gera n_cities - 1 coordenadas aleatórias
-        x = random.randint(min, max)
-        y = random.randint(min, max)
-        coordinates.append((x, y))
-    return coordinates
+    # A primeira coordenada é (0,0); as demais são sorteadas sem repetições
+    return [tuple(point) for point in random_coordinates(n_cities, min, max, first=(0, 0)).tolist()]
 
 
 def brute_force_traveling_salesman(coordinates):
@@ -46,7 +47,21 @@ def brute_force_traveling_salesman(coordinates):
     return shortest_tour, shortest_distance
 
 
-def plot_tsp_solution(coordinates, tour):
+def brute_force_traveling_salesman_pruned(coordinates):
+    """
+    Versão da força bruta com cidade inicial fixa, sem tours espelhados, custo acumulado ao longo da busca e poda por
+    limite inferior, sobre a matriz de distâncias. Retorna o mesmo formato de brute_force_traveling_salesman e continua
+    viável até 13-14 cidades.
+    """
+    distance, tour = brute_force_tsp(get_distances(coordinates))
+    return tuple(tour), distance
+
+
+def plot_tsp_solution(coordinates, tour, file_path=None):
+    if file_path is not None:
+        # Sem janela: renderiza com o Agg e grava em PNG/SVG
+        return save_routes(file_path, coordinates, [tour], title='Solução do Problema do Caixeiro Viajante',
+                           annotate=True)
     x = [coordinates[i][0] for i in tour]
     y = [coordinates[i][1] for i in tour]
     x.append(x[0])
@@ -76,9 +91,27 @@ def test_brute_force_traveling_salesman():
     plot_tsp_solution(coordenadas, tour)
 
 
+def test_brute_force_traveling_salesman_pruned():
+    min = 0
+    max = 100
+    n_cities = 13
+
+    coordenadas = generate_random_coordinates(min, max, n_cities)
+    print(f"Coordenadas Geradas:       {coordenadas}")
+    start_time = time.time()
+    tour, distance = brute_force_traveling_salesman_pruned(coordenadas)
+    interval = time.time() - start_time
+    print(f"Melhor tour:               {list(tour)}")
+    print(f"Menor distância:           {distance:.3f}")
+    print(f"Tempo de execução:         {interval:.3f} segundos")
+
+    plot_tsp_solution(coordenadas, tour)
+
+
 def main():
     print("\nTesting nearest neighbor algorithm com coordenadas")
     test_brute_force_traveling_salesman()
+    test_brute_force_traveling_salesman_pruned()
 
 
 if __name__ == "__main__":
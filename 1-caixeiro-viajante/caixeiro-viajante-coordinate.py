@@ -1,7 +1,11 @@
 import math
-import random
 import numpy as np
 
+from instance_generator import random_coordinates
+from lin_kernighan import lin_kernighan
+from local_search import improve_tour, tour_length
+from spatial_index import grid_nearest_neighbor_tour
+
 
 coordinates = [(0, 0), (2, 0), (1, 0), (3, 0)]
 
@@ -16,12 +20,7 @@ def generate_random_coordinates_within_defined_interval(min, max, n_cities):
     if n_cities > (max - min) ** 2:
         raise ValueError("The number of cities is too large for the given interval")
 
-    coordinates = []
-    for i in range(n_cities):
-        x = random.randint(min, max)
-        y = random.randint(min, max)
-        coordinates.append((x, y))
-    return coordinates
+    return [tuple(point) for point in random_coordinates(n_cities, min, max).tolist()]
 
 
 def distance_between_two_points(p1, p2):
@@ -37,18 +36,10 @@ def distance_between_two_points_np(p1, p2):
 
 
 def nearest_neighbor_tour_with_coordinate_and_indices(coordenadas):
-    n_cities = len(coordenadas)
-    tour_indices = [0]
-    tour_coordinates = [coordenadas[0]]  # Inicia na cidade inicial
-    unvisited_cities = list(range(1, n_cities))
-
-    while unvisited_cities:
-        next_city = min(unvisited_cities,
-                        key=lambda candidate: distance_between_two_points(coordenadas[tour_indices[-1]],
-                                                                          coordenadas[candidate]))
-        tour_indices.append(next_city)
-        tour_coordinates.append(coordenadas[next_city])
-        unvisited_cities.remove(next_city)
+    # Inicia na cidade inicial; a cidade não visitada mais próxima é consultada em um índice espacial em grade
+    # (com remoção) em vez de percorrer a lista de cidades não visitadas a cada passo
+    tour_indices = grid_nearest_neighbor_tour(coordenadas, start=0)
+    tour_coordinates = [coordenadas[i] for i in tour_indices]
 
     return tour_indices, tour_coordinates
 
@@ -77,6 +68,14 @@ def test_nearest_neighbor_algorithm_com_coordenadas():
     print("Tour das coordenadas:      ", tour_coordinate)
     print("Distância total:           ", total_distance_of_coordinate_tour(coordenadas))
 
+    improved_tour = improve_tour(tour_indices, coords=coordenadas)  # Pós-processamento 2-opt / Or-opt
+    print("Tour após busca local:     ", improved_tour)
+    print("Distância após busca local:", round(tour_length(improved_tour, coords=coordenadas), 3))
+
+    lk_tour = lin_kernighan(tour_indices, coords=coordenadas, time_limit=1.0)  # Lin-Kernighan com perturbações
+    print("Tour Lin-Kernighan:        ", lk_tour)
+    print("Distância Lin-Kernighan:   ", round(tour_length(lk_tour, coords=coordenadas), 3))
+
 
 def main():
     print("\nTesting nearest neighbor algorithm com coordenadas")
@@ -1,64 +1,37 @@
 import math
-import random
+
+from anytime import SearchControl
+from branch_and_bound import branch_and_bound
+from instance_generator import random_coordinates
+from tsp_distances import get_distances
 
 
 def generate_distances(coordinates):
-    n = len(coordinates)
-    distances = [[0] * n for _ in range(n)]
-    for i in range(n):
-        for j in range(n):
-            distances[i][j] = distance_between_two_points(coordinates[i], coordinates[j])
-    return distances
+    # A matriz é construída uma única vez por instância pelo módulo compartilhado tsp_distances
+    return get_distances(coordinates)
 
 
 def generate_random_coordinates_within_defined_interval(min, max, n_cities):
     if n_cities < 2 or n_cities > 10000:
-        raise ValueError("O número de cidades deve ser entre 2 e 50.")
+        raise ValueError("O número de cidades deve ser entre 2 e 10000.")
 
-    coordinates = []
-    for i in range(n_cities):
-        x = random.randint(min, max)
-        y = random.randint(min, max)
-        coordinates.append((x, y))
-    return coordinates
+    return [tuple(point) for point in random_coordinates(n_cities, min, max).tolist()]
 
 
 def distance_between_two_points(p1, p2):
     return math.sqrt((p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2)
 
 
-def held_karp_tsp(distances):
-    n = len(distances)
-    memo = {}
-    min_cost_found = [float('inf')]
-
-    # Recursive function that returns the minimum cost of visiting all cities and the path taken
-    def tsp(mask, current):
-        if mask == (1 << n) - 1:  # All cities have been visited
-            return distances[current][0], [current]  # Return to the starting point
-        if (mask, current) in memo:  # Check if this state has been calculated before
-            return memo[(mask, current)]
-
-        min_cost = float('inf')
-        min_path = []
-        for city in range(n):
-            if mask & (1 << city) == 0:  # If the city has not been visited yet
-                new_mask = mask | (1 << city)  # Update the mask
-                cost, path = tsp(new_mask, city)
-                cost += distances[current][city]
-                if cost < min_cost:
-                    min_cost = cost
-                    min_path = path + [current]
-                # Prune the recursion
-                if cost > min_cost_found[0]:
-                    break
-
-        memo[(mask, current)] = min_cost, min_path
-        if min_cost < min_cost_found[0]:
-            min_cost_found[0] = min_cost
-        return min_cost, min_path
-
-    return tsp(1, 0)  # Start at the starting point
+def held_karp_tsp(distances, time_limit=10.0, node_limit=100000, callback=None, cancel_event=None):
+    # A poda anterior comparava custos parciais com custos de tours completos e memoizava resultados truncados, então
+    # não era exata. O branch-and-bound com limites de 1-árvore é exato e, se os limites forem atingidos, devolve o
+    # melhor tour encontrado junto com o gap provado. Cada tour melhor é entregue a callback(custo, tour) e a busca
+    # para quando cancel_event é ligado (de outra thread, por exemplo).
+    control = SearchControl(callback=callback, cancel_event=cancel_event)
+    result = branch_and_bound(distances, time_limit=time_limit, node_limit=node_limit, control=control)
+    print(f"Lower bound: {result.lower_bound:.3f} | Gap: {100 * result.gap:.3f}% | Optimal: {result.optimal} | "
+          f"Nodes: {result.nodes} | Time: {result.elapsed:.3f} s")
+    return result.cost, result.tour
 
 
 def test_held_karp_tsp():
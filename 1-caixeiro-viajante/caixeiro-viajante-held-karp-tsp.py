@@ -1,26 +1,20 @@
 import math
-import random
+
+from held_karp import held_karp, held_karp_memory
+from instance_generator import random_coordinates
+from tsp_distances import get_distances
 
 
 def generate_distances(coordinates):
-    n = len(coordinates)
-    distances = [[0] * n for _ in range(n)]
-    for i in range(n):
-        for j in range(n):
-            distances[i][j] = distance_between_two_points(coordinates[i], coordinates[j])
-    return distances
+    # A matriz é construída uma única vez por instância pelo módulo compartilhado tsp_distances
+    return get_distances(coordinates)
 
 
 def generate_random_coordinates_within_defined_interval(min, max, n_cities):
     if n_cities < 2 or n_cities > 10000:
-        raise ValueError("O número de cidades deve ser entre 2 e 50.")
+        raise ValueError("O número de cidades deve ser entre 2 e 10000.")
 
-    coordinates = []
-    for i in range(n_cities):
-        x = random.randint(min, max)
-        y = random.randint(min, max)
-        coordinates.append((x, y))
-    return coordinates
+    return [tuple(point) for point in random_coordinates(n_cities, min, max).tolist()]
 
 
 def distance_between_two_points(p1, p2):
@@ -84,5 +78,21 @@ def test_held_karp_tsp():
     print("Coordinates in  order they are visited:", optimal_coordinates)
 
 
+def test_held_karp_iterative():
+    min_coordinate = 0
+    max_coordinate = 100
+    n_cities = 20  # Com as tabelas NumPy densas, instâncias com n = 20-23 são resolvidas exatamente
+
+    coordinates = generate_random_coordinates_within_defined_interval(min_coordinate, max_coordinate, n_cities)
+    distances = generate_distances(coordinates)
+    print(f"Estimated DP table memory: {held_karp_memory(n_cities) / 2 ** 20:.1f} MiB")
+    optimal_distance, optimal_tour = held_karp(distances)  # Bottom-up Held-Karp by popcount layers
+
+    print("City coordinates:", coordinates)
+    print(f"Minimum total distance: {optimal_distance:.3f}")
+    print("Coordinates in  order they are visited:", [coordinates[i] for i in optimal_tour])
+
+
 if __name__ == "__main__":
     test_held_karp_tsp()
+    test_held_karp_iterative()
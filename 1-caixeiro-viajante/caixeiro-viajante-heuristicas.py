@@ -1,6 +1,12 @@
 import random
 import math
 
+import numpy as np
+
+from local_search import improve_tour
+from multi_start import multi_start_search
+from tsp_distances import tour_lengths
+
 n_cities = 17
 
 distances = [
@@ -22,15 +28,13 @@ distances = [
     [776, 868, 1552, 560, 674, 1050, 1278, 742, 1084, 810, 1152, 274, 388, 422, 764, 0, 798],
     [662, 1210, 754, 1358, 1244, 708, 480, 856, 514, 468, 354, 844, 730, 536, 194, 798, 0],
 ]
+distance_array = np.array(distances)  # Matriz usada pelo cálculo vetorizado do comprimento dos tours
 
 
 # Calcula a distância total percorrida ao longo de um passeio, começando e terminando no mesmo local,
 # com base em uma matriz de distâncias predefinida.
 def get_total_distance(tour: list):
-    total_distance = 0
-    for i in range(1, len(tour)):
-        total_distance += distances[tour[i - 1]][tour[i]]
-    return total_distance + distances[tour[-1]][tour[0]]
+    return int(tour_lengths(tour, distances=distance_array))
 
 
 # Algoritmo do vizinho mais próximo: começa na cidade 0 e,
@@ -110,6 +114,23 @@ def test_nearest_neighbor_algorithm_with_random_choices():
     print(f"The total distance of the tour is: {total_distance}")
 
 
+def test_nearest_neighbor_algorithm_with_local_search():
+    n_cities = len(distances)
+    tour = nearest_neighbor_algorithm(distances, n_cities)
+    improved_tour = improve_tour(tour, distances=distances)  # Pós-processamento 2-opt / Or-opt
+    print(f"The tour is: {improved_tour}")
+    print(f"The total distance before local search is: {get_total_distance(tour)}")
+    print(f"The total distance after local search is: {get_total_distance(improved_tour)}")
+
+
+def test_multi_start_nearest_neighbor_algorithm():
+    n = 30  # Percentage of the tour to be composed of random city choices in each start
+    best_tours = multi_start_search(distances=distances, n_starts=500, k_best=3, time_limit=10.0, percentage=n)
+    for cost, tour in best_tours:
+        print(f"The tour is: {tour}")
+        print(f"The total distance of the tour is: {cost}")
+
+
 def main():
 
     print("\nTesting nearest neighbor algorithm")
@@ -121,6 +142,12 @@ def main():
     print("\nTesting nearest neighbor algorithm with random choices")
     test_nearest_neighbor_algorithm_with_random_choices()
 
+    print("\nTesting nearest neighbor algorithm with local search")
+    test_nearest_neighbor_algorithm_with_local_search()
+
+    print("\nTesting parallel multi-start stochastic search")
+    test_multi_start_nearest_neighbor_algorithm()
+
 
 if __name__ == "__main__":
     main()
@@ -26,6 +26,10 @@
 # ALgoritmo meta-heurístico = Algoritmo que tenta encontrar a melhor solução possível
 
 
+import numpy as np
+
+from brute_force import parallel_brute_force_tsp
+
 # Representação do grafo
 graph = {
     "Campinas": {"Limeira": 45, "Sumaré": 23, "Valinhos": 31, "Hortolândia": 13},
@@ -64,5 +68,34 @@ def find_shortest_path(graph):
     return shortest_path, shortest_path_cost
 
 
-shortest_path, shortest_path_cost = find_shortest_path(graph)
-print(f"O caminho mais curto é: {shortest_path} com custo total: {shortest_path_cost}")
+def find_shortest_path_parallel(graph, workers=None):
+    """
+    Versão exata e paralela de find_shortest_path para grafos simétricos. O menor caminho que passa por todas as
+    cidades é o menor ciclo em um grafo com uma cidade fictícia ligada a todas as outras com custo zero; o ciclo é
+    resolvido pela enumeração com poda dividida entre os núcleos (parallel_brute_force_tsp) e a cidade fictícia é
+    removida no final.
+    """
+    cities = list(graph.keys())
+    n = len(cities)
+    if n <= 1:
+        return cities, 0
+    distances = np.zeros((n + 1, n + 1))
+    for i, origin in enumerate(cities):
+        for j, destination in enumerate(cities):
+            if i != j:
+                distances[i + 1, j + 1] = graph[origin][destination]
+    _, tour = parallel_brute_force_tsp(distances, workers=workers)
+    path = [cities[city - 1] for city in tour[1:]]
+    return path, calculate_path_cost(path, graph)
+
+
+def main():
+    shortest_path, shortest_path_cost = find_shortest_path(graph)
+    print(f"O caminho mais curto é: {shortest_path} com custo total: {shortest_path_cost}")
+
+    shortest_path, shortest_path_cost = find_shortest_path_parallel(graph)
+    print(f"O caminho mais curto (paralelo) é: {shortest_path} com custo total: {shortest_path_cost}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import time
+
+import numpy as np
+
+from local_search import improve_tour, tour_length, NEIGHBORS
+from spatial_index import GridIndex, nearest_neighbors
+from tsp_distances import as_coordinate_array
+
+
+class CandidateGraph:
+    """
+    Grafo de candidatos esparso em formato CSR: os vizinhos da cidade i são indices[indptr[i]:indptr[i + 1]],
+    ordenados pela distância. As distâncias não são armazenadas; são calculadas sob demanda a partir das coordenadas,
+    então a memória é O(n * k) em vez dos O(n²) da matriz de distâncias.
+
+    O grafo pode ser passado como lista de candidatos (graph[i]) para improve_tour e lin_kernighan.
+    """
+
+    def __init__(self, coords, indptr, indices):
+        self.points = as_coordinate_array(coords)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32 if len(self.points) < 2 ** 31 else np.int64)
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def __getitem__(self, city):
+        return self.indices[self.indptr[city]:self.indptr[city + 1]].tolist()
+
+    @property
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes
+
+    def degree(self, city=None):
+        """Número de candidatos de uma cidade, ou array com o número de candidatos de todas as cidades."""
+        degrees = np.diff(self.indptr)
+        return degrees if city is None else int(degrees[city])
+
+    def edges(self):
+        """Retorna os arrays (origens, destinos) de todas as arestas do grafo."""
+        return np.repeat(np.arange(len(self), dtype=self.indices.dtype), np.diff(self.indptr)), self.indices
+
+    def weights(self, city=None):
+        """Distâncias euclidianas das arestas de uma cidade (ou de todas as arestas), calculadas sob demanda."""
+        if city is None:
+            sources, targets = self.edges()
+        else:
+            targets = self.indices[self.indptr[city]:self.indptr[city + 1]]
+            sources = np.full(len(targets), city)
+        return np.sqrt(((self.points[sources] - self.points[targets]) ** 2).sum(axis=1))
+
+
+def graph_from_edges(coords, sources, targets):
+    """
+    Monta um CandidateGraph simétrico a partir de uma lista de arestas: arestas repetidas e laços são descartados e os
+    vizinhos de cada cidade ficam ordenados pela distância.
+    """
+    points = as_coordinate_array(coords)
+    n = len(points)
+    sources, targets = np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64)
+    keys = np.unique(np.minimum(sources, targets) * n + np.maximum(sources, targets))
+    low, high = keys // n, keys % n
+    low, high = low[low != high], high[low != high]
+    sources, targets = np.concatenate((low, high)), np.concatenate((high, low))
+    lengths = np.sqrt(((points[sources] - points[targets]) ** 2).sum(axis=1))
+    order = np.lexsort((lengths, sources))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    return CandidateGraph(points, indptr, targets[order])
+
+
+def knn_graph(coords, k=NEIGHBORS, symmetric=False):
+    """
+    Grafo dos k vizinhos mais próximos de cada cidade (nearest_neighbors) em formato CSR.
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades.
+    k (int): Número de vizinhos por cidade.
+    symmetric (bool): Se a aresta (j, i) deve ser acrescentada para cada vizinho j de i (graus variáveis).
+
+    Retorna:
+    CandidateGraph: Grafo de candidatos.
+    """
+    points = as_coordinate_array(coords)
+    neighbors = nearest_neighbors(points, k)
+    if symmetric:
+        return graph_from_edges(points, np.repeat(np.arange(len(points)), neighbors.shape[1]), neighbors.ravel())
+    indptr = np.arange(0, neighbors.size + 1, max(neighbors.shape[1], 1), dtype=np.int64)[:len(points) + 1]
+    return CandidateGraph(points, indptr, neighbors.ravel())
+
+
+def delaunay_graph(coords):
+    """
+    Grafo das arestas da triangulação de Delaunay (grau médio ~6, contém a árvore geradora mínima e, em geral, quase
+    todas as arestas de um tour ótimo). Exige o SciPy, que não é uma dependência obrigatória do projeto.
+
+    Retorna:
+    CandidateGraph: Grafo de candidatos simétrico.
+    """
+    try:
+        from scipy.spatial import Delaunay
+    except ImportError:
+        raise ImportError("O grafo de Delaunay exige o SciPy (pip install scipy); use knn_graph.")
+    points = as_coordinate_array(coords)
+    triangles = Delaunay(points).simplices
+    sources = triangles[:, [0, 1, 2]].ravel()
+    targets = triangles[:, [1, 2, 0]].ravel()
+    return graph_from_edges(points, sources, targets)
+
+
+def greedy_edge_tour(graph):
+    """
+    Construção gulosa sobre o grafo de candidatos: as arestas são percorridas da mais curta para a mais longa e
+    aceitas quando nenhuma das pontas já tem grau 2 e a aresta não fecha um ciclo (union-find). Os fragmentos que
+    restam são ligados pelo vizinho mais próximo entre as suas pontas, consultado no índice em grade.
+
+    Retorna:
+    list: Tour com todas as cidades, começando pela cidade 0.
+    """
+    n = len(graph)
+    if n < 3:
+        return list(range(n))
+    sources, targets = graph.edges()
+    keys = np.unique(np.minimum(sources, targets).astype(np.int64) * n + np.maximum(sources, targets))
+    sources, targets = keys // n, keys % n
+    lengths = np.sqrt(((graph.points[sources] - graph.points[targets]) ** 2).sum(axis=1))
+    order = np.argsort(lengths, kind='stable')
+
+    first, second = [-1] * n, [-1] * n
+    parent = list(range(n))
+
+    def find(city):
+        while parent[city] != city:
+            parent[city] = parent[parent[city]]
+            city = parent[city]
+        return city
+
+    for a, b in zip(sources[order].tolist(), targets[order].tolist()):
+        if second[a] >= 0 or second[b] >= 0:
+            continue
+        root_a, root_b = find(a), find(b)
+        if root_a == root_b:
+            continue
+        parent[root_a] = root_b
+        if first[a] < 0:
+            first[a] = b
+        else:
+            second[a] = b
+        if first[b] < 0:
+            first[b] = a
+        else:
+            second[b] = a
+
+    # Liga os fragmentos: a partir da ponta final de cada fragmento, vai para a ponta livre mais próxima
+    endpoints = [city for city in range(n) if second[city] < 0]
+    index = GridIndex(graph.points, indices=endpoints)
+    xs, ys = index.xs, index.ys
+    tour = []
+    current = endpoints[0]
+    while True:
+        index.remove(current)
+        previous, city = -1, current
+        while city >= 0:
+            tour.append(city)
+            following = first[city] if first[city] != previous else second[city]
+            previous, city = city, following
+        if previous != current:
+            index.remove(previous)
+        if not len(index):
+            break
+        current = index.nearest(xs[previous], ys[previous])
+    start = tour.index(0)
+    return tour[start:] + tour[:start]
+
+
+def test_candidate_graph():
+    for n_cities, time_limit in [(100000, 30.0), (1000000, 60.0)]:
+        random_generator = np.random.default_rng(23)
+        coordinates = random_generator.uniform(0, 1000000, size=(n_cities, 2))
+
+        start_time = time.time()
+        graph = knn_graph(coordinates, NEIGHBORS)
+        graph_time = time.time() - start_time
+        start_time = time.time()
+        tour = greedy_edge_tour(graph)
+        greedy_time = time.time() - start_time
+        greedy_length = tour_length(tour, coordinates)
+        start_time = time.time()
+        improved = improve_tour(tour, coordinates, neighbors=graph, time_limit=time_limit)
+        search_time = time.time() - start_time
+
+        print(f"Número de cidades:   {n_cities}")
+        print(f"Grafo k-NN (k={NEIGHBORS}): {graph.nbytes / 2 ** 20:.1f} MiB em {graph_time:.3f} segundos "
+              f"(matriz densa: {8 * n_cities ** 2 / 2 ** 30:.1f} GiB)")
+        print(f"Guloso:              {greedy_length:.3f} em {greedy_time:.3f} segundos")
+        print(f"2-opt/Or-opt:        {tour_length(improved, coordinates):.3f} em {search_time:.3f} segundos\n")
+        assert sorted(improved) == list(range(n_cities))
+
+
+def main():
+    test_candidate_graph()
+
+
+if __name__ == "__main__":
+    main()
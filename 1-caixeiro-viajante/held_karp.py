@@ -0,0 +1,344 @@
+import math
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from tsp_distances import get_distances, integer_distances, INT32_LIMIT
+
+MAX_CITIES = 24           # Limite de cidades do Held-Karp denso (2^23 * 23 estados)
+MAX_SPILL_CITIES = 30     # Limite do modo com tabelas em disco (camada central de 29 cidades: ~1,2 GiB em float32)
+CHUNK_STATES = 1 << 18    # Número máximo de subconjuntos processados por vez em cada camada
+
+
+def subsets_by_popcount(m):
+    """
+    Agrupa todos os subconjuntos de m bits pelo número de bits ligados (camadas de popcount).
+
+    Parâmetros:
+    m (int): Número de bits dos subconjuntos.
+
+    Retorna:
+    list: Lista onde o elemento k é um array com as máscaras que possuem exatamente k bits ligados.
+    """
+    popcount = np.zeros(1 << m, dtype=np.int8)
+    for bit in range(m):
+        popcount[1 << bit:1 << (bit + 1)] = popcount[:1 << bit] + 1
+    order = np.argsort(popcount, kind='stable')
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(popcount, minlength=m + 1))))
+    return [order[bounds[k]:bounds[k + 1]] for k in range(m + 1)]
+
+
+def table_dtype(distances):
+    """
+    Tipo das tabelas de custos para uma matriz de distâncias: int32 para matrizes inteiras cujos tours cabem com folga
+    em int32 (metade da memória de float64 e comparações inteiras), int64 para as demais matrizes inteiras e float64
+    para matrizes reais.
+    """
+    d = np.asarray(distances)
+    if not np.issubdtype(d.dtype, np.integer):
+        return np.float64
+    return np.int32 if len(d) * int(d.max(initial=0)) < INT32_LIMIT else np.int64
+
+
+def held_karp_memory(n, dtype=np.float64):
+    """
+    Estima a memória (em bytes) das tabelas de programação dinâmica do Held-Karp iterativo.
+
+    Parâmetros:
+    n (int): Número de cidades.
+    dtype (tipo NumPy): Tipo da tabela de custos.
+
+    Retorna:
+    int: Bytes ocupados pelas tabelas de custos, de predecessores e pelas camadas de subconjuntos.
+    """
+    m = n - 1
+    states = (1 << m) * m
+    parent_bytes = 1 if m <= 127 else 2
+    return states * (np.dtype(dtype).itemsize + parent_bytes) + (1 << m) * 9
+
+
+def held_karp(distances, dtype=None, max_memory=None, spill_directory=None, control=None):
+    """
+    Held-Karp iterativo (bottom-up) com tabelas NumPy densas em vez de recursão com dicionário de memoização.
+
+    A cidade 0 é a origem e fica fora das máscaras: o bit j representa a cidade j + 1. A tabela custo[mask, j] guarda o
+    menor custo para sair da origem, visitar exatamente as cidades de mask e terminar na cidade j + 1. Os subconjuntos
+    são processados por camada de popcount e, para cada cidade final j, o mínimo sobre a cidade anterior é uma redução
+    vetorizada sobre uma linha inteira da tabela. Os predecessores ficam em uma tabela int8/int16 compacta usada para
+    reconstruir o caminho, de modo que a memória é fixa e conhecida de antemão (ver held_karp_memory).
+
+    Parâmetros:
+    distances (ndarray ou lista): Matriz (n, n) de distâncias.
+    dtype (tipo NumPy, opcional): Tipo da tabela de custos (np.float64, np.float32 ou inteiro); por padrão o tipo de
+        table_dtype, de modo que matrizes inteiras (integer_distances) usam tabelas int32 e custos exatos.
+    max_memory (int, opcional): Limite de memória em bytes; levanta MemoryError se as tabelas não couberem.
+    spill_directory (str, opcional): Diretório em disco local; quando informado, as tabelas ficam em arquivos mapeados
+        em memória e o cálculo é feito por held_karp_spilled.
+    control (anytime.SearchControl, opcional): Consultado a cada bloco de subconjuntos (cada estado conta como um nó);
+        se a busca for interrompida, o resultado é o incumbente de control, já que a tabela ainda não tem tours
+        completos. O tour ótimo é entregue a control.offer.
+
+    Retorna:
+    tuple: (custo mínimo, tour) onde o tour é a lista de cidades a partir da cidade 0, sem repetir a origem no final.
+    """
+    if spill_directory is not None:
+        return held_karp_spilled(distances, spill_directory, dtype, max_memory, control)
+    dtype = np.dtype(table_dtype(distances) if dtype is None else dtype)
+    d = np.asarray(distances, dtype=dtype)
+    n = len(d)
+    if n < 2:
+        return 0.0, list(range(n))
+    if n > MAX_CITIES:
+        raise ValueError(f"O Held-Karp denso suporta no máximo {MAX_CITIES} cidades.")
+    if max_memory is not None and held_karp_memory(n, dtype) > max_memory:
+        raise MemoryError(f"O Held-Karp para {n} cidades precisa de {held_karp_memory(n, dtype)} bytes.")
+
+    m = n - 1
+    inner = d[1:, 1:]  # inner[i, j]: distância da cidade i + 1 para a cidade j + 1
+    # Estados impossíveis: infinito, ou INT32_LIMIT nas tabelas inteiras (somado a uma distância, ainda cabe no tipo)
+    infinity = np.inf if dtype.kind == 'f' else INT32_LIMIT if dtype.itemsize == 4 else 2 ** 62
+    cost = np.full((1 << m, m), infinity, dtype=dtype)
+    parent = np.full((1 << m, m), -1, dtype=np.int8 if m <= 127 else np.int16)
+
+    singletons = 1 << np.arange(m)
+    cost[singletons, np.arange(m)] = d[0, 1:]
+
+    for layer in subsets_by_popcount(m)[2:]:
+        for start in range(0, len(layer), CHUNK_STATES):
+            masks = layer[start:start + CHUNK_STATES]
+            if control is not None and control.stopped(len(masks) * m):
+                return control.cost, control.tour
+            for j in range(m):
+                masks_j = masks[(masks >> j) & 1 == 1]
+                candidates = cost[masks_j ^ (1 << j)] + inner[:, j]
+                best = candidates.argmin(axis=1)
+                cost[masks_j, j] = candidates[np.arange(len(masks_j)), best]
+                parent[masks_j, j] = best
+
+    full = (1 << m) - 1
+    closing = cost[full] + d[1:, 0]
+    last = int(closing.argmin())
+    tour = reconstruct_tour(parent, full, last)
+    if control is not None:
+        control.offer(closing[last].item(), tour)
+    return closing[last].item(), tour
+
+
+def reconstruct_tour(parent, mask, last):
+    """
+    Reconstrói o tour a partir da tabela de predecessores do Held-Karp.
+
+    Parâmetros:
+    parent (ndarray): Tabela (2^m, m) de predecessores.
+    mask (int): Máscara do subconjunto final.
+    last (int): Índice (bit) da última cidade visitada antes de voltar à origem.
+
+    Retorna:
+    list: Tour começando na cidade 0.
+    """
+    reversed_tour = []
+    while mask:
+        reversed_tour.append(last + 1)
+        previous = int(parent[mask, last])
+        mask ^= 1 << last
+        last = previous
+    return [0] + reversed_tour[::-1]
+
+
+def binomial_table(m):
+    """Tabela binomial[b, i] = C(b, i) para 0 <= b, i <= m, usada na numeração das camadas de subconjuntos."""
+    table = np.zeros((m + 1, m + 2), dtype=np.int64)
+    for b in range(m + 1):
+        for i in range(b + 1):
+            table[b, i] = math.comb(b, i)
+    return table
+
+
+def layer_bits(binomial, k, start, stop):
+    """
+    Subconjuntos de k bits com posições start..stop - 1 na ordem colexicográfica (a ordem numérica das máscaras), sem
+    enumerar as 2^m máscaras: cada posição é decomposta no sistema combinatório de numeração.
+
+    Retorna:
+    ndarray: Array (stop - start, k) com os bits ligados de cada subconjunto, em ordem crescente.
+    """
+    ranks = np.arange(start, stop, dtype=np.int64)
+    bits = np.empty((len(ranks), k), dtype=np.int64)
+    for i in range(k, 0, -1):
+        bits[:, i - 1] = np.searchsorted(binomial[:-1, i], ranks, side='right') - 1
+        ranks -= binomial[bits[:, i - 1], i]
+    return bits
+
+
+def held_karp_spilled_memory(n, dtype=np.float64):
+    """
+    Estima a memória do Held-Karp com tabelas em disco (held_karp_spilled).
+
+    Parâmetros:
+    n (int): Número de cidades.
+    dtype (tipo NumPy): Tipo das tabelas de custos.
+
+    Retorna:
+    tuple: (bytes das duas maiores camadas consecutivas, que precisam ficar em memória; bytes gravados em disco).
+    """
+    m = n - 1
+    itemsize = np.dtype(dtype).itemsize
+    layers = [math.comb(m, k) * k for k in range(m + 1)]
+    hot = max((layers[k - 1] + layers[k]) * itemsize for k in range(1, m + 1)) if m else 0
+    return hot, sum(layers) + hot
+
+
+def held_karp_spilled(distances, directory=None, dtype=None, max_memory=None, control=None):
+    """
+    Held-Karp com as tabelas de programação dinâmica em arquivos mapeados em memória, para instâncias de 24 a 28
+    cidades em máquinas cuja memória não comporta as tabelas densas de held_karp.
+
+    Cada camada de popcount k tem a sua própria tabela, com uma linha por subconjunto de k cidades (na ordem
+    colexicográfica, de modo que a linha de um subconjunto é calculada pelo sistema combinatório de numeração) e uma
+    coluna por cidade do subconjunto, sem as entradas impossíveis da tabela densa. A camada k depende apenas da camada
+    k - 1, então só duas tabelas de custos ficam ativas: a camada é calculada em blocos de CHUNK_STATES subconjuntos,
+    gravada no arquivo e o arquivo da camada anterior é apagado. As tabelas de predecessores (int8, uma por camada)
+    ficam em disco até a reconstrução do tour.
+
+    Parâmetros:
+    distances (ndarray ou lista): Matriz (n, n) de distâncias.
+    directory (str, opcional): Diretório em disco local para os arquivos temporários; por padrão o diretório
+        temporário do sistema.
+    dtype (tipo NumPy, opcional): Tipo das tabelas de custos; por padrão o de table_dtype (np.float32 ou int32
+        reduzem à metade a memória e o disco de np.float64).
+    max_memory (int, opcional): Limite de memória em bytes; levanta MemoryError se as duas camadas ativas não couberem.
+    control (anytime.SearchControl, opcional): Limites e cancelamento, como em held_karp.
+
+    Retorna:
+    tuple: (custo mínimo, tour) onde o tour é a lista de cidades a partir da cidade 0, sem repetir a origem no final.
+    """
+    dtype = np.dtype(table_dtype(distances) if dtype is None else dtype)
+    d = np.asarray(distances, dtype=dtype)
+    n = len(d)
+    if n < 3:
+        return held_karp(d, dtype, control=control)
+    if n > MAX_SPILL_CITIES:
+        raise ValueError(f"O Held-Karp com tabelas em disco suporta no máximo {MAX_SPILL_CITIES} cidades.")
+    hot, _ = held_karp_spilled_memory(n, dtype)
+    if max_memory is not None and hot > max_memory:
+        raise MemoryError(f"O Held-Karp para {n} cidades precisa de {hot} bytes em memória.")
+
+    m = n - 1
+    inner = d[1:, 1:]
+    binomial = binomial_table(m)
+    with tempfile.TemporaryDirectory(prefix='held-karp-', dir=directory) as workdir:
+        previous = np.lib.format.open_memmap(os.path.join(workdir, 'cost-1.npy'), mode='w+', dtype=dtype, shape=(m, 1))
+        previous[:, 0] = d[0, 1:]
+        parents = [None, None]
+        for k in range(2, m + 1):
+            size = math.comb(m, k)
+            cost = np.lib.format.open_memmap(os.path.join(workdir, f'cost-{k}.npy'), mode='w+', dtype=dtype,
+                                             shape=(size, k))
+            parent = np.lib.format.open_memmap(os.path.join(workdir, f'parent-{k}.npy'), mode='w+', dtype=np.int8,
+                                               shape=(size, k))
+            for start in range(0, size, CHUNK_STATES):
+                stop = min(start + CHUNK_STATES, size)
+                if control is not None and control.stopped((stop - start) * k):
+                    return control.cost, control.tour
+                bits = layer_bits(binomial, k, start, stop)
+                # Linha, na camada k - 1, do subconjunto sem o bit t: os bits antes de t mantêm a ordem i + 1 e os
+                # bits depois de t passam para a ordem i
+                before = np.cumsum(binomial[bits, np.arange(1, k + 1)], axis=1) - binomial[bits, np.arange(1, k + 1)]
+                after = np.cumsum(binomial[bits, np.arange(k)][:, ::-1], axis=1)[:, ::-1] - binomial[bits, np.arange(k)]
+                for t in range(k):
+                    previous_bits = np.delete(bits, t, axis=1)
+                    candidates = previous[before[:, t] + after[:, t]] + inner[previous_bits, bits[:, t, None]]
+                    best = candidates.argmin(axis=1)
+                    cost[start:stop, t] = candidates[np.arange(stop - start), best]
+                    parent[start:stop, t] = best
+            cost.flush()
+            parent.flush()
+            del previous
+            os.remove(os.path.join(workdir, f'cost-{k - 1}.npy'))
+            previous = cost
+            parents.append(parent)
+
+        closing = previous[0] + d[1:, 0]
+        last = int(closing.argmin())
+        best_cost = closing[last].item()
+        bits = list(range(m))
+        reversed_tour = []
+        for k in range(m, 0, -1):
+            reversed_tour.append(bits[last] + 1)
+            if k > 1:
+                rank = sum(math.comb(bit, i + 1) for i, bit in enumerate(bits))
+                previous_last = int(parents[k][rank, last])
+                del bits[last]
+                last = previous_last
+        del previous, parents
+    tour = [0] + reversed_tour[::-1]
+    if control is not None:
+        control.offer(best_cost, tour)
+    return best_cost, tour
+
+
+def test_held_karp():
+    n_cities = 16
+    random_generator = np.random.default_rng(42)
+    coordinates = random_generator.integers(0, 1000, size=(n_cities, 2))
+    distances = get_distances(coordinates)
+
+    print(f"Número de cidades:      {n_cities}")
+    print(f"Memória estimada:       {held_karp_memory(n_cities) / 2 ** 20:.1f} MiB")
+    print(f"Complexidade temporal:  {(2 ** n_cities) * n_cities ** 2} (n² * 2^n)")
+
+    start_time = time.time()
+    cost, tour = held_karp(distances)
+    interval = time.time() - start_time
+
+    print(f"Tour ótimo:             {tour}")
+    print(f"Distância mínima:       {cost:.3f}")
+    print(f"Tempo de execução:      {interval:.6f} segundos")
+    assert math.isclose(cost, sum(distances[tour[i - 1], tour[i]] for i in range(n_cities)))
+
+
+def test_held_karp_spilled():
+    n_cities = 20
+    random_generator = np.random.default_rng(42)
+    coordinates = random_generator.integers(0, 1000, size=(n_cities, 2))
+    distances = get_distances(coordinates)
+    hot, disk = held_karp_spilled_memory(n_cities)
+
+    print(f"Número de cidades:      {n_cities}")
+    print(f"Tabelas densas:         {held_karp_memory(n_cities) / 2 ** 20:.1f} MiB")
+    print(f"Tabelas em disco:       {hot / 2 ** 20:.1f} MiB ativos, {disk / 2 ** 20:.1f} MiB em disco")
+
+    start_time = time.time()
+    cost, tour = held_karp(distances, spill_directory=tempfile.gettempdir())
+    interval = time.time() - start_time
+
+    print(f"Distância mínima:       {cost:.3f}")
+    print(f"Tempo de execução:      {interval:.6f} segundos")
+    assert math.isclose(cost, held_karp(distances)[0])
+
+
+def test_held_karp_integer():
+    n_cities = 18
+    random_generator = np.random.default_rng(42)
+    coordinates = random_generator.integers(0, 1000, size=(n_cities, 2))
+
+    for description, distances in [('float64', get_distances(coordinates)), ('EUC_2D', integer_distances(coordinates))]:
+        dtype = table_dtype(distances)
+        start_time = time.time()
+        cost, tour = held_karp(distances)
+        interval = time.time() - start_time
+        memory = held_karp_memory(n_cities, dtype) / 2 ** 20
+        print(f"{description:7} tabela {np.dtype(dtype).name:7} {memory:6.1f} MiB  custo {cost}  "
+              f"{interval:.3f} segundos")
+
+
+def main():
+    test_held_karp()
+    test_held_karp_spilled()
+    test_held_karp_integer()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+from collections import deque
+import math
+import time
+
+import numpy as np
+
+from local_search import ArrayTour, distance_function, two_opt_step, or_opt_step, NEIGHBORS
+from mtsp import RouteSet, best_move, route_length, solve_mtsp_split, OBJECTIVES
+from spatial_index import GridIndex
+from tsp_distances import as_coordinate_array, distance_rows, tour_lengths
+
+POSITION_WINDOW = 64      # Deslocamento procurado ao redor da posição antiga antes de percorrer a rota inteira
+
+
+class RoutePositions(dict):
+    """
+    Posições (rota, índice) das cidades com verificação preguiçosa: inserções e remoções deslocam as cidades seguintes
+    da rota, mas a rota de cada cidade não muda, então uma posição desatualizada é corrigida na consulta por list.index
+    (primeiro em uma janela ao redor da posição antiga) em vez de reindexar a rota inteira a cada alteração.
+    """
+
+    def __init__(self, routes, positions):
+        super().__init__(positions)
+        self.routes = routes
+
+    def __getitem__(self, city):
+        r, i = dict.__getitem__(self, city)
+        route = self.routes[r]
+        if i >= len(route) or route[i] != city:
+            try:
+                i = route.index(city, max(i - POSITION_WINDOW, 1), i + POSITION_WINDOW)
+            except ValueError:
+                i = route.index(city, 1)
+            dict.__setitem__(self, city, (r, i))
+        return r, i
+
+
+class RouteNeighbors:
+    """
+    Listas de candidatos de uma rota calculadas sob demanda: os k vizinhos mais próximos de uma cidade (índice local)
+    são calculados apenas quando a busca local a consulta, em O(tamanho da rota), e ficam em cache.
+    """
+
+    def __init__(self, points, k=NEIGHBORS):
+        self.points = points
+        self.k = min(k, len(points) - 1)
+        self.cache = {}
+
+    def __getitem__(self, city):
+        neighbors = self.cache.get(city)
+        if neighbors is None:
+            row = distance_rows(self.points, slice(city, city + 1))[0]
+            row[city] = np.inf
+            nearest = np.argpartition(row, self.k - 1)[:self.k]
+            neighbors = nearest[np.argsort(row[nearest])].tolist()
+            self.cache[city] = neighbors
+        return neighbors
+
+
+class GridNeighbors:
+    """Vizinhos candidatos das cidades roteadas, consultados no índice em grade sob demanda (cidade -> lista)."""
+
+    def __init__(self, index, k=NEIGHBORS):
+        self.index = index
+        self.k = k
+
+    def __getitem__(self, city):
+        neighbors = self.index.k_nearest(self.index.xs[city], self.index.ys[city], self.k + 1)
+        return [v for v in neighbors if v != city]
+
+
+def repair_route(route, dist, coords, dirty, k=NEIGHBORS, deadline=None):
+    """
+    Busca local 2-opt/Or-opt restrita às cidades alteradas de uma rota fechada: a fila começa apenas com as cidades de
+    dirty, e os vizinhos candidatos são calculados sob demanda, então o custo depende do tamanho da alteração e não do
+    tamanho da rota.
+
+    Parâmetros:
+    route (lista): Rota fechada [depot, ..., depot].
+    dist (função): Distância entre duas cidades.
+    coords (ndarray): Coordenadas (n, 2) de todas as cidades.
+    dirty (iterável): Cidades cujas arestas mudaram.
+    k (int): Tamanho das listas de candidatos.
+    deadline (float, opcional): Instante (time.time()) em que a busca é interrompida.
+
+    Retorna:
+    tuple: (rota melhorada, ainda começando e terminando na origem, comprimento da rota).
+    """
+    cities = route[:-1]
+    if len(cities) < 5:
+        return list(route), sum(dist(route[i], route[i + 1]) for i in range(len(route) - 1))
+    local = {city: i for i, city in enumerate(cities)}
+    points = coords[cities]
+    neighbors = RouteNeighbors(points, k)
+    tour = ArrayTour(range(len(cities)))
+    queue = deque(local[city] for city in dirty if city in local)
+    active = [False] * len(cities)
+    for city in queue:
+        active[city] = True
+
+    def local_dist(a, b):
+        return dist(cities[a], cities[b])
+
+    while queue:
+        if deadline is not None and time.time() > deadline:
+            break
+        city = queue.popleft()
+        active[city] = False
+        changed = two_opt_step(tour, local_dist, neighbors, city)
+        if not changed:
+            changed = or_opt_step(tour, local_dist, neighbors, city)
+        for endpoint in changed:
+            if not active[endpoint]:
+                active[endpoint] = True
+                queue.append(endpoint)
+    order = tour.to_list(start=0)
+    return [cities[i] for i in order] + [cities[0]], tour_lengths(order, points)
+
+
+class IncrementalRoutes:
+    """
+    Conjunto de rotas mTSP mantido entre alterações do conjunto de cidades.
+
+    Em vez de resolver a instância de novo a cada mudança, as cidades novas entram pela inserção mais barata entre as
+    arestas ao redor dos seus vizinhos mais próximos (consultados no índice em grade das cidades roteadas), as cidades
+    removidas saem ligando o predecessor ao sucessor, e o reparo aplica apenas às cidades afetadas os movimentos entre
+    rotas de rebalance (realocação e troca) e a busca local 2-opt/Or-opt dentro das rotas. As cidades mantêm os seus
+    índices; as novas recebem os índices seguintes ao último.
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades.
+    routes (lista): Rotas fechadas [depot, ..., depot], por exemplo as de solve_mtsp_split ou n_tsp_my_heuristic.
+    depot (int): Índice da cidade de origem.
+    objective (str): 'total' ou 'makespan'.
+    capacity (int, opcional): Número máximo de cidades por rota.
+    k (int): Tamanho das listas de vizinhos candidatos.
+    """
+
+    def __init__(self, coords, routes, depot=0, objective='total', capacity=None, k=NEIGHBORS):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"O objetivo deve ser um de {OBJECTIVES}.")
+        self.depot = depot
+        self.objective = objective
+        self.capacity = capacity
+        self.k = k
+        routed = [depot] + [city for route in routes for city in route[1:-1]]
+        self.index = GridIndex(as_coordinate_array(coords), indices=routed)
+        self.xs, self.ys = self.index.xs, self.index.ys
+        self.neighbors = GridNeighbors(self.index, k)
+        self.route_set = RouteSet(routes, self.distance, depot)
+        self.route_set.where = RoutePositions(self.route_set.routes, self.route_set.where)
+        self.dirty = set()
+
+    @property
+    def routes(self):
+        return [list(route) for route in self.route_set.routes]
+
+    @property
+    def lengths(self):
+        return list(self.route_set.lengths)
+
+    def distance(self, a, b):
+        dx = self.xs[a] - self.xs[b]
+        dy = self.ys[a] - self.ys[b]
+        return math.sqrt(dx * dx + dy * dy)
+
+    def insertion_score(self, r, delta):
+        """Pontua a inserção na rota r com acréscimo delta; valores menores são melhores."""
+        if self.objective == 'total':
+            return delta, 0.0
+        return self.route_set.lengths[r] + delta, delta
+
+    def cheapest_insertion(self, city):
+        """
+        Procura a aresta mais barata para inserir a cidade entre as arestas que tocam os seus vizinhos mais próximos
+        já roteados; se nenhuma rota candidata tiver capacidade, avalia todas as arestas das rotas com capacidade.
+
+        Retorna:
+        tuple: (rota, posição) da inserção.
+        """
+        route_set, dist = self.route_set, self.distance
+        candidates = []
+        for v in self.neighbors[city]:
+            if v == self.depot:
+                for r, route in enumerate(route_set.routes):
+                    candidates += [(r, 1), (r, len(route) - 1)]
+            elif v in route_set.where:
+                r, j = route_set.where[v]
+                candidates += [(r, j), (r, j + 1)]
+        full = [self.capacity is not None and route_set.size(r) >= self.capacity for r in range(len(route_set.routes))]
+        candidates = [(r, position) for r, position in candidates if not full[r]]
+        if not candidates:
+            candidates = [(r, position) for r, route in enumerate(route_set.routes) if not full[r]
+                          for position in range(1, len(route))]
+        if not candidates:
+            raise ValueError("Todas as rotas atingiram a capacidade.")
+        best, best_score = None, None
+        for r, position in candidates:
+            route = route_set.routes[r]
+            left, right = route[position - 1], route[position]
+            score = self.insertion_score(r, dist(left, city) + dist(city, right) - dist(left, right))
+            if best is None or score < best_score:
+                best, best_score = (r, position), score
+        return best
+
+    def add_cities(self, coords):
+        """
+        Acrescenta cidades novas às rotas pela inserção mais barata.
+
+        Parâmetros:
+        coords (lista ou ndarray): Coordenadas (m, 2) das cidades novas.
+
+        Retorna:
+        list: Índices atribuídos às cidades novas.
+        """
+        route_set, dist = self.route_set, self.distance
+        added = []
+        for x, y in as_coordinate_array(coords).tolist():
+            city = self.index.add(x, y)
+            r, position = self.cheapest_insertion(city)
+            route = route_set.routes[r]
+            left, right = route[position - 1], route[position]
+            route.insert(position, city)
+            route_set.lengths[r] += dist(left, city) + dist(city, right) - dist(left, right)
+            route_set.where[city] = (r, position)
+            self.dirty.update((left, city, right))
+            added.append(city)
+        return added
+
+    def remove_cities(self, cities):
+        """Retira cidades das rotas, ligando o predecessor ao sucessor de cada uma."""
+        route_set, dist = self.route_set, self.distance
+        for city in cities:
+            if city == self.depot:
+                raise ValueError("A cidade de origem não pode ser removida.")
+            if city not in route_set.where:
+                raise ValueError(f"A cidade {city} não está em nenhuma rota.")
+            r, i = route_set.where[city]
+            del route_set.where[city]
+            route = route_set.routes[r]
+            left, right = route[i - 1], route[i + 1]
+            del route[i]
+            route_set.lengths[r] += dist(left, right) - dist(left, city) - dist(city, right)
+            self.index.remove(city)
+            self.dirty.discard(city)
+            self.dirty.update((left, right))
+
+    def repair(self, time_limit=None):
+        """
+        Reparo local depois das alterações: movimentos de realocação e troca entre rotas (best_move) a partir das
+        cidades afetadas, seguidos da busca local 2-opt/Or-opt nas rotas alteradas, começando pelas mesmas cidades.
+
+        Parâmetros:
+        time_limit (float, opcional): Tempo máximo em segundos.
+        """
+        deadline = None if time_limit is None else time.time() + time_limit
+        route_set, dist = self.route_set, self.distance
+        dirty = {city for city in self.dirty if city in route_set.where}
+        changed = {route_set.where[city][0] for city in dirty}
+        for city in list(dirty):
+            if deadline is not None and time.time() > deadline:
+                break
+            move = best_move(route_set, city, self.neighbors, self.objective, self.capacity)
+            if move is None:
+                continue
+            _, kind, (ra, i, rb, j) = move
+            route_a, route_b = route_set.routes[ra], route_set.routes[rb]
+            a, b, x, y = route_a[i - 1], route_a[i + 1], route_b[j - 1], route_b[j]
+            if kind == 'relocate':
+                route_set.lengths[ra] += dist(a, b) - dist(a, city) - dist(city, b)
+                route_set.lengths[rb] += dist(x, city) + dist(city, y) - dist(x, y)
+                route_b.insert(j, route_a.pop(i))
+                route_set.where[city] = (rb, j)
+                dirty.update((a, b, x, y))
+            else:
+                v, y = y, route_b[j + 1]
+                route_set.lengths[ra] += dist(a, v) + dist(v, b) - dist(a, city) - dist(city, b)
+                route_set.lengths[rb] += dist(x, city) + dist(city, y) - dist(x, v) - dist(v, y)
+                route_a[i], route_b[j] = v, city
+                route_set.where[v], route_set.where[city] = (ra, i), (rb, j)
+                dirty.update((a, b, x, y, v))
+            changed.update((ra, rb))
+        coords = np.column_stack((self.xs, self.ys)) if changed else None
+        for r in changed:
+            route_set.routes[r], route_set.lengths[r] = repair_route(route_set.routes[r], dist, coords, dirty, self.k,
+                                                                     deadline)
+        self.dirty.clear()
+
+    def update(self, added=None, removed=None, time_limit=None):
+        """
+        Aplica uma alteração do conjunto de cidades (remoções e depois inserções) e repara as rotas.
+
+        Parâmetros:
+        added (lista ou ndarray, opcional): Coordenadas das cidades novas.
+        removed (lista, opcional): Índices das cidades removidas.
+        time_limit (float, opcional): Tempo máximo do reparo em segundos.
+
+        Retorna:
+        tuple: (rotas atualizadas, índices das cidades novas).
+        """
+        self.remove_cities(removed if removed is not None else [])
+        new_cities = self.add_cities(added) if added is not None and len(added) else []
+        self.repair(time_limit)
+        return self.routes, new_cities
+
+
+def test_incremental_routes():
+    n_cities = 20000
+    num_viajantes = 5
+    random_generator = np.random.default_rng(20)
+    coordinates = random_generator.uniform(0, 1000000, size=(n_cities, 2))
+    routes = solve_mtsp_split(coordinates, num_viajantes)
+    incremental = IncrementalRoutes(coordinates, routes)
+    print(f"Número de cidades:   {n_cities} ({num_viajantes} viajantes)")
+    print(f"Distância inicial:   {sum(incremental.lengths):.3f}")
+
+    present = set(range(1, n_cities))
+    for step in range(5):
+        removed = random_generator.choice(sorted(present), size=20, replace=False).tolist()
+        added = random_generator.uniform(0, 1000000, size=(20, 2))
+        start_time = time.time()
+        routes, new_cities = incremental.update(added, removed)
+        interval = time.time() - start_time
+        present.difference_update(removed)
+        present.update(new_cities)
+        total = sum(route_length(route, incremental.distance) for route in routes)
+        assert abs(total - sum(incremental.lengths)) <= 1e-6 * total
+        assert sorted(city for route in routes for city in route[1:-1]) == sorted(present)
+        print(f"Alteração {step + 1}: -20 +20 cidades, distância {total:.3f}, {1000 * interval:.1f} ms")
+
+    coordinates = np.column_stack((incremental.xs, incremental.ys))[[0] + sorted(present)]
+    start_time = time.time()
+    routes = solve_mtsp_split(coordinates, num_viajantes)
+    interval = time.time() - start_time
+    total = sum(route_length(route, distance_function(coords=coordinates)) for route in routes)
+    print(f"Resolução completa:  distância {total:.3f}, {1000 * interval:.1f} ms")
+
+
+def main():
+    test_incremental_routes()
+
+
+if __name__ == "__main__":
+    main()
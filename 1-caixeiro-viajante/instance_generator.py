@@ -0,0 +1,185 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from instance_loader import load_instance
+
+DISTRIBUTIONS = ('uniform', 'clustered', 'grid')
+CLUSTERS = 20             # Número padrão de aglomerados da distribuição 'clustered'
+CLUSTER_SPREAD = 0.03     # Desvio padrão de cada aglomerado, como fração da largura do intervalo
+WRITE_CHUNK = 1 << 18     # Número de linhas gravadas por bloco no arquivo de instância
+MAX_ROUNDS = 100          # Número máximo de rodadas de reposição de pontos repetidos
+
+
+def draw_points(generator, size, low, high, distribution, integer, centers, spread):
+    """Sorteia size pontos da distribuição (sem remover repetições), dentro do intervalo [low, high]."""
+    if distribution == 'uniform':
+        if integer:
+            return generator.integers(low, high + 1, size=(size, 2))
+        return generator.uniform(low, high, size=(size, 2))
+    if distribution == 'clustered':
+        points = centers[generator.integers(len(centers), size=size)] + generator.normal(0.0, spread, size=(size, 2))
+        points = np.clip(points, low, high)
+        return np.floor(points + 0.5).astype(np.int64) if integer else points
+    raise ValueError(f"A distribuição deve ser uma de {DISTRIBUTIONS}.")
+
+
+def grid_points(generator, n, low, high, integer):
+    """
+    Pontos em uma grade com deslocamento aleatório: n células distintas de uma grade com pelo menos n células são
+    sorteadas e cada ponto é colocado em uma posição aleatória dentro da sua célula, então não há repetições.
+    """
+    side = int(np.ceil(np.sqrt(n)))
+    if integer:
+        side = min(side, high - low + 1)  # Células com pelo menos uma coordenada inteira em cada eixo
+    width = (high - low + (1 if integer else 0)) / side
+    cells = generator.choice(side * side, size=n, replace=False)
+    corner = np.column_stack((cells % side, cells // side)) * width + low
+    if integer:
+        # Cada célula cobre as coordenadas inteiras [ceil(corner), ceil(corner + width)), nunca vazias pois width >= 1
+        first = np.ceil(corner).astype(np.int64)
+        count = np.ceil(corner + width).astype(np.int64) - first
+        return first + (generator.random((n, 2)) * count).astype(np.int64)
+    return corner + generator.random((n, 2)) * width
+
+
+def point_keys(points, low, high, integer):
+    """Chaves que identificam pontos repetidos: x * largura + y para inteiros, os bytes das coordenadas para reais."""
+    if integer:
+        return (points[:, 0] - low) * (high - low + 1) + (points[:, 1] - low)
+    return np.ascontiguousarray(points).view(np.dtype((np.void, 2 * points.itemsize))).ravel()
+
+
+def random_coordinates(n_cities, low=0, high=1000, distribution='uniform', integer=True, unique=True, seed=None,
+                       clusters=CLUSTERS, spread=CLUSTER_SPREAD, first=None):
+    """
+    Gera coordenadas aleatórias com o NumPy, de forma reprodutível pela semente.
+
+    As distribuições são 'uniform' (uniforme no quadrado [low, high]²), 'clustered' (aglomerados gaussianos com
+    centros uniformes) e 'grid' (grade com deslocamento aleatório dentro de cada célula). Com unique=True os pontos
+    repetidos são descartados e repostos em novas rodadas de sorteio, o que custa O(n log n) e escala para milhões de
+    pontos; quando o intervalo inteiro tem poucas posições livres os pontos são sorteados sem reposição.
+
+    Parâmetros:
+    n_cities (int): Número de cidades.
+    low, high (int ou float): Limites das coordenadas (inclusivos para coordenadas inteiras).
+    distribution (str): 'uniform', 'clustered' ou 'grid'.
+    integer (bool): Se as coordenadas são inteiras (int64) ou reais (float64).
+    unique (bool): Se pontos repetidos devem ser evitados.
+    seed (int, opcional): Semente do gerador aleatório.
+    clusters (int): Número de aglomerados da distribuição 'clustered'.
+    spread (float): Desvio padrão dos aglomerados, como fração de high - low.
+    first (tupla, opcional): Ponto fixo usado como primeira cidade (por exemplo a origem (0, 0)).
+
+    Retorna:
+    ndarray: Array (n_cities, 2) com as coordenadas.
+    """
+    if n_cities < 1:
+        raise ValueError("O número de cidades deve ser pelo menos 1.")
+    if low >= high:
+        raise ValueError("O valor mínimo deve ser menor que o valor máximo.")
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"A distribuição deve ser uma de {DISTRIBUTIONS}.")
+    positions = (high - low + 1) ** 2 if integer else np.inf
+    if unique and n_cities > positions:
+        raise ValueError(f"O número de cidades é grande demais para o intervalo: há apenas {positions} pontos.")
+    generator = np.random.default_rng(seed)
+    dtype = np.int64 if integer else np.float64
+    count = n_cities if first is None else min(n_cities + 1, positions)  # Um ponto a mais caso first seja sorteado
+
+    if distribution == 'grid':
+        points = grid_points(generator, count, low, high, integer)
+    elif unique and integer and distribution == 'uniform' and 2 * count > positions:
+        # Intervalo quase cheio: sorteio sem reposição entre todas as posições
+        keys = generator.choice(positions, size=count, replace=False)
+        points = np.column_stack((keys // (high - low + 1), keys % (high - low + 1))) + low
+    else:
+        centers = generator.uniform(low, high, size=(clusters, 2))
+        scale = spread * (high - low)
+        points = draw_points(generator, count, low, high, distribution, integer, centers, scale)
+        for _ in range(MAX_ROUNDS if unique else 0):
+            _, index = np.unique(point_keys(points, low, high, integer), return_index=True)
+            if len(index) == len(points):
+                break
+            kept = points[np.sort(index)]
+            extra = draw_points(generator, count - len(kept), low, high, distribution, integer, centers, scale)
+            points = np.concatenate((kept, extra))
+        else:
+            if unique:
+                raise ValueError("Não foi possível gerar pontos distintos: aumente o intervalo ou o espalhamento.")
+    points = points.astype(dtype, copy=False)
+
+    if first is not None:
+        first = np.asarray(first, dtype=dtype)
+        if unique:
+            points = points[np.any(points != first, axis=1)]
+        points = np.concatenate(([first], points[:n_cities - 1]))
+    return points
+
+
+def write_instance(file_path, coords, chunk_size=WRITE_CHUNK):
+    """
+    Grava coordenadas no formato das instâncias ('índice x y' por linha, índices a partir de 0), em blocos de
+    chunk_size linhas, sem montar o texto inteiro na memória.
+    """
+    coords = np.asarray(coords)
+    integer = np.issubdtype(coords.dtype, np.integer)
+    fmt = '%d %d %d' if integer else '%d %.10g %.10g'
+    with open(file_path, 'w') as file:
+        for start in range(0, len(coords), chunk_size):
+            block = coords[start:start + chunk_size]
+            indices = np.arange(start, start + len(block))
+            np.savetxt(file, np.column_stack((indices, block)), fmt=fmt)
+
+
+def generate_instance(directory, n_cities, num_travelers, seed=None, **options):
+    """
+    Gera uma instância aleatória e a grava com o nome 'mTSP-n<n_cities>-m<num_travelers>' no diretório, pronta para
+    load_instance e para o benchmark.
+
+    Parâmetros:
+    directory (str): Diretório do arquivo.
+    n_cities (int): Número de cidades.
+    num_travelers (int): Número de viajantes.
+    seed (int, opcional): Semente do gerador aleatório.
+    options: Demais parâmetros de random_coordinates (low, high, distribution, integer, unique, ...).
+
+    Retorna:
+    str: Caminho do arquivo gravado.
+    """
+    file_path = os.path.join(directory, f'mTSP-n{n_cities}-m{num_travelers}')
+    write_instance(file_path, random_coordinates(n_cities, seed=seed, **options))
+    return file_path
+
+
+def test_random_coordinates():
+    n_cities = 1000000
+    for distribution in DISTRIBUTIONS:
+        for integer in [True, False]:
+            start_time = time.time()
+            coordinates = random_coordinates(n_cities, 0, 100000, distribution, integer, seed=22)
+            interval = time.time() - start_time
+            distinct = len(np.unique(coordinates, axis=0))
+            print(f"{distribution:9} {'int' if integer else 'float':5} {n_cities} pontos, {distinct} distintos, "
+                  f"{interval:.3f} segundos")
+            assert distinct == n_cities
+
+    coordinates = random_coordinates(121, 0, 10, seed=1)  # Todas as posições do intervalo
+    assert len(np.unique(coordinates, axis=0)) == 121
+
+    with tempfile.TemporaryDirectory() as directory:
+        start_time = time.time()
+        file_path = generate_instance(directory, n_cities, 10, seed=22, high=1000000)
+        instance = load_instance(file_path, cache=False)
+        print(f"Instância {os.path.basename(file_path)} gravada e lida em {time.time() - start_time:.3f} segundos")
+        assert instance.coords.shape == (n_cities, 2)
+
+
+def main():
+    test_random_coordinates()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+from collections import namedtuple
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+
+CACHE_DIRECTORY = '__instance_cache__'  # Subdiretório, ao lado das instâncias, com os caches binários (.npy)
+INSTANCE_PATTERN = re.compile(r'mTSP-n(\d+)-m(\d+)')
+
+Instance = namedtuple('Instance', ['coords', 'num_cities', 'num_travelers', 'path'])
+
+
+def parse_instance_name(file_path):
+    """
+    Extrai o número de cidades e de viajantes de um nome de arquivo no formato 'mTSP-n<num_cities>-m<num_travelers>'.
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo.
+
+    Retorna:
+    tuple: (número de cidades, número de viajantes).
+    """
+    filename = os.path.basename(file_path)
+    match = INSTANCE_PATTERN.match(filename)
+    if not match:
+        raise ValueError(f"O nome do arquivo '{filename}' não está no formato esperado.")
+    num_cities, num_travelers = map(int, match.groups())
+    return num_cities, num_travelers
+
+
+def parse_coordinates(file_path, dtype=np.int64):
+    """
+    Lê um arquivo de instância com linhas 'índice x y' diretamente para um array (n, 2), com o parser em lote do
+    NumPy em vez de dividir e converter cada linha em Python.
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo.
+    dtype (tipo NumPy): Tipo das coordenadas.
+
+    Retorna:
+    ndarray: Array (n, 2) com as coordenadas das cidades.
+    """
+    coords = np.loadtxt(file_path, usecols=(1, 2), dtype=dtype, ndmin=2)
+    if coords.shape[1] != 2:
+        raise ValueError(f"O arquivo '{file_path}' não contém linhas no formato 'índice x y'.")
+    return coords
+
+
+def cache_path(file_path, dtype=np.int64):
+    """
+    Caminho do cache binário de uma instância. O nome inclui o instante de modificação (ns) e o tamanho do arquivo de
+    texto, então um arquivo alterado nunca reaproveita um cache antigo.
+    """
+    status = os.stat(file_path)
+    directory, filename = os.path.split(os.path.abspath(file_path))
+    name = f'{filename}.{status.st_mtime_ns}.{status.st_size}.{np.dtype(dtype).str.strip("<>|=")}.npy'
+    return os.path.join(directory, CACHE_DIRECTORY, name)
+
+
+def write_cache(path, coords):
+    """Grava o cache de forma atômica e remove as versões antigas do mesmo arquivo; falhas de escrita são ignoradas."""
+    directory, name = os.path.split(path)
+    filename = name.rsplit('.', 4)[0]
+    stale = re.compile(re.escape(filename) + r'\.\d+\.\d+\.\w+\.npy')
+    try:
+        os.makedirs(directory, exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as file:
+            np.save(file, coords)
+        os.replace(temporary, path)
+        for old in os.listdir(directory):
+            if old != name and stale.fullmatch(old):
+                os.remove(os.path.join(directory, old))
+    except OSError:
+        pass  # Diretório somente leitura: a instância continua sendo lida do texto
+
+
+def load_coordinates(file_path, dtype=np.int64, cache=True, mmap=True):
+    """
+    Carrega as coordenadas de uma instância, usando o cache binário .npy quando ele existe e está atualizado.
+
+    Na primeira leitura o texto é convertido em lote e gravado no cache; as leituras seguintes abrem o .npy mapeado
+    em memória, de modo que instâncias com milhões de cidades ficam disponíveis sem custo de conversão.
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo de instância.
+    dtype (tipo NumPy): Tipo das coordenadas.
+    cache (bool): Se o cache binário deve ser usado e gravado.
+    mmap (bool): Se o cache deve ser mapeado em memória (somente leitura) em vez de copiado para a memória.
+
+    Retorna:
+    ndarray: Array (n, 2) com as coordenadas das cidades.
+    """
+    if not cache:
+        return parse_coordinates(file_path, dtype)
+    path = cache_path(file_path, dtype)
+    if os.path.exists(path):
+        return np.load(path, mmap_mode='r' if mmap else None)
+    coords = parse_coordinates(file_path, dtype)
+    write_cache(path, coords)
+    return coords
+
+
+def load_instance(file_path, dtype=np.int64, cache=True, mmap=True):
+    """
+    Carrega uma instância mTSP: coordenadas e metadados do nome do arquivo. Algumas instâncias têm mais linhas do que
+    o número de cidades do nome, então num_cities é o valor do nome e len(coords) o número de linhas lidas.
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo de instância ('mTSP-n<num_cities>-m<num_travelers>').
+    dtype (tipo NumPy): Tipo das coordenadas.
+    cache (bool): Se o cache binário deve ser usado e gravado.
+    mmap (bool): Se o cache deve ser mapeado em memória.
+
+    Retorna:
+    Instance: Tupla (coords, num_cities, num_travelers, path).
+    """
+    num_cities, num_travelers = parse_instance_name(file_path)
+    return Instance(load_coordinates(file_path, dtype, cache, mmap), num_cities, num_travelers, file_path)
+
+
+def list_instances(directory):
+    """
+    Lista os arquivos de instância de um diretório, ordenados pelo número de viajantes e de cidades.
+
+    Retorna:
+    list: Lista de tuplas (caminho, número de cidades, número de viajantes).
+    """
+    found = []
+    for filename in os.listdir(directory):
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path) and INSTANCE_PATTERN.match(filename):
+            num_cities, num_travelers = parse_instance_name(path)
+            found.append((path, num_cities, num_travelers))
+    return sorted(found, key=lambda item: (item[2], item[1]))
+
+
+def test_load_instance():
+    n_cities = 1000000
+    file_path = os.path.join(tempfile.gettempdir(), f'mTSP-n{n_cities}-m10')
+    if not os.path.exists(file_path):
+        random_generator = np.random.default_rng(5)
+        coordinates = random_generator.integers(0, 1000000, size=(n_cities, 2))
+        np.savetxt(file_path, np.column_stack((np.arange(n_cities), coordinates)), fmt='%d')
+
+    for description in ['Texto', 'Cache']:
+        start_time = time.time()
+        instance = load_instance(file_path)
+        interval = time.time() - start_time
+        print(f"{description}: {instance.num_cities} cidades, {instance.num_travelers} viajantes, "
+              f"{interval:.3f} segundos")
+        assert instance.coords.shape == (n_cities, 2)
+
+
+def main():
+    test_load_instance()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+from collections import deque
+import random
+import time
+
+import numpy as np
+
+from local_search import ArrayTour, candidate_lists, distance_function, or_opt_step, insert_segment, tour_length
+from spatial_index import grid_nearest_neighbor_tour
+from tsp_distances import LazyDistanceMatrix
+
+NEIGHBORS = 8             # Tamanho das listas de candidatos
+BREADTH = 5               # Candidatos t3 tentados no primeiro nível de cada movimento (os demais níveis são gulosos)
+MAX_DEPTH = 50            # Número máximo de trocas sequenciais em um movimento
+KICK_SEGMENT = 50         # Tamanho máximo do segmento deslocado em cada perturbação
+EPSILON = 1e-7            # Melhoria mínima para aceitar um movimento
+
+
+class JournaledTour(ArrayTour):
+    """ArrayTour que registra cada movimento 2-opt, para que uma sequência de movimentos possa ser desfeita."""
+
+    def __init__(self, tour):
+        super().__init__(tour)
+        self.journal = []
+
+    def move_2opt(self, t1, t2, t3, t4):
+        super().move_2opt(t1, t2, t3, t4)
+        self.journal.append((t1, t2, t3, t4))
+
+    def undo(self, mark):
+        """Desfaz os movimentos registrados depois da posição mark do diário."""
+        while len(self.journal) > mark:
+            t1, t2, t3, t4 = self.journal.pop()
+            ArrayTour.move_2opt(self, t1, t3, t2, t4)  # Remove (t1, t3), (t2, t4) e restaura (t1, t2), (t3, t4)
+
+
+def partner(tour, t2, t1, t3):
+    """Vizinho de t3 do mesmo lado em que t1 está de t2, para que a troca produza um único ciclo."""
+    return tour.next(t3) if tour.next(t2) == t1 else tour.prev(t3)
+
+
+def deepen(tour, dist, neighbors, t1, t2, t3, t4, gain):
+    """
+    Aplica a primeira troca (t1, t2, t3, t4) e aprofunda a cadeia de trocas sequenciais de forma gulosa, mantendo t1
+    fixo: a cada nível a aresta de fechamento (t1, t4) é removida, uma aresta (t4, t5) com ganho parcial positivo é
+    adicionada e o tour é fechado por (t1, t6). Arestas adicionadas não são removidas e arestas removidas não são
+    adicionadas de novo. No final, o tour volta ao nível de maior ganho.
+
+    Retorna:
+    tuple: (ganho do melhor nível, cidades envolvidas).
+    """
+    tour.move_2opt(t2, t1, t3, t4)  # Remove (t2, t1), (t3, t4) e adiciona (t2, t3), (t1, t4)
+    added = {(min(t2, t3), max(t2, t3))}
+    removed = {(min(t1, t2), max(t1, t2)), (min(t3, t4), max(t3, t4))}
+    touched = [t1, t2, t3, t4]
+    gain = gain - dist(t2, t3) + dist(t3, t4)
+    best_gain, best_mark = gain - dist(t4, t1), len(tour.journal)
+    last = t4
+    for _ in range(MAX_DEPTH - 1):
+        step = None
+        for t5 in neighbors[last]:
+            partial = gain - dist(last, t5)
+            if partial <= EPSILON:
+                break
+            if t5 == t1 or (min(last, t5), max(last, t5)) in removed:
+                continue
+            t6 = partner(tour, last, t1, t5)
+            if t6 == last or (min(t5, t6), max(t5, t6)) in added:
+                continue
+            value = partial + dist(t5, t6)
+            if step is None or value > step[0]:
+                step = (value, t5, t6)
+        if step is None:
+            break
+        value, t5, t6 = step
+        tour.move_2opt(last, t1, t5, t6)  # Remove (last, t1), (t5, t6) e adiciona (last, t5), (t1, t6)
+        added.add((min(last, t5), max(last, t5)))
+        removed.add((min(t5, t6), max(t5, t6)))
+        touched += [t5, t6]
+        gain = value
+        closing = gain - dist(t6, t1)
+        if closing > best_gain:
+            best_gain, best_mark = closing, len(tour.journal)
+        last = t6
+    tour.undo(best_mark)
+    return best_gain, touched
+
+
+def lk_move(tour, dist, neighbors, t1):
+    """
+    Procura um movimento de profundidade variável (Lin-Kernighan com trocas 2-opt) a partir de t1. No primeiro nível
+    até BREADTH candidatos t3 são tentados, em ordem decrescente de ganho; cada tentativa sem ganho é desfeita.
+
+    Retorna:
+    tuple: (ganho, cidades cujas arestas mudaram); ganho 0 se nenhum movimento foi aplicado.
+    """
+    for t2 in (tour.next(t1), tour.prev(t1)):
+        g1 = dist(t1, t2)
+        candidates = []
+        for t3 in neighbors[t2]:
+            partial = g1 - dist(t2, t3)
+            if partial <= EPSILON:
+                break
+            if t3 == t1:
+                continue
+            t4 = partner(tour, t2, t1, t3)
+            if t4 == t2:
+                continue
+            candidates.append((partial + dist(t3, t4), t3, t4))
+        candidates.sort(reverse=True)
+        for _, t3, t4 in candidates[:BREADTH]:
+            mark = len(tour.journal)
+            gain, touched = deepen(tour, dist, neighbors, t1, t2, t3, t4, g1)
+            if gain > EPSILON:
+                return gain, touched
+            tour.undo(mark)
+    return 0.0, []
+
+
+def or_opt_move(tour, dist, neighbors, city):
+    """Aplica um movimento Or-opt (or_opt_step) e calcula o seu ganho a partir das arestas trocadas."""
+    changed = or_opt_step(tour, dist, neighbors, city)
+    if not changed:
+        return 0.0, []
+    p, s1, s2, nx, e, f = changed
+    if s1 in (tour.next(e), tour.prev(e)):
+        added = dist(e, s1) + dist(s2, f)
+    else:
+        added = dist(e, s2) + dist(s1, f)
+    return dist(p, s1) + dist(s2, nx) + dist(e, f) - dist(p, nx) - added, changed
+
+
+def optimize(tour, dist, neighbors, queue, active, deadline, use_or_opt=True, control=None):
+    """
+    Esvazia a fila de cidades com don't-look bit desligado aplicando movimentos LK e Or-opt. Com control, cada cidade
+    retirada da fila conta como um nó e a busca para quando control indica parada.
+
+    Retorna:
+    float: Ganho total obtido.
+    """
+    total = 0.0
+    while queue:
+        if deadline is not None and time.time() > deadline:
+            break
+        if control is not None and control.stopped(1):
+            break
+        city = queue.popleft()
+        active[city] = False
+        gain, changed = lk_move(tour, dist, neighbors, city)
+        if gain <= EPSILON and use_or_opt:
+            gain, changed = or_opt_move(tour, dist, neighbors, city)
+        if gain > EPSILON:
+            total += gain
+            for endpoint in changed:
+                if not active[endpoint]:
+                    active[endpoint] = True
+                    queue.append(endpoint)
+    return total
+
+
+def segment_kick(tour, dist, neighbors, generator):
+    """
+    Perturbação: desloca um segmento aleatório de até KICK_SEGMENT cidades para junto de um vizinho do seu início,
+    opcionalmente invertido (movimento or-3opt que a busca LK com trocas 2-opt não desfaz diretamente).
+
+    Retorna:
+    tuple: (variação do comprimento, cidades cujas arestas mudaram); (0, []) se o sorteio não gerou um movimento válido.
+    """
+    n = tour.n
+    length = generator.randint(1, min(KICK_SEGMENT, n - 4))
+    s1 = generator.randrange(n)
+    s2 = s1
+    for _ in range(length - 1):
+        s2 = tour.next(s2)
+    p, nx = tour.prev(s1), tour.next(s2)
+    e = generator.choice(neighbors[s1])
+    f = tour.next(e)
+    if e == p or f == p or (tour.position[e] - tour.position[s1]) % n < length:
+        return 0.0, []
+    reversed_segment = generator.random() < 0.5
+    if reversed_segment:
+        added = dist(e, s2) + dist(s1, f)
+    else:
+        added = dist(e, s1) + dist(s2, f)
+    delta = dist(p, nx) + added - dist(p, s1) - dist(s2, nx) - dist(e, f)
+    insert_segment(tour, p, s1, s2, nx, e, f, reversed_segment)
+    return delta, [p, s1, s2, nx, e, f]
+
+
+def lin_kernighan(tour=None, coords=None, distances=None, k=NEIGHBORS, time_limit=60.0, seed=0, use_or_opt=True,
+                  control=None, neighbors=None):
+    """
+    Otimizador no estilo Lin-Kernighan para instâncias grandes, sem dependências externas.
+
+    O tour é representado por arrays de cidades e posições (ArrayTour) e melhorado por movimentos de profundidade
+    variável: cadeias de até MAX_DEPTH trocas 2-opt sequenciais com critério de ganho parcial positivo, sobre listas
+    dos k vizinhos mais próximos e com don't-look bits, complementadas por movimentos Or-opt. Depois do primeiro ótimo
+    local, o tempo restante é usado em busca local iterada: cada perturbação desloca um segmento (or-3opt), a busca é
+    refeita apenas ao redor das cidades alteradas e a mudança é desfeita pelo diário de movimentos se o tour piorar.
+
+    Parâmetros:
+    tour (lista, opcional): Tour inicial (aberto ou fechado) com todas as cidades; por padrão o vizinho mais próximo.
+    coords (lista ou ndarray, opcional): Coordenadas das cidades.
+    distances (ndarray ou LazyDistanceMatrix, opcional): Matriz (n, n) de distâncias, usada quando as coordenadas não
+        são informadas.
+    k (int): Tamanho das listas de candidatos.
+    time_limit (float, opcional): Tempo máximo em segundos; None para parar no primeiro ótimo local, sem perturbações.
+    seed (int): Semente das perturbações.
+    use_or_opt (bool): Se também devem ser aplicados movimentos Or-opt.
+    control (anytime.SearchControl, opcional): Limites e cancelamento adicionais; o tour é entregue a control.offer
+        depois do primeiro ótimo local e a cada perturbação que o melhora, como uma lista aberta.
+    neighbors (ndarray, lista ou CandidateGraph, opcional): Listas de candidatos já calculadas, por exemplo um grafo
+        de candidate_graph.knn_graph para milhões de cidades; por padrão as de neighbor_lists.
+
+    Retorna:
+    list: Tour melhorado, começando pela mesma cidade e no mesmo formato (aberto ou fechado) do tour recebido.
+    """
+    if coords is None and distances is None:
+        raise ValueError("Informe as coordenadas ou a matriz de distâncias.")
+    deadline = None if time_limit is None else time.time() + time_limit
+    if tour is None:
+        if coords is not None or isinstance(distances, LazyDistanceMatrix):
+            tour = grid_nearest_neighbor_tour(coords if coords is not None else distances.points)
+        else:
+            tour = list(range(len(distances)))
+    closed = len(tour) > 1 and tour[0] == tour[-1]
+    cities = list(tour[:-1] if closed else tour)
+    if len(cities) < 8:
+        return list(tour)
+
+    dist = distance_function(coords, distances)
+    neighbors = candidate_lists(coords, distances, k, neighbors)
+    array_tour = JournaledTour(cities)
+    active = [True] * len(cities)
+    length = tour_length(cities, coords, distances) if control is not None else 0.0
+    length -= optimize(array_tour, dist, neighbors, deque(cities), active, deadline, use_or_opt, control)
+    array_tour.journal.clear()
+    if control is not None:
+        control.offer(length, array_tour.to_list(start=cities[0]))
+
+    generator = random.Random(seed)
+    while deadline is not None and time.time() < deadline and not (control is not None and control.stopped()):
+        delta, touched = segment_kick(array_tour, dist, neighbors, generator)
+        if not touched:
+            continue
+        queue = deque()
+        for city in touched:
+            if not active[city]:
+                active[city] = True
+                queue.append(city)
+        gain = optimize(array_tour, dist, neighbors, queue, active, None, use_or_opt, control)
+        if delta - gain >= -EPSILON:
+            array_tour.undo(0)
+        elif control is not None:
+            length += delta - gain
+            control.offer(length, array_tour.to_list(start=cities[0]))
+        array_tour.journal.clear()
+
+    result = array_tour.to_list(start=cities[0])
+    return result + [result[0]] if closed else result
+
+
+def test_lin_kernighan():
+    n_cities = 10000
+    random_generator = np.random.default_rng(13)
+    coordinates = random_generator.uniform(0, 1000000, size=(n_cities, 2))
+    # Estimativa do tour ótimo para 10^4 pontos uniformes em um quadrado de área A: 0.7187 * sqrt(n * A), a razão do
+    # ótimo conhecido da instância E10k.0 do DIMACS TSP Challenge (71.865.826)
+    estimated_optimum = 0.7187 * np.sqrt(n_cities * 1000000 ** 2)
+
+    start_time = time.time()
+    initial = grid_nearest_neighbor_tour(coordinates)
+    tour = lin_kernighan(initial, coordinates, time_limit=55.0)
+    interval = time.time() - start_time
+
+    length = tour_length(tour, coordinates)
+    print(f"Número de cidades:       {n_cities}")
+    print(f"Distância inicial:       {tour_length(initial, coordinates):.3f}")
+    print(f"Distância Lin-Kernighan: {length:.3f}")
+    print(f"Acima do ótimo estimado: {100 * (length / estimated_optimum - 1):.2f}%")
+    print(f"Tempo de execução:       {interval:.3f} segundos")
+    assert sorted(tour) == list(range(n_cities))
+
+
+def main():
+    test_lin_kernighan()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+from collections import deque
+import math
+import time
+
+import numpy as np
+
+from spatial_index import nearest_neighbors
+from tsp_distances import as_coordinate_array, tour_lengths, LazyDistanceMatrix, BLOCK_ELEMENTS
+
+NEIGHBORS = 10            # Tamanho padrão das listas de candidatos (k vizinhos mais próximos)
+MAX_SEGMENT = 3           # Tamanho máximo dos segmentos movidos pelo Or-opt
+EPSILON = 1e-10           # Melhoria mínima para aceitar um movimento
+
+
+def neighbor_lists(coords=None, distances=None, k=NEIGHBORS):
+    """
+    Calcula as listas de candidatos: os k vizinhos mais próximos de cada cidade, ordenados pela distância.
+
+    Parâmetros:
+    coords (lista ou ndarray, opcional): Coordenadas das cidades (os vizinhos são procurados por blocos espaciais, sem
+        a varredura O(n²) das linhas da matriz; ver spatial_index.nearest_neighbors).
+    distances (ndarray ou LazyDistanceMatrix, opcional): Matriz (n, n) de distâncias, usada quando as coordenadas não
+        são informadas; a matriz preguiçosa usa as próprias coordenadas.
+    k (int): Número de vizinhos por cidade.
+
+    Retorna:
+    ndarray: Array (n, k) com os índices dos vizinhos de cada cidade.
+    """
+    if coords is None and isinstance(distances, LazyDistanceMatrix):
+        coords = distances.points
+    if coords is not None:
+        return nearest_neighbors(coords, k)
+    n = len(distances)
+    k = min(k, n - 1)
+    neighbors = np.empty((n, k), dtype=np.int64)
+    block = max(1, BLOCK_ELEMENTS // max(n, 1))
+    for start in range(0, n, block):
+        end = min(start + block, n)
+        rows = np.array(distances[start:end], dtype=np.float64)
+        rows[np.arange(end - start), np.arange(start, end)] = np.inf
+        nearest = np.argpartition(rows, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(rows, nearest, axis=1).argsort(axis=1)
+        neighbors[start:end] = np.take_along_axis(nearest, order, axis=1)
+    return neighbors
+
+
+def candidate_lists(coords=None, distances=None, k=NEIGHBORS, neighbors=None):
+    """
+    Listas de candidatos no formato usado pelos movimentos (neighbors[city] iterável de inteiros): as listas recebidas
+    (array (n, k), listas ou CandidateGraph, cujas linhas são lidas sob demanda) ou, se None, as de neighbor_lists.
+    """
+    if neighbors is None:
+        return neighbor_lists(coords, distances, k).tolist()
+    return neighbors.tolist() if isinstance(neighbors, np.ndarray) else neighbors
+
+
+class ArrayTour:
+    """
+    Tour representado por um array de cidades e um array de posições, com sucessor, predecessor e inversão de
+    caminhos em tempo proporcional ao menor dos dois lados do ciclo.
+    """
+
+    def __init__(self, tour):
+        self.order = list(tour)
+        self.n = len(self.order)
+        self.position = [0] * self.n
+        for index, city in enumerate(self.order):
+            self.position[city] = index
+
+    def next(self, city):
+        return self.order[(self.position[city] + 1) % self.n]
+
+    def prev(self, city):
+        return self.order[self.position[city] - 1]
+
+    def reverse(self, a, b):
+        """Inverte o caminho de a até b (orientação atual), invertendo o complemento quando ele for menor."""
+        n = self.n
+        i, j = self.position[a], self.position[b]
+        length = (j - i) % n + 1
+        if 2 * length > n:
+            i, j = (j + 1) % n, (i - 1) % n
+            length = n - length
+        order, position = self.order, self.position
+        for _ in range(length // 2):
+            city_i, city_j = order[i], order[j]
+            order[i], order[j] = city_j, city_i
+            position[city_j], position[city_i] = i, j
+            i = i + 1 if i + 1 < n else 0
+            j = j - 1 if j > 0 else n - 1
+
+    def move_2opt(self, t1, t2, t3, t4):
+        """
+        Remove as arestas (t1, t2) e (t3, t4) e adiciona (t1, t3) e (t2, t4). Exige que t2 e t4 sejam ambos sucessores
+        (ou ambos predecessores) de t1 e t3.
+        """
+        if self.next(t1) == t2:
+            self.reverse(t2, t3)
+        else:
+            self.reverse(t1, t4)
+
+    def to_list(self, start=None):
+        """Retorna o tour como lista, rotacionado para começar na cidade start."""
+        if start is None:
+            return list(self.order)
+        index = self.position[start]
+        return self.order[index:] + self.order[:index]
+
+
+def distance_function(coords=None, distances=None):
+    """
+    Retorna uma função dist(a, b) que lê a matriz de distâncias ou calcula a distância a partir das coordenadas. Uma
+    matriz inteira (integer_distances) devolve inteiros Python, então os ganhos dos movimentos são exatos. Uma
+    LazyDistanceMatrix é lida pelas suas coordenadas, com o mesmo arredondamento em ponto fixo quando tem escala.
+    """
+    scale = None
+    if coords is None and isinstance(distances, LazyDistanceMatrix):
+        coords, scale = distances.points, distances.scale
+    if coords is None:
+        matrix = np.asarray(distances)
+        return (matrix if np.issubdtype(matrix.dtype, np.integer) else matrix.astype(np.float64)).item
+    points = as_coordinate_array(coords)
+    xs, ys = points[:, 0].tolist(), points[:, 1].tolist()
+    sqrt = math.sqrt
+    floor = math.floor
+
+    if scale is not None:
+        def scaled_dist(a, b):
+            dx = xs[a] - xs[b]
+            dy = ys[a] - ys[b]
+            return floor(sqrt(dx * dx + dy * dy) * scale + 0.5)  # Mesmo nint de round_distances
+
+        return scaled_dist
+
+    def dist(a, b):
+        dx = xs[a] - xs[b]
+        dy = ys[a] - ys[b]
+        return sqrt(dx * dx + dy * dy)
+
+    return dist
+
+
+def two_opt_step(tour, dist, neighbors, t1):
+    """
+    Procura um movimento 2-opt de melhoria envolvendo a cidade t1, usando apenas os candidatos da lista de vizinhos.
+
+    Retorna:
+    list: Cidades cujas arestas mudaram (vazia se nenhum movimento foi aplicado).
+    """
+    for successor in (True, False):
+        t2 = tour.next(t1) if successor else tour.prev(t1)
+        g1 = dist(t1, t2)
+        for t3 in neighbors[t1]:
+            g2 = dist(t1, t3)
+            if g2 >= g1:
+                break  # Lista ordenada: os próximos candidatos não podem gerar ganho positivo
+            t4 = tour.next(t3) if successor else tour.prev(t3)
+            if t3 == t2 or t4 == t1:
+                continue
+            gain = g1 + dist(t3, t4) - g2 - dist(t2, t4)
+            if gain > EPSILON:
+                tour.move_2opt(t1, t2, t3, t4)
+                return [t1, t2, t3, t4]
+    return []
+
+
+def or_opt_step(tour, dist, neighbors, s1):
+    """
+    Procura um movimento Or-opt de melhoria: o segmento de 1 a MAX_SEGMENT cidades que começa em s1 é reinserido,
+    na mesma orientação ou invertido, entre um vizinho de s1 e o seu sucessor ou predecessor.
+
+    Retorna:
+    list: Cidades cujas arestas mudaram (vazia se nenhum movimento foi aplicado).
+    """
+    n = tour.n
+    if n < 8:
+        return []
+    for length in range(1, MAX_SEGMENT + 1):
+        s2 = s1
+        for _ in range(length - 1):
+            s2 = tour.next(s2)
+        p, nx = tour.prev(s1), tour.next(s2)
+        removal_gain = dist(p, s1) + dist(s2, nx) - dist(p, nx)
+        if removal_gain <= EPSILON:
+            continue
+        for c in neighbors[s1]:
+            if dist(s1, c) >= removal_gain:
+                break
+            if (tour.position[c] - tour.position[s1]) % n < length:
+                continue  # c pertence ao segmento
+            for e, f in ((c, tour.next(c)), (tour.prev(c), c)):
+                if e == p or f == p or (tour.position[e] - tour.position[s1]) % n < length:
+                    continue  # Aresta removida, adjacente à origem do segmento ou dentro do segmento
+                edge = dist(e, f)
+                forward = removal_gain + edge - dist(e, s1) - dist(s2, f)
+                backward = removal_gain + edge - dist(e, s2) - dist(s1, f)
+                if max(forward, backward) > EPSILON:
+                    insert_segment(tour, p, s1, s2, nx, e, f, reversed_segment=backward > forward)
+                    return [p, s1, s2, nx, e, f]
+    return []
+
+
+def insert_segment(tour, p, s1, s2, nx, e, f, reversed_segment):
+    """
+    Move o segmento s1..s2 (entre p e nx) para a aresta (e, f), onde f é o sucessor de e, compondo três movimentos
+    2-opt sem depender da orientação do tour.
+    """
+    tour.move_2opt(p, s1, e, f)       # Remove (p, s1), (e, f) e adiciona (p, e), (s1, f)
+    if e != nx:
+        tour.move_2opt(p, e, nx, s2)  # Remove (p, e), (nx, s2) e adiciona (p, nx), (e, s2)
+    if not reversed_segment:
+        tour.move_2opt(e, s2, s1, f)  # Remove (e, s2), (s1, f) e adiciona (e, s1), (s2, f)
+
+
+def improve_tour(tour, coords=None, distances=None, k=NEIGHBORS, use_or_opt=True, time_limit=None, neighbors=None):
+    """
+    Melhora um tour por busca local 2-opt e Or-opt com listas de candidatos e don't-look bits.
+
+    As cidades com don't-look bit desligado ficam em uma fila; cada cidade retirada da fila é usada como ponto de
+    partida de movimentos 2-opt e Or-opt avaliados em O(1) sobre os seus k vizinhos mais próximos. Quando um movimento é
+    aplicado, as cidades nas pontas das arestas alteradas voltam para a fila. Aceita tours abertos ([0, 3, 1, 2]),
+    fechados ([0, 3, 1, 2, 0]) e rotas com um subconjunto das cidades, como as devolvidas por n_tsp_my_heuristic.
+
+    Parâmetros:
+    tour (lista): Tour a ser melhorado.
+    coords (lista ou ndarray, opcional): Coordenadas das cidades; permite instâncias sem matriz de distâncias.
+    distances (ndarray ou LazyDistanceMatrix, opcional): Matriz (n, n) de distâncias, usada quando as coordenadas não
+        são informadas.
+    k (int): Tamanho das listas de candidatos.
+    use_or_opt (bool): Se também devem ser aplicados movimentos Or-opt.
+    time_limit (float, opcional): Tempo máximo em segundos.
+    neighbors (ndarray, lista ou CandidateGraph, opcional): Listas de candidatos já calculadas para todas as cidades;
+        ignoradas quando o tour cobre apenas parte das cidades.
+
+    Retorna:
+    list: Tour melhorado, começando pela mesma cidade e no mesmo formato (aberto ou fechado) do tour recebido.
+    """
+    if coords is None and distances is None:
+        raise ValueError("Informe as coordenadas ou a matriz de distâncias.")
+    closed = len(tour) > 1 and tour[0] == tour[-1]
+    cities = np.asarray(tour[:-1] if closed else tour, dtype=np.int64)
+    total = len(coords) if coords is not None else len(distances)
+    if len(cities) < 4:
+        return list(tour)
+
+    # Trabalha com índices locais quando o tour cobre apenas parte das cidades
+    if len(cities) == total:
+        local_coords, local_distances, mapping = coords, distances, None
+    else:
+        mapping = cities
+        local_coords = as_coordinate_array(coords)[cities] if coords is not None else None
+        local_distances = None
+        if coords is None and isinstance(distances, LazyDistanceMatrix):
+            local_distances = LazyDistanceMatrix(distances.points[cities], distances.dtype, scale=distances.scale)
+        elif coords is None:
+            local_distances = np.asarray(distances)[np.ix_(cities, cities)]
+        cities = np.arange(len(cities))
+        neighbors = None
+
+    result = local_search(cities.tolist(), local_coords, local_distances, k, use_or_opt, time_limit, neighbors)
+    if mapping is not None:
+        result = mapping[result].tolist()
+    return result + [result[0]] if closed else result
+
+
+def local_search(tour, coords=None, distances=None, k=NEIGHBORS, use_or_opt=True, time_limit=None, neighbors=None):
+    """
+    Núcleo da busca local de improve_tour sobre um tour que visita todas as cidades 0..n-1.
+
+    Retorna:
+    list: Tour melhorado, começando pela mesma cidade do tour recebido.
+    """
+    start_time = time.time()
+    dist = distance_function(coords, distances)
+    neighbors = candidate_lists(coords, distances, k, neighbors)
+    array_tour = ArrayTour(tour)
+    queue = deque(tour)
+    active = [True] * len(tour)
+
+    while queue:
+        if time_limit is not None and time.time() - start_time > time_limit:
+            break
+        city = queue.popleft()
+        active[city] = False
+        changed = two_opt_step(array_tour, dist, neighbors, city)
+        if not changed and use_or_opt:
+            changed = or_opt_step(array_tour, dist, neighbors, city)
+        if changed:
+            for endpoint in changed:
+                if not active[endpoint]:
+                    active[endpoint] = True
+                    queue.append(endpoint)
+    return array_tour.to_list(start=tour[0])
+
+
+def improve_routes(routes, coords=None, distances=None, k=NEIGHBORS, use_or_opt=True):
+    """Aplica improve_tour a cada rota de uma solução mTSP (rotas fechadas que começam e terminam na origem)."""
+    return [improve_tour(route, coords, distances, k, use_or_opt) for route in routes]
+
+
+def tour_length(tour, coords=None, distances=None):
+    """Calcula o comprimento de um tour aberto (a aresta de volta à cidade inicial é incluída)."""
+    return tour_lengths(tour, coords, distances)
+
+
+def test_local_search():
+    n_cities = 10000
+    random_generator = np.random.default_rng(7)
+    coordinates = random_generator.uniform(0, 1000000, size=(n_cities, 2))
+
+    start_time = time.time()
+    tour = list(range(n_cities))
+    tour.sort(key=lambda city: (int(coordinates[city, 0] // 20000), coordinates[city, 1]))  # Tour em faixas
+    initial_length = tour_length(tour, coordinates)
+    improved = improve_tour(tour, coordinates)
+    interval = time.time() - start_time
+
+    print(f"Número de cidades:    {n_cities}")
+    print(f"Distância inicial:    {initial_length:.3f}")
+    print(f"Distância melhorada:  {tour_length(improved, coordinates):.3f}")
+    print(f"Tempo de execução:    {interval:.3f} segundos")
+    assert sorted(improved) == list(range(n_cities))
+
+    # Matriz preguiçosa, como a devolvida por get_distances acima de DENSE_LIMIT: lida pelas coordenadas
+    lazy = LazyDistanceMatrix(coordinates, np.int64, scale=1)
+    start_time = time.time()
+    lazy_improved = improve_tour(tour, distances=lazy)
+    print(f"Matriz preguiçosa:    {tour_length(lazy_improved, distances=lazy)} em {time.time() - start_time:.3f} "
+          f"segundos (distâncias inteiras)")
+    assert sorted(lazy_improved) == list(range(n_cities))
+
+
+def main():
+    test_local_search()
+
+
+if __name__ == "__main__":
+    main()
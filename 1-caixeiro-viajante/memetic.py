@@ -0,0 +1,279 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+
+import numpy as np
+
+from local_search import improve_routes, distance_function
+from mtsp import giant_tour, split_giant_tour, split_total, split_makespan, route_cost, route_length, check_capacity, \
+    solve_mtsp_split, OBJECTIVES
+from tsp_distances import as_coordinate_array
+
+POPULATION_SIZE = 30      # Indivíduos por ilha
+ISLANDS = 4               # Número padrão de ilhas (populações independentes)
+MIGRATION_INTERVAL = 10   # Gerações entre duas migrações
+MIGRANTS = 2              # Melhores indivíduos de cada ilha copiados para a ilha seguinte a cada migração
+TOURNAMENT_SIZE = 2       # Indivíduos sorteados em cada torneio de seleção
+MUTATION_RATE = 0.3       # Probabilidade de um filho receber uma inversão aleatória de segmento
+LOCAL_SEARCH_RATE = 0.2   # Fração dos filhos melhorados pela busca local nas rotas
+COST_DECIMALS = 6         # Casas decimais usadas para considerar dois custos iguais (indivíduos repetidos)
+
+_island = {}              # Dados da instância em cada processo trabalhador
+
+
+def giant_arrays(population, points, depot=0):
+    """
+    Distâncias de cada cidade até a origem (d0) e somas acumuladas das arestas (prefix) dos tours gigantes de uma
+    população inteira, calculadas de uma vez pelo NumPy.
+
+    Parâmetros:
+    population (ndarray): Array (P, n) de permutações das cidades (sem a origem).
+    points (ndarray): Coordenadas (N, 2) das cidades.
+
+    Retorna:
+    tuple: (d0 (P, n), prefix (P, n)).
+    """
+    ordered = points[population]
+    d0 = np.sqrt(((ordered - points[depot]) ** 2).sum(axis=2))
+    edges = np.sqrt((np.diff(ordered, axis=1) ** 2).sum(axis=2))
+    prefix = np.zeros(population.shape)
+    np.cumsum(edges, axis=1, out=prefix[:, 1:])
+    return d0, prefix
+
+
+def split_total_batch(d0, prefix, num_viajantes):
+    """
+    Custo da divisão ótima de split_total (exatamente num_viajantes rotas, sem capacidade) para cada tour de uma
+    população: as camadas da programação dinâmica são mínimos acumulados ao longo do eixo das cidades, então a
+    população inteira é avaliada em num_viajantes operações vetorizadas.
+
+    Retorna:
+    ndarray: Distância total mínima (P,) de cada tour gigante.
+    """
+    n = d0.shape[1]
+    final = prefix + d0
+    base = d0 - prefix
+    cost = np.full((len(d0), n + 1), np.inf)
+    cost[:, 0] = 0.0
+    for _ in range(num_viajantes):
+        running = np.minimum.accumulate(cost[:, :n] + base, axis=1)
+        cost[:, 0] = np.inf
+        cost[:, 1:] = final + running
+    return cost[:, n]
+
+
+def evaluate_population(population, points, num_viajantes, objective='total', capacity=None, depot=0):
+    """
+    Avalia os tours gigantes de uma população pelo custo da divisão ótima em num_viajantes rotas. Sem capacidade e com
+    o objetivo 'total' a avaliação é vetorizada (split_total_batch); nos outros casos cada tour usa split_total ou
+    split_makespan sobre os arrays calculados em lote.
+
+    Retorna:
+    ndarray: Custo (P,) de cada indivíduo (distância total ou maior rota).
+    """
+    d0, prefix = giant_arrays(population, points, depot)
+    if objective == 'total' and capacity is None:
+        return split_total_batch(d0, prefix, num_viajantes)
+    split = split_total if objective == 'total' else split_makespan
+    aggregate = sum if objective == 'total' else max
+    costs = np.empty(len(population))
+    for p in range(len(population)):
+        cuts = split(d0[p], prefix[p], num_viajantes, capacity)
+        costs[p] = aggregate(route_cost(d0[p], prefix[p], a, b - 1) for a, b in zip(cuts[:-1], cuts[1:]))
+    return costs
+
+
+def order_crossover(parent_a, parent_b, generator, n_cities):
+    """
+    Cruzamento de ordem (OX): o filho herda um segmento de parent_a na mesma posição e recebe as demais cidades na
+    ordem em que aparecem em parent_b a partir do fim do segmento.
+    """
+    n = len(parent_a)
+    a, b = np.sort(generator.choice(n + 1, size=2, replace=False))
+    taken = np.zeros(n_cities, dtype=bool)
+    taken[parent_a[a:b]] = True
+    rest = np.roll(parent_b, -b)
+    rest = rest[~taken[rest]]
+    child = np.empty_like(parent_a)
+    child[a:b] = parent_a[a:b]
+    child[b:] = rest[:n - b]
+    child[:a] = rest[n - b:]
+    return child
+
+
+def mutate(individual, generator):
+    """Inverte um segmento aleatório do tour gigante (movimento 2-opt aleatório)."""
+    a, b = np.sort(generator.choice(len(individual) + 1, size=2, replace=False))
+    individual[a:b] = individual[a:b][::-1].copy()
+
+
+def educate(individual, coords, num_viajantes, objective='total', capacity=None, depot=0):
+    """Busca local do algoritmo memético: divide o tour gigante, melhora cada rota com 2-opt/Or-opt e concatena."""
+    routes = split_giant_tour(individual, coords, num_viajantes, objective, capacity, depot)
+    routes = improve_routes(routes, coords=coords)
+    return np.array([city for route in routes for city in route[1:-1]], dtype=individual.dtype)
+
+
+def survivors(population, costs, size):
+    """
+    Seleciona os size melhores indivíduos distintos (custos iguais são tratados como repetições); se não houver
+    indivíduos distintos suficientes, completa com os melhores restantes.
+    """
+    order = np.argsort(costs, kind='stable')
+    _, first = np.unique(np.round(costs[order], COST_DECIMALS), return_index=True)
+    unique = order[np.sort(first)]
+    chosen = np.concatenate((unique, order[~np.isin(order, unique)]))[:size]
+    chosen = chosen[np.argsort(costs[chosen], kind='stable')]
+    return population[chosen], costs[chosen]
+
+
+def evolve(population, costs, generations, deadline, seed, coords, num_viajantes, objective='total', capacity=None,
+           depot=0):
+    """
+    Executa gerações do algoritmo memético sobre uma população: seleção por torneio, cruzamento OX, mutação,
+    busca local em parte dos filhos, avaliação em lote e sobrevivência dos melhores indivíduos distintos entre pais e
+    filhos.
+
+    Parâmetros:
+    population (ndarray): Array (P, n) de tours gigantes (sem a origem).
+    costs (ndarray): Custos (P,) da população.
+    generations (int): Número máximo de gerações.
+    deadline (float): Instante (time.time()) em que a evolução para.
+    seed (int ou sequência): Semente do gerador aleatório.
+
+    Retorna:
+    tuple: (população, custos), ordenados do melhor para o pior indivíduo.
+    """
+    generator = np.random.default_rng(seed)
+    points = as_coordinate_array(coords)
+    size = len(population)
+    for _ in range(generations):
+        if time.time() > deadline:
+            break
+        contenders = generator.integers(size, size=(size, 2, TOURNAMENT_SIZE))
+        winners = np.take_along_axis(contenders, costs[contenders].argmin(axis=2)[..., None], axis=2)[..., 0]
+        children = np.empty_like(population)
+        for c, (i, j) in enumerate(winners):
+            children[c] = order_crossover(population[i], population[j], generator, len(points))
+            if generator.random() < MUTATION_RATE:
+                mutate(children[c], generator)
+        for c in np.flatnonzero(generator.random(size) < LOCAL_SEARCH_RATE):
+            if time.time() > deadline:
+                break
+            children[c] = educate(children[c], points, num_viajantes, objective, capacity, depot)
+        child_costs = evaluate_population(children, points, num_viajantes, objective, capacity, depot)
+        population, costs = survivors(np.vstack((population, children)), np.concatenate((costs, child_costs)), size)
+    return population, costs
+
+
+def _worker_init(coords, num_viajantes, objective, capacity, depot):
+    _island.update(coords=coords, num_viajantes=num_viajantes, objective=objective, capacity=capacity, depot=depot)
+
+
+def _run_island(population, costs, generations, deadline, seed):
+    return evolve(population, costs, generations, deadline, seed, **_island)
+
+
+def initial_population(giant, size, generator, points, num_viajantes, objective='total', capacity=None, depot=0):
+    """
+    População inicial de uma ilha: o tour gigante construído pela heurística (melhorado pela busca local nas rotas),
+    cópias dele com inversões aleatórias de segmentos e permutações aleatórias.
+    """
+    population = np.empty((size, len(giant)), dtype=np.int64)
+    population[0] = educate(giant, points, num_viajantes, objective, capacity, depot)
+    for p in range(1, size):
+        if p < size // 2:
+            population[p] = population[0]
+            for _ in range(1 + p % 4):
+                mutate(population[p], generator)
+        else:
+            population[p] = generator.permutation(giant)
+    costs = evaluate_population(population, points, num_viajantes, objective, capacity, depot)
+    return survivors(population, costs, size)
+
+
+def solve_mtsp_memetic(coords, num_viajantes, objective='total', capacity=None, depot=0, time_limit=30.0,
+                       islands=ISLANDS, population_size=POPULATION_SIZE, workers=None, seed=0):
+    """
+    Resolve o mTSP por um algoritmo memético em ilhas sobre tours gigantes.
+
+    Cada indivíduo é uma permutação das cidades (um array NumPy), avaliada pelo custo da divisão ótima em
+    num_viajantes rotas (split_giant_tour); a população inteira é avaliada de uma vez pela programação dinâmica
+    vetorizada. As ilhas evoluem em processos separados (ProcessPoolExecutor) e, a cada MIGRATION_INTERVAL gerações,
+    os melhores indivíduos de cada ilha substituem os piores da ilha seguinte (topologia em anel). A busca para ao
+    esgotar time_limit.
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades; a cidade depot é a origem de todos os viajantes.
+    num_viajantes (int): Número de viajantes.
+    objective (str): 'total' ou 'makespan'.
+    capacity (int, opcional): Número máximo de cidades por viajante.
+    depot (int): Índice da cidade de origem.
+    time_limit (float): Tempo máximo em segundos.
+    islands (int): Número de ilhas.
+    population_size (int): Indivíduos por ilha.
+    workers (int, opcional): Número de processos; por padrão o menor entre o número de ilhas e o de núcleos.
+    seed (int): Semente base dos geradores aleatórios.
+
+    Retorna:
+    list: Uma rota fechada [depot, ..., depot] por viajante.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"O objetivo deve ser um de {OBJECTIVES}.")
+    deadline = time.time() + time_limit
+    points = as_coordinate_array(coords)
+    check_capacity(len(points) - 1, num_viajantes, capacity)
+    if len(points) - 1 <= num_viajantes + 2:
+        return solve_mtsp_split(points, num_viajantes, objective, capacity, depot)
+
+    giant = np.asarray(giant_tour(points, depot)[1:], dtype=np.int64)
+    generator = np.random.default_rng(seed)
+    populations = [initial_population(giant, population_size, generator, points, num_viajantes, objective, capacity,
+                                      depot) for _ in range(islands)]
+    workers = workers or min(islands, os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init,
+                             initargs=(points, num_viajantes, objective, capacity, depot)) as executor:
+        epoch = 0
+        while time.time() < deadline:
+            futures = [executor.submit(_run_island, population, costs, MIGRATION_INTERVAL, deadline, [seed, epoch, i])
+                       for i, (population, costs) in enumerate(populations)]
+            populations = [future.result() for future in futures]
+            epoch += 1
+            if islands > 1:
+                # Migração em anel: os melhores de cada ilha substituem os piores da ilha seguinte
+                migrants = [(population[:MIGRANTS].copy(), costs[:MIGRANTS].copy())
+                            for population, costs in populations]
+                for i, (population, costs) in enumerate(populations):
+                    arriving, arriving_costs = migrants[i - 1]
+                    population[-MIGRANTS:], costs[-MIGRANTS:] = arriving, arriving_costs
+                    populations[i] = survivors(population, costs, population_size)
+
+    population, costs = min(populations, key=lambda item: item[1][0])
+    return split_giant_tour([depot] + population[0].tolist(), points, num_viajantes, objective, capacity, depot)
+
+
+def test_solve_mtsp_memetic():
+    num_viajantes = 5
+    random_generator = np.random.default_rng(21)
+    for n_cities, time_limit in [(91, 10.0), (1000, 20.0)]:
+        coordinates = random_generator.integers(0, 1000, size=(n_cities, 2))
+        dist = distance_function(coords=coordinates)
+        baseline = sum(route_length(route, dist) for route in solve_mtsp_split(coordinates, num_viajantes))
+
+        start_time = time.time()
+        routes = solve_mtsp_memetic(coordinates, num_viajantes, time_limit=time_limit)
+        interval = time.time() - start_time
+        total = sum(route_length(route, dist) for route in routes)
+        print(f"Número de cidades:  {n_cities} ({num_viajantes} viajantes)")
+        print(f"Tour gigante+split: {baseline:.3f}")
+        print(f"Memético:           {total:.3f} ({100 * (baseline - total) / baseline:.2f}% melhor)")
+        print(f"Tempo de execução:  {interval:.3f} segundos\n")
+        assert sorted(c for route in routes for c in route[1:-1]) == list(range(1, n_cities))
+
+
+def main():
+    test_solve_mtsp_memetic()
+
+
+if __name__ == "__main__":
+    main()
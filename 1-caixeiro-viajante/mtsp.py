@@ -0,0 +1,508 @@
+from collections import deque
+import math
+import time
+
+import numpy as np
+
+from local_search import improve_tour, neighbor_lists, distance_function
+from spatial_index import grid_nearest_neighbor_tour
+from tsp_distances import as_coordinate_array
+
+KMEANS_ITERATIONS = 50    # Número máximo de iterações do k-means
+REBALANCE_ROUNDS = 50     # Número máximo de rodadas de movimentos entre rotas
+EPSILON = 1e-9            # Melhoria mínima para aceitar um movimento
+OBJECTIVES = ('total', 'makespan')
+
+
+def sweep_clusters(coords, num_viajantes, depot=0, capacity=None):
+    """
+    Agrupa as cidades pela varredura angular em torno da origem.
+
+    As cidades são ordenadas pelo ângulo em relação à origem, a varredura começa logo após o maior intervalo angular
+    vazio e os ângulos são divididos em num_viajantes setores consecutivos com quantidades equilibradas de cidades.
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades.
+    num_viajantes (int): Número de viajantes (grupos).
+    depot (int): Índice da cidade de origem.
+    capacity (int, opcional): Número máximo de cidades por viajante.
+
+    Retorna:
+    list: Lista de num_viajantes arrays com os índices das cidades de cada grupo.
+    """
+    points = as_coordinate_array(coords)
+    customers = np.delete(np.arange(len(points)), depot)
+    check_capacity(len(customers), num_viajantes, capacity)
+    delta = points[customers] - points[depot]
+    angles = np.arctan2(delta[:, 1], delta[:, 0])
+    order = np.argsort(angles, kind='stable')
+    if len(order) > 1:
+        gaps = np.diff(np.concatenate((angles[order], [angles[order[0]] + 2 * math.pi])))
+        order = np.roll(order, -(int(gaps.argmax()) + 1))
+    return [customers[group] for group in np.array_split(order, num_viajantes)]
+
+
+def kmeans_clusters(coords, num_viajantes, depot=0, capacity=None, seed=0):
+    """
+    Agrupa as cidades com k-means (inicialização k-means++), respeitando opcionalmente uma capacidade por grupo.
+
+    Com capacidade, cada cidade é atribuída ao centróide mais próximo que ainda tem espaço, processando primeiro as
+    cidades com maior arrependimento (diferença entre o segundo e o primeiro centróide mais próximos).
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades.
+    num_viajantes (int): Número de viajantes (grupos).
+    depot (int): Índice da cidade de origem.
+    capacity (int, opcional): Número máximo de cidades por viajante.
+    seed (int): Semente do gerador aleatório.
+
+    Retorna:
+    list: Lista de num_viajantes arrays com os índices das cidades de cada grupo.
+    """
+    points = as_coordinate_array(coords)
+    customers = np.delete(np.arange(len(points)), depot)
+    check_capacity(len(customers), num_viajantes, capacity)
+    if len(customers) <= num_viajantes:
+        return [customers[i:i + 1] for i in range(num_viajantes)]
+
+    generator = np.random.default_rng(seed)
+    data = points[customers]
+    centroids = [data[generator.integers(len(data))]]
+    for _ in range(num_viajantes - 1):
+        squared = ((data[:, None, :] - np.array(centroids)[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        # Menos pontos distintos que viajantes: todos coincidem com algum centróide, então o sorteio é uniforme
+        weights = squared / squared.sum() if squared.sum() > 0 else None
+        centroids.append(data[generator.choice(len(data), p=weights)])
+    centroids = np.array(centroids)
+
+    labels = None
+    for _ in range(KMEANS_ITERATIONS):
+        squared = ((data[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        new_labels = squared.argmin(axis=1) if capacity is None else capacitated_assignment(squared, capacity)
+        if labels is not None and (new_labels == labels).all():
+            break
+        labels = new_labels
+        for k in range(num_viajantes):
+            if (labels == k).any():
+                centroids[k] = data[labels == k].mean(axis=0)
+    return [customers[labels == k] for k in range(num_viajantes)]
+
+
+def capacitated_assignment(squared, capacity):
+    """Atribui cada ponto ao centróide mais próximo com espaço, em ordem decrescente de arrependimento."""
+    ranked = np.argsort(squared, axis=1)
+    best = np.take_along_axis(squared, ranked[:, :2], axis=1) if squared.shape[1] > 1 else squared
+    regret = best[:, -1] - best[:, 0]
+    labels = np.empty(len(squared), dtype=np.int64)
+    load = np.zeros(squared.shape[1], dtype=np.int64)
+    for point in np.argsort(-regret, kind='stable').tolist():
+        for cluster in ranked[point].tolist():
+            if load[cluster] < capacity:
+                labels[point] = cluster
+                load[cluster] += 1
+                break
+    return labels
+
+
+def check_capacity(n_customers, num_viajantes, capacity):
+    if num_viajantes < 1:
+        raise ValueError("O número de viajantes deve ser pelo menos 1.")
+    if capacity is not None and capacity * num_viajantes < n_customers:
+        raise ValueError("A capacidade dos viajantes é insuficiente para atender todas as cidades.")
+
+
+def route_for_cluster(coords, cluster, depot=0):
+    """
+    Resolve o TSP de um grupo de cidades: vizinho mais próximo a partir da origem (índice em grade) seguido da busca
+    local 2-opt/Or-opt.
+
+    Retorna:
+    list: Rota fechada [depot, ..., depot].
+    """
+    cities = np.concatenate(([depot], np.asarray(cluster, dtype=np.int64)))
+    if len(cities) <= 3:
+        return cities.tolist() + [depot]
+    local_coords = as_coordinate_array(coords)[cities]
+    local_tour = improve_tour(grid_nearest_neighbor_tour(local_coords, start=0), coords=local_coords)
+    return cities[local_tour].tolist() + [depot]
+
+
+def route_length(route, dist):
+    """Calcula o comprimento de uma rota fechada."""
+    return sum(dist(route[i], route[i + 1]) for i in range(len(route) - 1))
+
+
+class RouteSet:
+    """Conjunto de rotas fechadas com os comprimentos e a posição (rota, índice) de cada cidade."""
+
+    def __init__(self, routes, dist, depot=0):
+        self.routes = [list(route) for route in routes]
+        self.dist = dist
+        self.depot = depot
+        self.lengths = [route_length(route, dist) for route in self.routes]
+        self.where = {}
+        for r in range(len(self.routes)):
+            self.index(r)
+
+    def index(self, r):
+        for i, city in enumerate(self.routes[r][1:-1], start=1):
+            self.where[city] = (r, i)
+
+    def update(self, r):
+        self.lengths[r] = route_length(self.routes[r], self.dist)
+        self.index(r)
+
+    def size(self, r):
+        return len(self.routes[r]) - 2
+
+
+def move_score(objective, length_a, length_b, delta_a, delta_b):
+    """Pontua um movimento entre as rotas a e b; valores menores são melhores."""
+    if objective == 'total':
+        return delta_a + delta_b, 0.0
+    old_max = max(length_a, length_b)
+    new_max = max(length_a + delta_a, length_b + delta_b)
+    return new_max - old_max, delta_a + delta_b
+
+
+def improves(score):
+    primary, secondary = score
+    return primary < -EPSILON or (primary <= EPSILON and secondary < -EPSILON)
+
+
+def best_move(routes, city, neighbors, objective, capacity):
+    """
+    Procura o melhor movimento entre rotas para a cidade: realocação (inserção ao lado de um vizinho de outra rota)
+    ou troca com um vizinho de outra rota, com avaliação em O(1).
+
+    Retorna:
+    tuple: (pontuação, tipo, dados do movimento) ou None se nenhum movimento melhora a solução.
+    """
+    dist = routes.dist
+    ra, i = routes.where[city]
+    route_a = routes.routes[ra]
+    a, b = route_a[i - 1], route_a[i + 1]
+    removal = dist(a, b) - dist(a, city) - dist(city, b)
+    best = None
+    for v in neighbors[city]:
+        if v == routes.depot:
+            continue
+        rb, j = routes.where[v]
+        if rb == ra:
+            continue
+        route_b = routes.routes[rb]
+        x, y = route_b[j - 1], route_b[j + 1]
+        length_a, length_b = routes.lengths[ra], routes.lengths[rb]
+
+        # Realocação: cidade inserida antes ou depois de v na rota b
+        if capacity is None or routes.size(rb) < capacity:
+            for position, (left, right) in ((j, (x, v)), (j + 1, (v, y))):
+                insertion = dist(left, city) + dist(city, right) - dist(left, right)
+                score = move_score(objective, length_a, length_b, removal, insertion)
+                if improves(score) and (best is None or score < best[0]):
+                    best = (score, 'relocate', (ra, i, rb, position))
+
+        # Troca: cidade ocupa a posição de v e v ocupa a posição da cidade
+        if a == v or b == v:
+            continue
+        delta_a = dist(a, v) + dist(v, b) - dist(a, city) - dist(city, b)
+        delta_b = dist(x, city) + dist(city, y) - dist(x, v) - dist(v, y)
+        score = move_score(objective, length_a, length_b, delta_a, delta_b)
+        if improves(score) and (best is None or score < best[0]):
+            best = (score, 'exchange', (ra, i, rb, j))
+    return best
+
+
+def rebalance(routes, coords, objective='total', capacity=None, k=10, time_limit=None, depot=0):
+    """
+    Melhora um conjunto de rotas com movimentos de realocação e troca entre rotas, seguidos da busca local dentro de
+    cada rota alterada, minimizando a distância total ('total') ou a maior rota ('makespan').
+
+    Parâmetros:
+    routes (lista): Rotas fechadas [depot, ..., depot].
+    coords (lista ou ndarray): Coordenadas das cidades.
+    objective (str): 'total' ou 'makespan'.
+    capacity (int, opcional): Número máximo de cidades por rota.
+    k (int): Tamanho das listas de vizinhos candidatos.
+    time_limit (float, opcional): Tempo máximo em segundos.
+    depot (int): Índice da cidade de origem.
+
+    Retorna:
+    list: Rotas melhoradas.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"O objetivo deve ser um de {OBJECTIVES}.")
+    start_time = time.time()
+    dist = distance_function(coords=coords)
+    neighbors = neighbor_lists(coords=coords, k=k).tolist()
+    route_set = RouteSet(routes, dist, depot)
+    customers = sorted(route_set.where)
+
+    for _ in range(REBALANCE_ROUNDS):
+        changed = set()
+        for city in customers:
+            if time_limit is not None and time.time() - start_time > time_limit:
+                break
+            move = best_move(route_set, city, neighbors, objective, capacity)
+            if move is None:
+                continue
+            _, kind, (ra, i, rb, j) = move
+            route_a, route_b = route_set.routes[ra], route_set.routes[rb]
+            if kind == 'relocate':
+                route_b.insert(j, route_a.pop(i))
+            else:
+                route_a[i], route_b[j] = route_b[j], route_a[i]
+            route_set.update(ra)
+            route_set.update(rb)
+            changed.update((ra, rb))
+        if not changed:
+            break
+        for r in changed:
+            route_set.routes[r] = improve_tour(route_set.routes[r], coords=coords)
+            route_set.update(r)
+    return route_set.routes
+
+
+def solve_mtsp(coords, num_viajantes, method='sweep', objective='total', capacity=None, depot=0, time_limit=None,
+               seed=0):
+    """
+    Resolve o mTSP agrupando as cidades, roteando cada grupo como um TSP e rebalanceando as rotas.
+
+    1. Agrupamento: varredura angular em torno da origem ('sweep') ou k-means ('kmeans'), respeitando a capacidade.
+    2. Roteamento: cada grupo vira uma rota pelo vizinho mais próximo com busca local 2-opt/Or-opt.
+    3. Rebalanceamento: realocações e trocas de cidades entre rotas vizinhas, minimizando a distância total ou a
+       maior rota, com nova busca local nas rotas alteradas.
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades; a cidade depot é a origem de todos os viajantes.
+    num_viajantes (int): Número de viajantes.
+    method (str): 'sweep' ou 'kmeans'.
+    objective (str): 'total' ou 'makespan'.
+    capacity (int, opcional): Número máximo de cidades por viajante.
+    depot (int): Índice da cidade de origem.
+    time_limit (float, opcional): Tempo máximo do rebalanceamento em segundos.
+    seed (int): Semente do k-means.
+
+    Retorna:
+    list: Uma rota fechada [depot, ..., depot] por viajante.
+    """
+    if method == 'sweep':
+        clusters = sweep_clusters(coords, num_viajantes, depot, capacity)
+    elif method == 'kmeans':
+        clusters = kmeans_clusters(coords, num_viajantes, depot, capacity, seed)
+    else:
+        raise ValueError("O método deve ser 'sweep' ou 'kmeans'.")
+    routes = [route_for_cluster(coords, cluster, depot) for cluster in clusters]
+    return rebalance(routes, coords, objective, capacity, time_limit=time_limit, depot=depot)
+
+
+def giant_tour(coords, depot=0):
+    """
+    Constrói um tour gigante sobre todas as cidades (vizinho mais próximo em grade seguido da busca local 2-opt/Or-opt),
+    rotacionado para começar na origem.
+    """
+    return improve_tour(grid_nearest_neighbor_tour(coords, start=depot), coords=coords)
+
+
+def route_cost(d0, prefix, a, b):
+    """Custo da rota origem -> giant[a] -> ... -> giant[b] -> origem."""
+    return d0[a] + prefix[b] - prefix[a] + d0[b]
+
+
+def split_total(d0, prefix, num_viajantes, capacity=None):
+    """
+    Divisão ótima (Prins) do tour gigante em exatamente num_viajantes rotas não vazias, minimizando a distância total.
+
+    custo[k][b + 1] = F[b] + min(custo[k - 1][a] + d0[a] - prefix[a]) para a <= b, com F[b] = prefix[b] + d0[b]. O
+    mínimo é um mínimo acumulado (ou, com capacidade, o mínimo de uma janela deslizante), então cada camada custa O(n)
+    e a divisão completa custa O(n * m).
+
+    Retorna:
+    list: Fronteiras das rotas [0, c1, ..., n]; a rota i cobre giant[c_i:c_(i+1)].
+    """
+    n = len(d0)
+    final = prefix[:n] + d0
+    base = d0 - prefix[:n]
+    positions = np.arange(n)
+    cost = np.full(n + 1, np.inf)
+    cost[0] = 0.0
+    parents = []
+    for _ in range(num_viajantes):
+        key = cost[:n] + base
+        if capacity is None:
+            running = np.minimum.accumulate(key)
+            parent = np.maximum.accumulate(np.where(key == running, positions, 0))
+        else:
+            running = np.empty(n)
+            parent = np.empty(n, dtype=np.int64)
+            window = deque()  # Fila monotônica com os candidatos da janela [b - capacity + 1, b]
+            for b in range(n):
+                while window and key[window[-1]] >= key[b]:
+                    window.pop()
+                window.append(b)
+                if window[0] <= b - capacity:
+                    window.popleft()
+                running[b] = key[window[0]]
+                parent[b] = window[0]
+        new_cost = np.full(n + 1, np.inf)
+        new_cost[1:] = final + running
+        cost = new_cost
+        parents.append(parent)
+
+    cuts = [n]
+    for parent in reversed(parents):
+        cuts.append(int(parent[cuts[-1] - 1]))
+    return cuts[::-1]
+
+
+def split_makespan(d0, prefix, num_viajantes, capacity=None):
+    """
+    Divisão ótima do tour gigante em num_viajantes rotas minimizando a maior rota.
+
+    Pela desigualdade triangular, encurtar uma rota pelo início ou pelo fim nunca aumenta o seu custo, então
+    F[b] = prefix[b] + d0[b] é não decrescente e, para um limite T, a rota mais longa viável a partir de cada início é
+    obtida por busca binária em F. A divisão gulosa (sempre a rota mais longa viável) usa o menor número de rotas, e o
+    menor T viável é encontrado por bissecção.
+
+    Retorna:
+    list: Fronteiras das rotas [0, c1, ..., n].
+    """
+    n = len(d0)
+    final = np.maximum.accumulate(prefix[:n] + d0)
+    base = d0 - prefix[:n]
+    positions = np.arange(n)
+
+    def greedy(limit):
+        reach = np.searchsorted(final, limit - base, side='right') - 1
+        if capacity is not None:
+            reach = np.minimum(reach, positions + capacity - 1)
+        cuts = [0]
+        while cuts[-1] < n:
+            a = cuts[-1]
+            if reach[a] < a or len(cuts) > num_viajantes:
+                return None
+            cuts.append(int(reach[a]) + 1)
+        return cuts if len(cuts) - 1 <= num_viajantes else None
+
+    cuts = greedy(np.inf)
+    low = float((2 * d0).max())
+    high = max(route_cost(d0, prefix, a, b - 1) for a, b in zip(cuts[:-1], cuts[1:]))
+    while high - low > EPSILON * max(high, 1.0):
+        middle = (low + high) / 2
+        candidate = greedy(middle)
+        if candidate is None:
+            low = middle
+        else:
+            high, cuts = middle, candidate
+
+    # Completa num_viajantes rotas dividindo a rota mais cara no ponto que minimiza a maior parte
+    while len(cuts) - 1 < num_viajantes:
+        costs = [route_cost(d0, prefix, a, b - 1) if b - a > 1 else -np.inf for a, b in zip(cuts[:-1], cuts[1:])]
+        r = int(np.argmax(costs))
+        a, b = cuts[r], cuts[r + 1]
+        split = min(range(a + 1, b), key=lambda c: max(route_cost(d0, prefix, a, c - 1),
+                                                       route_cost(d0, prefix, c, b - 1)))
+        cuts.insert(r + 1, split)
+    return cuts
+
+
+def split_giant_tour(giant, coords, num_viajantes, objective='total', capacity=None, depot=0):
+    """
+    Divide um tour gigante em num_viajantes rotas não vazias que saem e voltam à origem, de forma ótima para a ordem
+    dada, minimizando a distância total ('total') ou a maior rota ('makespan').
+
+    Parâmetros:
+    giant (lista): Tour gigante; a origem, se presente, é removida.
+    coords (lista ou ndarray): Coordenadas das cidades.
+    num_viajantes (int): Número de viajantes.
+    objective (str): 'total' ou 'makespan'.
+    capacity (int, opcional): Número máximo de cidades por viajante.
+    depot (int): Índice da cidade de origem.
+
+    Retorna:
+    list: Uma rota fechada [depot, ..., depot] por viajante (rotas vazias [depot, depot] quando há menos cidades do que
+    viajantes).
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"O objetivo deve ser um de {OBJECTIVES}.")
+    giant = list(giant)
+    if depot in giant:
+        index = giant.index(depot)
+        giant = giant[index + 1:] + giant[:index]
+    giant = np.asarray(giant, dtype=np.int64)
+    check_capacity(len(giant), num_viajantes, capacity)
+    if len(giant) <= num_viajantes:
+        routes = [[depot, int(city), depot] for city in giant]
+        return routes + [[depot, depot] for _ in range(num_viajantes - len(giant))]
+
+    points = as_coordinate_array(coords)
+    ordered = points[giant]
+    d0 = np.sqrt(((ordered - points[depot]) ** 2).sum(axis=1))
+    edges = np.sqrt((np.diff(ordered, axis=0) ** 2).sum(axis=1))
+    prefix = np.concatenate(([0.0], np.cumsum(edges)))
+    if objective == 'total':
+        cuts = split_total(d0, prefix, num_viajantes, capacity)
+    else:
+        cuts = split_makespan(d0, prefix, num_viajantes, capacity)
+    return [[depot] + giant[a:b].tolist() + [depot] for a, b in zip(cuts[:-1], cuts[1:])]
+
+
+def solve_mtsp_split(coords, num_viajantes, objective='total', capacity=None, depot=0, giant=None):
+    """
+    Resolve o mTSP pela estratégia "tour gigante + divisão ótima": um único tour bom sobre todas as cidades é dividido
+    em num_viajantes rotas pela programação dinâmica de split_giant_tour, testando os dois sentidos do tour.
+
+    Parâmetros:
+    giant (lista, opcional): Tour gigante começando na origem; por padrão é construído por giant_tour.
+
+    Retorna:
+    list: Uma rota fechada [depot, ..., depot] por viajante.
+    """
+    dist = distance_function(coords=coords)
+    giant = list(giant) if giant is not None else giant_tour(coords, depot)
+    candidates = [split_giant_tour(order, coords, num_viajantes, objective, capacity, depot)
+                  for order in (giant, giant[:1] + giant[:0:-1])]
+    aggregate = sum if objective == 'total' else max
+    return min(candidates, key=lambda routes: aggregate(route_length(route, dist) for route in routes))
+
+
+def test_solve_mtsp():
+    n_cities = 2000
+    num_viajantes = 5
+    random_generator = np.random.default_rng(21)
+    coordinates = random_generator.integers(0, 1000, size=(n_cities, 2))
+    dist = distance_function(coords=coordinates)
+
+    for method in ['sweep', 'kmeans']:
+        for objective in OBJECTIVES:
+            start_time = time.time()
+            routes = solve_mtsp(coordinates, num_viajantes, method, objective)
+            interval = time.time() - start_time
+            lengths = [route_length(route, dist) for route in routes]
+            print(f"Método: {method:6} | Objetivo: {objective:8} | Total: {sum(lengths):10.3f} | "
+                  f"Maior rota: {max(lengths):9.3f} | Tempo: {interval:.3f} s")
+            assert sorted(c for route in routes for c in route[1:-1]) == list(range(1, n_cities))
+
+    for objective in OBJECTIVES:
+        start_time = time.time()
+        routes = solve_mtsp_split(coordinates, num_viajantes, objective)
+        interval = time.time() - start_time
+        lengths = [route_length(route, dist) for route in routes]
+        print(f"Método: split  | Objetivo: {objective:8} | Total: {sum(lengths):10.3f} | "
+              f"Maior rota: {max(lengths):9.3f} | Tempo: {interval:.3f} s")
+        assert sorted(c for route in routes for c in route[1:-1]) == list(range(1, n_cities))
+
+    # Paradas repetidas: menos pontos distintos que viajantes
+    coordinates = [(0, 0)] + [(5, 5)] * 6 + [(1, 1)] * 4
+    for method in ['sweep', 'kmeans']:
+        routes = solve_mtsp(coordinates, 3, method)
+        assert sorted(c for route in routes for c in route[1:-1]) == list(range(1, len(coordinates)))
+    print(f"Pontos repetidos: {len(coordinates) - 1} paradas em 2 posições distintas resolvidas com 3 viajantes")
+
+
+def main():
+    test_solve_mtsp()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import shared_memory
+import heapq
+import os
+import random
+import time
+
+import numpy as np
+
+from local_search import improve_tour, neighbor_lists, tour_length
+from spatial_index import grid_nearest_neighbor_tour
+
+BATCH_SIZE = 8            # Número de construções aleatórias executadas por tarefa
+TASKS_PER_WORKER = 2      # Número de tarefas pendentes por processo (mantém os processos ocupados)
+
+_shared = {}              # Estado de cada processo trabalhador: memória compartilhada e o array mapeado sobre ela
+
+
+def share_array(array):
+    """
+    Copia um array para um bloco de memória compartilhada, para que os processos trabalhadores o mapeiem sem cópia.
+
+    Retorna:
+    tuple: (bloco de memória compartilhada, descritor (nome, formato, tipo) usado pelos trabalhadores).
+    """
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _worker_init(descriptor, kind):
+    name, shape, dtype = descriptor
+    block = shared_memory.SharedMemory(name=name)
+    _shared['block'] = block  # Mantém a referência para o mapeamento continuar válido
+    _shared['array'] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    _shared['kind'] = kind
+    # Listas de candidatos calculadas uma vez por processo, em vez de a cada construção
+    array = _shared['array']
+    coords, distances = (array, None) if kind == 'coords' else (None, array)
+    _shared['neighbors'] = neighbor_lists(coords, distances).tolist()
+
+
+def randomized_nearest_neighbor(distances, generator, percentage):
+    """
+    Vizinho mais próximo aleatorizado sobre a matriz de distâncias: cidade inicial aleatória e uma porcentagem das
+    cidades sorteadas como início do tour, como em nearest_neighbor_algorithm_estocastic_2.
+    """
+    n = len(distances)
+    tour = generator.sample(range(n), max(1, n * percentage // 100))
+    visited = np.zeros(n, dtype=bool)
+    visited[tour] = True
+    for _ in range(n - len(tour)):
+        row = np.where(visited, np.inf, distances[tour[-1]])
+        city = int(row.argmin())
+        tour.append(city)
+        visited[city] = True
+    return tour
+
+
+def _run_batch(seeds, percentage, k_best, deadline):
+    """Executa construções aleatórias seguidas de busca local para uma lista de sementes, dentro do prazo."""
+    array, kind, neighbors = _shared['array'], _shared['kind'], _shared['neighbors']
+    coords, distances = (array, None) if kind == 'coords' else (None, array)
+    results = []
+    for seed in seeds:
+        if time.time() > deadline:
+            break
+        generator = random.Random(seed)
+        if kind == 'coords':
+            n = len(coords)
+            prefix = generator.sample(range(n), max(1, n * percentage // 100))
+            tour = grid_nearest_neighbor_tour(coords, prefix=prefix)
+        else:
+            tour = randomized_nearest_neighbor(distances, generator, percentage)
+        tour = improve_tour(tour, coords, distances, time_limit=max(deadline - time.time(), 0), neighbors=neighbors)
+        results.append((tour_length(tour, coords, distances), seed, tour))
+    return heapq.nsmallest(k_best, results)
+
+
+def canonical_tour(tour):
+    """Rotaciona o tour para começar na cidade 0 e escolhe o sentido com o menor segundo elemento."""
+    index = tour.index(0)
+    rotated = tour[index:] + tour[:index]
+    if len(rotated) > 2 and rotated[-1] < rotated[1]:
+        rotated = [0] + rotated[:0:-1]
+    return rotated
+
+
+def multi_start_search(distances=None, coords=None, n_starts=1000, k_best=5, time_limit=30.0, workers=None,
+                       seed=0, percentage=0):
+    """
+    Busca multi-start paralela: distribui milhares de construções aleatórias do vizinho mais próximo, cada uma seguida
+    da busca local 2-opt/Or-opt, entre os núcleos da máquina com um ProcessPoolExecutor.
+
+    A matriz de distâncias (ou, para instâncias grandes, as coordenadas) é copiada uma única vez para memória
+    compartilhada e mapeada pelos processos trabalhadores, em vez de ser serializada a cada tarefa. Cada tarefa recebe
+    um lote de sementes, de modo que os resultados são reprodutíveis para uma mesma semente base. A busca para ao
+    esgotar as construções ou o tempo limite e mantém os k melhores tours distintos, começando pela cidade 0.
+
+    Parâmetros:
+    distances (ndarray, opcional): Matriz (n, n) de distâncias.
+    coords (lista ou ndarray, opcional): Coordenadas das cidades, usadas quando a matriz não é informada.
+    n_starts (int): Número máximo de construções aleatórias.
+    k_best (int): Número de melhores tours mantidos.
+    time_limit (float): Tempo máximo em segundos.
+    workers (int, opcional): Número de processos; por padrão o número de núcleos.
+    seed (int): Semente base; a construção i usa a semente seed + i.
+    percentage (int): Porcentagem de cidades sorteadas no início de cada tour.
+
+    Retorna:
+    list: Lista de até k_best tuplas (distância, tour), da menor para a maior distância.
+    """
+    if distances is None and coords is None:
+        raise ValueError("Informe as coordenadas ou a matriz de distâncias.")
+    deadline = time.time() + time_limit
+    workers = workers or os.cpu_count() or 1
+    kind = 'distances' if distances is not None else 'coords'
+    array = np.asarray(distances if distances is not None else coords)
+    if not np.issubdtype(array.dtype, np.number):
+        array = array.astype(np.float64)  # Matrizes inteiras (integer_distances, TSPLIB) mantêm o tipo
+    block, descriptor = share_array(array)
+
+    best = {}          # Melhor resultado (distância, semente) de cada tour distinto, na forma canônica
+    seeds = iter(range(seed, seed + n_starts))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init,
+                                 initargs=(descriptor, kind)) as executor:
+            pending = set()
+            while True:
+                while len(pending) < workers * TASKS_PER_WORKER and time.time() < deadline:
+                    batch = [s for _, s in zip(range(BATCH_SIZE), seeds)]
+                    if not batch:
+                        break
+                    pending.add(executor.submit(_run_batch, batch, percentage, k_best, deadline))
+                if not pending:
+                    break
+                done, pending = wait(pending, timeout=max(deadline - time.time(), 0) + 1,
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    for cost, task_seed, tour in future.result():
+                        # Tours repetidos ficam com a menor semente, para que o resultado não dependa da ordem em que
+                        # as tarefas terminam
+                        key = tuple(canonical_tour(tour))
+                        best[key] = min(best.get(key, (cost, task_seed)), (cost, task_seed))
+                if time.time() > deadline + 1:
+                    for future in pending:
+                        future.cancel()
+                    break
+    finally:
+        block.close()
+        block.unlink()
+
+    ranking = sorted((cost, task_seed, list(key)) for key, (cost, task_seed) in best.items())
+    return [(cost, tour) for cost, _, tour in ranking[:k_best]]
+
+
+def test_multi_start_search():
+    n_cities = 2000
+    random_generator = np.random.default_rng(3)
+    coordinates = random_generator.uniform(0, 1000000, size=(n_cities, 2))
+
+    start_time = time.time()
+    best_tours = multi_start_search(coords=coordinates, n_starts=64, k_best=3, time_limit=20.0)
+    interval = time.time() - start_time
+
+    print(f"Número de cidades:   {n_cities}")
+    print(f"Processos:           {os.cpu_count()}")
+    for i, (cost, tour) in enumerate(best_tours):
+        print(f"Tour {i + 1}:              {cost:.3f}")
+    print(f"Tempo de execução:   {interval:.3f} segundos")
+
+
+def main():
+    test_multi_start_search()
+
+
+if __name__ == "__main__":
+    main()
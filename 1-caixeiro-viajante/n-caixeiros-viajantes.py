@@ -1,53 +1,48 @@
 import matplotlib.pyplot as plt
+import numpy as np
 import math
-import random
 import time
 
+from held_karp import held_karp
+from instance_generator import random_coordinates
+from mtsp import solve_mtsp_split
+from route_plot import save_routes
+from tsp_distances import get_distances, tour_lengths
 
-def n_tsp_definitive(coords, num_viajantes):
-    n = len(coords)
-    distancias = [[distance_between_two_points_1(coords[i], coords[j]) for j in range(n)] for i in range(n)]
-    memo = {}
+HELD_KARP_MAX_CITIES = 16  # Maior instância resolvida de forma exata pelo Held-Karp antes da divisão
 
-    def tsp(mascara, atual):
-        if mascara == (1 << n) - 1:
-            return distancias[atual][0], [0]
-        if (mascara, atual) in memo:
-            return memo[(mascara, atual)]
 
-        custo_minimo = float('inf')
-        caminho_minimo = []
-        for cidade in range(n):
-            if mascara & (1 << cidade) == 0:
-                nova_mascara = mascara | (1 << cidade)
-                custo, caminho = tsp(nova_mascara, cidade)
-                custo += distancias[atual][cidade]
-                if custo < custo_minimo:
-                    custo_minimo = custo
-                    caminho_minimo = caminho + [cidade]
+def n_tsp_definitive(coords, num_viajantes, distancias=None, objetivo='total'):
+    """
+    Resolve o n-TSP pela estratégia "tour gigante + divisão ótima".
 
-        memo[(mascara, atual)] = custo_minimo, caminho_minimo
-        return custo_minimo, caminho_minimo
+    Um único tour sobre todas as cidades é obtido pelo Held-Karp iterativo (exato) quando a instância é pequena, ou
+    pelo vizinho mais próximo seguido da busca local nas demais. Esse tour é dividido em num_viajantes rotas que saem e
+    voltam à cidade 0 pela programação dinâmica de split_giant_tour, que escolhe os pontos de corte ótimos para a ordem
+    do tour em O(n * m). Diferente da divisão em fatias iguais, nenhuma cidade é perdida quando n não é múltiplo de
+    num_viajantes.
 
-    custo, caminho = tsp(1, 0)
+    Parâmetros:
+    coords (lista): Lista de coordenadas das cidades; a cidade 0 é a origem.
+    num_viajantes (int): Número de viajantes.
+    distancias (ndarray, opcional): Matriz de distâncias já calculada para a instância.
+    objetivo (str): 'total' para minimizar a soma das rotas ou 'makespan' para minimizar a maior rota.
 
-    num_cidades_por_viajante = n // num_viajantes
-    rotas = []
-    for i in range(num_viajantes):
-        indice_inicio = i * num_cidades_por_viajante
-        indice_fim = indice_inicio + num_cidades_por_viajante
-
-        if i == 0:
-            rota = caminho[indice_inicio:indice_fim] + [0]
-            rotas.append(rota)
-        else:
-            rota = [0] + caminho[indice_inicio:indice_fim] + [0]
-            rotas.append(rota)
-    return rotas
+    Retorna:
+    list: Lista de rotas fechadas [0, ..., 0], uma por viajante.
+    """
+    giant = None
+    if len(coords) <= HELD_KARP_MAX_CITIES:
+        if distancias is None:
+            distancias = get_distances(coords)
+        _, giant = held_karp(distancias)
+        if num_viajantes == 1:
+            return [giant + [0]]
+    return solve_mtsp_split(coords, num_viajantes, objetivo, giant=giant)
 
 
 # A coordenada inicial é o indice zero do vetor de coordenadas passada como parametro
-def n_tsp_test(coords, num_viajantes):
+def n_tsp_test(coords, num_viajantes, distancias=None):
     """
     Held–Karp algorithm: https://en.wikipedia.org/wiki/Held%E2%80%93Karp_algorithm
     Algoritmo baseado em Programação Dinâmica com Memoização para resolver o Problema do Caixeiro Viajante (TSP).
@@ -55,6 +50,7 @@ def n_tsp_test(coords, num_viajantes):
     Params:
         coords (list): Lista de coordenadas das cidades a serem visitadas.
         num_viajantes (int): Número de viajantes ou agentes que devem visitar todas as cidades.
+        distancias (ndarray, opcional): Matriz de distâncias já calculada para a instância.
 
     Returns:
         list: Lista de rotas para os viajantes, cada rota representada como uma lista de índices de cidades.
@@ -62,8 +58,9 @@ def n_tsp_test(coords, num_viajantes):
     """
 
     n = len(coords)
-    # Calcula as distâncias entre todas as coordenadas
-    distancias = [[distance_between_two_points_1(coords[i], coords[j]) for j in range(n)] for i in range(n)]
+    # Calcula as distâncias entre todas as coordenadas (uma única vez por instância)
+    if distancias is None:
+        distancias = get_distances(coords)
 
     memo = {}  # Dicionário para memoização dos resultados
 
@@ -172,12 +169,7 @@ def generate_random_coordinates(min, max, n_cities):
     if n_cities > (max - min) ** 2:
         raise ValueError("The number of cities is too large for the given interval")
 
-    coordinates = []
-    for i in range(n_cities):  # Gera n_cities - 1 coordenadas aleatórias
-        x = random.randint(min, max)
-        y = random.randint(min, max)
-        coordinates.append((x, y))
-    return coordinates
+    return [tuple(point) for point in random_coordinates(n_cities, min, max).tolist()]
 
 
 def calculate_total_distance(coords):
@@ -196,10 +188,9 @@ def calculate_total_distance(coords):
     >>> calculate_total_distance([(0, 0), (1, 1), (2, 2), (0, 0)])
     5.656854249492381
     """
-    total_distance = 0
-    for i in range(len(coords) - 1):
-        total_distance += distance_between_two_points_1(coords[i], coords[i + 1])
-    return total_distance
+    if len(coords) < 2:
+        return 0.0
+    return tour_lengths(np.arange(len(coords)), coords=coords, closed=False)
 
 
 def get_coords_from_tour(tour, coords):
@@ -217,7 +208,10 @@ def get_coords_from_tour(tour, coords):
 
 
 # Função para plotar as rotas dos caixeiros viajantes em um gráfico 2D
-def plot_tsp(coords, routes):
+def plot_tsp(coords, routes, file_path=None):
+    if file_path is not None:
+        # Sem janela: renderiza com o Agg e grava em PNG/SVG (ver route_plot.FigureExporter para lotes de figuras)
+        return save_routes(file_path, coords, routes, title='Rotas dos Caixeiros Viajantes')
     plt.figure(figsize=(8, 6))
     for i, route in enumerate(routes):
         route_coords = [coords[idx] for idx in route]
@@ -276,7 +270,7 @@ def run_tests():
     for i, route in enumerate(tour):
         tour_coordinates = get_coords_from_tour(tour[i], coordinates)
         print(f"Rota para viajante {i + 1}: {route}")
-        distance = calculate_total_distance([coordinates[i] for i in route])
+        distance = tour_lengths(route, coords=coordinates, closed=False)
         print(f"Coordenadas da rota: {tour_coordinates}")
         rounded_distance = round(distance, 3)  # Arredonda para 3 casas decimais
         print(f"Distância total: {rounded_distance}")
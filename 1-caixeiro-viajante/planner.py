@@ -0,0 +1,285 @@
+from collections import namedtuple
+import json
+import math
+import os
+import platform
+import time
+
+import numpy as np
+
+from anytime import solve_tsp, SEARCH_MAX_CITIES
+from benchmark import load_script, closed
+from branch_and_bound import branch_and_bound, ROOT_ITERATIONS
+from brute_force import brute_force_tsp, MAX_CITIES as BRUTE_FORCE_MAX_CITIES
+from held_karp import held_karp, held_karp_memory, MAX_CITIES as HELD_KARP_MAX_CITIES
+from local_search import improve_tour, distance_function, NEIGHBORS
+from memetic import solve_mtsp_memetic
+from mtsp import solve_mtsp_split, route_length, OBJECTIVES
+from spatial_index import grid_nearest_neighbor_tour
+from tsp_distances import get_distances
+
+MODULE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+CALIBRATION_PATH = os.path.join(MODULE_DIRECTORY, '__planner_cache__', 'calibration.json')
+CALIBRATION_SIZES = {'brute_force': 9, 'held_karp': 15, 'branch_and_bound': 40, 'heuristic': 2000}
+CALIBRATION_REPEATS = 3   # Repetições de cada medição (vale o menor tempo)
+DEFAULT_TIME_LIMIT = 60.0  # Tempo usado no planejamento quando nenhum limite é informado
+SAFETY_FACTOR = 2.0       # Um método exato só é escolhido se o tempo previsto vezes este fator couber no limite
+BOUND_FRACTION = 0.1      # Fração máxima do tempo que o limite inferior da raiz do branch-and-bound pode consumir
+MEMORY_FRACTION = 0.5     # Fração da memória disponível que as tabelas do Held-Karp podem ocupar
+MEMETIC_MAX_CITIES = 5000  # Acima deste número de cidades o mTSP usa apenas a divisão do tour gigante
+MEMETIC_MIN_RATIO = 4.0   # O memético só é usado se o limite for este múltiplo do tempo previsto da divisão
+
+Plan = namedtuple('Plan', ['method', 'predicted_time', 'predicted_memory', 'estimates'])
+Solution = namedtuple('Solution', ['routes', 'length', 'method', 'status', 'predicted_time', 'elapsed'])
+
+_calibrations = {}        # Caminho do arquivo de calibração -> custos já carregados neste processo
+
+
+def complexity_script():
+    """Funções de complexidade de caixeiro-viajante-complexidade-temporal-espacial.py (número de operações)."""
+    return load_script(os.path.join(MODULE_DIRECTORY, 'caixeiro-viajante-complexidade-temporal-espacial.py'))
+
+
+def operations(method, n):
+    """
+    Número de operações elementares do método para n cidades, no modelo usado pela calibração: n! para a força bruta,
+    2^n * n² para o Held-Karp, uma 1-árvore O(n²) por iteração do subgradiente na raiz do branch-and-bound e n para a
+    heurística (vizinho mais próximo em grade seguido da busca local, cujo custo por cidade é quase constante).
+    """
+    if method == 'brute_force':
+        return complexity_script().brute_force_tsp_complexity(n)[1]
+    if method == 'held_karp':
+        return complexity_script().held_karp_tsp_complexity(n)[1]
+    if method == 'branch_and_bound':
+        return ROOT_ITERATIONS * n * n
+    return n
+
+
+def machine_fingerprint():
+    """Identificação da máquina e das versões usadas na calibração; uma calibração de outra máquina é refeita."""
+    return {'machine': platform.machine(), 'processor': platform.processor(), 'node': platform.node(),
+            'cpus': os.cpu_count(), 'python': platform.python_version(), 'numpy': np.__version__}
+
+
+def measure(function, repeats=CALIBRATION_REPEATS):
+    """Menor tempo (s) de repeats execuções de function()."""
+    best = math.inf
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def measure_costs(seed=0):
+    """
+    Mede nesta máquina o custo (s) por operação de cada método, resolvendo instâncias aleatórias pequenas dos tamanhos
+    de CALIBRATION_SIZES. A poda da força bruta e a vetorização do Held-Karp ficam embutidas na constante medida.
+    """
+    generator = np.random.default_rng(seed)
+    sizes = CALIBRATION_SIZES
+    instances = {method: generator.uniform(0, 1000, size=(n, 2)) for method, n in sizes.items()}
+    distances = {method: get_distances(instances[method]) for method in ('brute_force', 'held_karp',
+                                                                         'branch_and_bound')}
+    runs = {
+        'brute_force': lambda: brute_force_tsp(distances['brute_force']),
+        'held_karp': lambda: held_karp(distances['held_karp']),
+        'branch_and_bound': lambda: branch_and_bound(distances['branch_and_bound'], node_limit=1),
+        'heuristic': lambda: improve_tour(grid_nearest_neighbor_tour(instances['heuristic']),
+                                          coords=instances['heuristic']),
+    }
+    return {method: measure(run) / operations(method, sizes[method]) for method, run in runs.items()}
+
+
+def calibrate(path=CALIBRATION_PATH, refresh=False):
+    """
+    Custos por operação de cada método nesta máquina. A medição (cerca de um segundo) é feita uma vez e gravada em
+    path junto com a identificação da máquina; as chamadas seguintes leem o arquivo, e a medição é refeita se o
+    arquivo for de outra máquina ou se refresh=True.
+
+    Parâmetros:
+    path (str, opcional): Arquivo JSON da calibração; None mede sem gravar.
+    refresh (bool): Se a medição deve ser refeita mesmo que exista uma calibração válida.
+
+    Retorna:
+    dict: Custo em segundos por operação de 'brute_force', 'held_karp', 'branch_and_bound' e 'heuristic'.
+    """
+    if not refresh and path in _calibrations:
+        return _calibrations[path]
+    fingerprint = machine_fingerprint()
+    costs = None
+    if not refresh and path is not None and os.path.exists(path):
+        try:
+            with open(path) as file:
+                data = json.load(file)
+            if data.get('fingerprint') == fingerprint and set(data.get('costs', {})) == set(CALIBRATION_SIZES):
+                costs = data['costs']
+        except (OSError, ValueError):
+            costs = None
+    if costs is None:
+        costs = measure_costs()
+        if path is not None:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'w') as file:
+                    json.dump({'fingerprint': fingerprint, 'costs': costs}, file, indent=2)
+            except OSError:
+                pass  # Diretório somente leitura: a calibração vale apenas para este processo
+    _calibrations[path] = costs
+    return costs
+
+
+def available_memory():
+    """Memória física disponível em bytes, ou None se o sistema não informar."""
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def estimate(method, n, costs):
+    """
+    Tempo (s) e memória (bytes) previstos para resolver uma instância de n cidades com o método.
+
+    Retorna:
+    tuple: (tempo previsto, memória prevista); o tempo do branch-and-bound é o do limite inferior da raiz, já que a
+    busca em si é interrompível e usa todo o tempo disponível.
+    """
+    predicted_time = costs[method] * operations(method, n)
+    if method == 'held_karp':
+        memory = held_karp_memory(n)
+    elif method == 'brute_force':
+        memory = 8 * n * n  # Matriz de distâncias
+    elif method == 'branch_and_bound':
+        memory = 3 * 8 * n * n  # Matriz de distâncias e custos penalizados de um nó
+    else:
+        memory = 8 * n * (2 + NEIGHBORS)  # Coordenadas e listas de candidatos
+    return predicted_time, memory
+
+
+def plan(n, num_travelers=1, time_limit=None, max_memory=None, costs=None):
+    """
+    Escolhe o resolvedor pelo tempo e memória previstos, sem executar nada.
+
+    Para uma única rota, o método exato com menor tempo previsto (força bruta ou Held-Karp) é escolhido se o tempo
+    previsto vezes SAFETY_FACTOR couber no limite e as tabelas couberem na memória; senão, o branch-and-bound, se o
+    limite inferior da raiz couber em BOUND_FRACTION do limite; senão, o Lin-Kernighan. Com vários viajantes não há
+    método exato: o memético é usado quando o limite comporta várias divisões do tour gigante, senão a própria divisão.
+
+    Parâmetros:
+    n (int): Número de cidades.
+    num_travelers (int): Número de viajantes.
+    time_limit (float, opcional): Tempo máximo em segundos; por padrão DEFAULT_TIME_LIMIT.
+    max_memory (int, opcional): Memória máxima em bytes; por padrão MEMORY_FRACTION da memória disponível.
+    costs (dict, opcional): Custos por operação; por padrão os de calibrate().
+
+    Retorna:
+    Plan: Método escolhido, tempo e memória previstos e as estimativas (tempo, memória) de cada método considerado.
+    """
+    if n < 1 or num_travelers < 1:
+        raise ValueError("O número de cidades e o de viajantes devem ser positivos.")
+    time_limit = DEFAULT_TIME_LIMIT if time_limit is None else time_limit
+    costs = calibrate() if costs is None else costs
+    if max_memory is None:
+        memory = available_memory()
+        max_memory = math.inf if memory is None else MEMORY_FRACTION * memory
+
+    estimates = {'heuristic': estimate('heuristic', n, costs)}
+    if num_travelers > 1:
+        split_time, split_memory = estimates['heuristic']
+        if n <= MEMETIC_MAX_CITIES and MEMETIC_MIN_RATIO * split_time <= time_limit:
+            return Plan('mtsp_memetic', time_limit, split_memory, estimates)
+        return Plan('mtsp_split', split_time, split_memory, estimates)
+
+    exact = []
+    for method, max_cities in [('brute_force', BRUTE_FORCE_MAX_CITIES), ('held_karp', HELD_KARP_MAX_CITIES)]:
+        if n <= max_cities:
+            estimates[method] = estimate(method, n, costs)
+            predicted_time, predicted_memory = estimates[method]
+            if SAFETY_FACTOR * predicted_time <= time_limit and predicted_memory <= max_memory:
+                exact.append((predicted_time, method))
+    if exact:
+        method = min(exact)[1]
+        return Plan(method, *estimates[method], estimates)
+    if n <= SEARCH_MAX_CITIES:
+        estimates['branch_and_bound'] = estimate('branch_and_bound', n, costs)
+        bound_time, bound_memory = estimates['branch_and_bound']
+        if bound_time <= BOUND_FRACTION * time_limit and bound_memory <= max_memory:
+            return Plan('branch_and_bound', time_limit, bound_memory, estimates)
+    return Plan('lin_kernighan', max(estimates['heuristic'][0], time_limit), estimates['heuristic'][1], estimates)
+
+
+def solve(coords, num_travelers=1, time_limit=None, objective='total', max_memory=None, seed=0):
+    """
+    Resolve um TSP (num_travelers=1) ou mTSP com o resolvedor escolhido por plan(): nunca inicia uma enumeração ou
+    programação dinâmica cujo tempo ou memória previstos não caibam nos limites. O método exato escolhido também roda
+    sob o limite de tempo, então uma previsão errada é interrompida e devolve o melhor tour encontrado.
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades; a cidade 0 é a origem.
+    num_travelers (int): Número de viajantes.
+    time_limit (float, opcional): Tempo máximo em segundos; por padrão DEFAULT_TIME_LIMIT.
+    objective (str): 'total' (soma das rotas) ou 'makespan' (maior rota), usado quando num_travelers > 1.
+    max_memory (int, opcional): Memória máxima em bytes.
+    seed (int): Semente do memético.
+
+    Retorna:
+    Solution: Rotas fechadas [0, ..., 0], distância total, método, status ('optimal' quando provado), tempo previsto e
+    tempo gasto.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"O objetivo deve ser um de {OBJECTIVES}.")
+    start_time = time.time()
+    coords = np.asarray(coords, dtype=np.float64)
+    n = len(coords)
+    time_limit = DEFAULT_TIME_LIMIT if time_limit is None else time_limit
+    chosen = plan(n, num_travelers, time_limit, max_memory)
+
+    if chosen.method == 'mtsp_memetic':
+        routes = solve_mtsp_memetic(coords, num_travelers, objective, time_limit=time_limit, seed=seed)
+        status = 'completed'
+    elif chosen.method == 'mtsp_split':
+        routes = solve_mtsp_split(coords, num_travelers, objective)
+        status = 'completed'
+    else:
+        distances = get_distances(coords) if chosen.method != 'lin_kernighan' else None
+        result = solve_tsp(distances, coords, chosen.method, time_limit)
+        routes = closed(result.tour)
+        status = result.status
+
+    dist = distance_function(coords=coords)
+    length = sum(route_length(route, dist) for route in routes)
+    return Solution(routes, length, chosen.method, status, chosen.predicted_time, time.time() - start_time)
+
+
+def test_planner():
+    start_time = time.time()
+    costs = calibrate()
+    print(f"Calibração ({time.time() - start_time:.3f} segundos):")
+    for method, cost in costs.items():
+        print(f"  {method:17} {cost:.3e} s por operação")
+
+    print("\nCidades | Viajantes | Limite (s) | Método           | Tempo previsto (s)")
+    for n, m, time_limit in [(8, 1, 10), (14, 1, 10), (22, 1, 10), (22, 1, 1000), (40, 1, 10), (90, 1, 60),
+                             (300, 1, 10), (1000000, 1, 60), (1000, 5, 60), (100000, 5, 60)]:
+        chosen = plan(n, m, time_limit, costs=costs)
+        print(f"{n:7} | {m:9} | {time_limit:10} | {chosen.method:16} | {chosen.predicted_time:.3e}")
+    chosen = plan(90, 1, 1e12, costs=costs)
+    assert chosen.method == 'branch_and_bound'  # Nunca 2^90 estados de Held-Karp, qualquer que seja o limite
+
+    random_generator = np.random.default_rng(24)
+    print()
+    for n_cities, num_travelers, time_limit in [(12, 1, 5.0), (60, 1, 3.0), (3000, 1, 3.0), (300, 4, 3.0)]:
+        coordinates = random_generator.uniform(0, 1000, size=(n_cities, 2))
+        solution = solve(coordinates, num_travelers, time_limit)
+        print(f"n={n_cities}, m={num_travelers}: {solution.method} ({solution.status}), distância "
+              f"{solution.length:.3f} em {solution.elapsed:.3f} segundos")
+        assert sorted(city for route in solution.routes for city in route[1:-1]) == list(range(1, n_cities))
+
+
+def main():
+    test_planner()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import tempfile
+import time
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+
+from tsp_distances import as_coordinate_array
+
+FIGURE_SIZE = (8, 6)      # Tamanho das figuras em polegadas
+DPI = 120                 # Resolução das figuras PNG
+MAX_POINTS = 100000       # Número máximo de vértices desenhados por figura; acima, as rotas são dizimadas
+MAX_MARKERS = 5000        # Acima deste número de cidades os marcadores das cidades não são desenhados
+MAX_LEGEND = 10           # Número máximo de rotas com entrada na legenda
+MAX_LABELS = 30           # Número máximo de cidades com o índice anotado (annotate=True)
+RASTER_POINTS = 20000     # Acima deste número de vértices as linhas são rasterizadas nos arquivos SVG
+EXPORT_WORKERS = 4        # Número padrão de threads que renderizam e gravam as figuras
+FORMATS = ('png', 'svg')
+
+
+def decimate(points, max_points):
+    """
+    Reduz uma polilinha a no máximo max_points vértices tomando um vértice a cada passo fixo, sempre mantendo o
+    primeiro e o último. Em tours muito grandes os vértices descartados ficam abaixo da resolução da figura.
+    """
+    if len(points) <= max_points:
+        return points
+    keep = np.linspace(0, len(points) - 1, max(max_points, 2)).round().astype(np.int64)
+    return points[keep]
+
+
+def route_figure(coords, routes, title='Rotas dos Caixeiros Viajantes', max_points=MAX_POINTS, annotate=False):
+    """
+    Monta a figura das rotas sem usar o pyplot (sem janela nem estado global, então pode ser chamada de qualquer
+    thread). Todas as rotas são desenhadas por uma única LineCollection e, quando o total de vértices passa de
+    max_points, cada rota é dizimada na proporção do seu tamanho.
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades; a cidade 0 é a origem.
+    routes (lista): Rotas (listas de índices); rotas abertas são fechadas no desenho.
+    title (str): Título da figura.
+    max_points (int): Número máximo de vértices desenhados.
+    annotate (bool): Se o índice de cada cidade deve ser escrito ao lado dela (apenas até MAX_LABELS cidades).
+
+    Retorna:
+    Figure: Figura do Matplotlib com um canvas Agg.
+    """
+    points = as_coordinate_array(coords)
+    routes = [np.asarray(route, dtype=np.int64) for route in routes if len(route)]
+    routes = [route if route[0] == route[-1] else np.append(route, route[0]) for route in routes]
+    total = sum(len(route) for route in routes)
+    share = max_points / total if total > max_points else 1.0
+    lines = [decimate(points[route], max(int(len(route) * share), 2)) for route in routes]
+    colors = [f'C{i % 10}' for i in range(len(lines))]
+
+    figure = Figure(figsize=FIGURE_SIZE)
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    drawn = sum(len(line) for line in lines)
+    collection = LineCollection(lines, colors=colors, linewidths=1.0 if drawn < RASTER_POINTS else 0.5,
+                                rasterized=drawn >= RASTER_POINTS)
+    axes.add_collection(collection)
+    if len(points) <= MAX_MARKERS:
+        axes.scatter(points[:, 0], points[:, 1], s=12, color='red', zorder=3, label='Pontos de parada')
+    if len(points):
+        axes.scatter(points[:1, 0], points[:1, 1], s=60, marker='s', color='black', zorder=4, label='Origem')
+    if annotate and len(points) <= MAX_LABELS:
+        for city, (x, y) in enumerate(points.tolist()):
+            axes.annotate(str(city), (x, y))
+    if len(lines) <= MAX_LEGEND:
+        handles = [Line2D([], [], color=color, label=f'Rota {i + 1}') for i, color in enumerate(colors)]
+        axes.legend(handles=handles + axes.get_legend_handles_labels()[0], loc='best', fontsize='small')
+    axes.autoscale_view()
+    axes.set_xlabel('Coordenada X')
+    axes.set_ylabel('Coordenada Y')
+    axes.set_title(title if drawn == total else f'{title} ({drawn} de {total} vértices)')
+    axes.grid(True)
+    return figure
+
+
+def save_routes(file_path, coords, routes, title='Rotas dos Caixeiros Viajantes', max_points=MAX_POINTS,
+                annotate=False, dpi=DPI):
+    """
+    Renderiza as rotas com o Agg e grava a figura em PNG ou SVG, de acordo com a extensão de file_path.
+
+    Retorna:
+    str: Caminho do arquivo gravado.
+    """
+    extension = os.path.splitext(file_path)[1].lstrip('.').lower()
+    if extension not in FORMATS:
+        raise ValueError(f"O formato da figura deve ser um de {FORMATS}.")
+    figure = route_figure(coords, routes, title, max_points, annotate)
+    figure.savefig(file_path, dpi=dpi, format=extension)
+    return file_path
+
+
+class FigureExporter:
+    """
+    Grava figuras de rotas em segundo plano: cada submit() é renderizado e gravado por um pool de threads, então o
+    laço que gera as soluções (por exemplo o benchmark) não espera pelo Matplotlib nem pelo disco.
+
+    Parâmetros:
+    directory (str): Diretório das figuras (criado se não existir).
+    file_format (str): 'png' ou 'svg'.
+    workers (int): Número de threads.
+    """
+
+    def __init__(self, directory, file_format='png', workers=EXPORT_WORKERS):
+        if file_format not in FORMATS:
+            raise ValueError(f"O formato da figura deve ser um de {FORMATS}.")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.file_format = file_format
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.futures = []
+
+    def submit(self, name, coords, routes, **options):
+        """Agenda a figura '<name>.<formato>' e devolve o futuro com o caminho do arquivo."""
+        file_path = os.path.join(self.directory, f'{name}.{self.file_format}')
+        # Cópias: o chamador pode alterar as rotas e as coordenadas enquanto a figura é renderizada
+        future = self.executor.submit(save_routes, file_path, np.array(coords), [list(route) for route in routes],
+                                      **options)
+        self.futures.append(future)
+        return future
+
+    def wait(self):
+        """Espera todas as figuras agendadas e devolve os caminhos gravados; repassa a primeira exceção."""
+        paths = [future.result() for future in self.futures]
+        self.futures = []
+        return paths
+
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def test_route_plot():
+    directory = os.path.join(tempfile.gettempdir(), 'route_plots')
+    random_generator = np.random.default_rng(25)
+    start_time = time.time()
+    with FigureExporter(directory) as exporter:
+        for i in range(20):
+            coordinates = random_generator.uniform(0, 1000, size=(200, 2))
+            routes = np.array_split(np.arange(1, 200), 4)
+            exporter.submit(f'rotas-{i}', coordinates, [[0] + route.tolist() + [0] for route in routes])
+        paths = exporter.wait()
+    print(f"{len(paths)} figuras PNG gravadas em {directory} em {time.time() - start_time:.3f} segundos")
+    assert all(os.path.getsize(path) > 0 for path in paths)
+
+    n_cities = 1000000
+    coordinates = random_generator.uniform(0, 1000, size=(n_cities, 2))
+    # Tour em faixas horizontais, percorridas em zigue-zague: arestas curtas, como as de um tour de boa qualidade
+    strip = coordinates[:, 1].astype(np.int64)
+    tour = np.lexsort((np.where(strip % 2 == 0, coordinates[:, 0], -coordinates[:, 0]), strip))
+    for file_format in FORMATS:
+        start_time = time.time()
+        path = save_routes(os.path.join(directory, f'grande.{file_format}'), coordinates, [tour],
+                           title='Tour de um milhão de cidades')
+        print(f"Tour de {n_cities} cidades ({file_format.upper()}): {os.path.getsize(path) / 2 ** 20:.2f} MiB em "
+              f"{time.time() - start_time:.3f} segundos")
+
+
+def main():
+    test_route_plot()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,489 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+import numpy as np
+
+from anytime import SearchControl
+from benchmark import SOLVERS, check_routes
+from lin_kernighan import lin_kernighan
+from local_search import distance_function
+from mtsp import route_length
+from spatial_index import grid_nearest_neighbor_tour
+
+HOST = '127.0.0.1'        # Endereço padrão do serviço (somente a máquina local)
+PORT = 8765               # Porta padrão do serviço
+CACHE_SIZE = 256          # Número de resultados mantidos no cache (os menos usados recentemente são descartados)
+MAX_BODY = 64 * 2 ** 20   # Tamanho máximo do corpo de uma requisição, em bytes
+PROGRESS_INTERVAL = 1.0   # Intervalo (s) entre os eventos 'progress' enviados enquanto uma tarefa roda
+INCUMBENT_INTERVAL = 0.5  # Intervalo mínimo (s) entre dois eventos 'incumbent' de uma mesma tarefa
+LIN_KERNIGHAN_TIME = 5.0  # Tempo máximo (s) do resolvedor lin_kernighan quando a requisição não informa time_limit
+DEFAULT_SOLVER = 'mtsp_split'
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error'}
+
+_worker_state = {}        # Estado de cada processo trabalhador: fila de eventos compartilhada com o serviço
+
+
+class ServiceError(Exception):
+    """Erro de uma requisição, com o código HTTP devolvido ao cliente."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ResultCache:
+    """Cache LRU de resultados, indexado pelo hash da instância e dos parâmetros do resolvedor."""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        return {'size': len(self.entries), 'capacity': self.size, 'hits': self.hits, 'misses': self.misses}
+
+
+def request_key(coords, num_travelers, solver_name, params):
+    """Hash SHA-256 das coordenadas (float64) e dos parâmetros do resolvedor, usado como chave do cache."""
+    digest = hashlib.sha256(np.ascontiguousarray(coords, dtype=np.float64).tobytes())
+    digest.update(json.dumps([len(coords), num_travelers, solver_name, params], sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def parse_request(payload):
+    """
+    Valida o corpo de uma requisição de /solve.
+
+    Parâmetros:
+    payload (dict): {'coords': [[x, y], ...], 'travelers': m, 'solver': nome, 'params': {...}}; apenas 'coords' é
+        obrigatório.
+
+    Retorna:
+    tuple: (coordenadas (n, 2), número de viajantes, nome do resolvedor, parâmetros).
+    """
+    if not isinstance(payload, dict) or 'coords' not in payload:
+        raise ServiceError(400, "O corpo deve ser um objeto JSON com o campo 'coords'.")
+    try:
+        coords = np.asarray(payload['coords'], dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ServiceError(400, "'coords' deve ser uma lista de pares [x, y].")
+    if coords.ndim != 2 or coords.shape[1] != 2 or len(coords) < 2 or not np.isfinite(coords).all():
+        raise ServiceError(400, "'coords' deve ser uma lista de pelo menos dois pares [x, y] finitos.")
+
+    solver_name = payload.get('solver', DEFAULT_SOLVER)
+    if solver_name not in SOLVERS:
+        raise ServiceError(400, f"Resolvedor desconhecido: {solver_name}. Disponíveis: {list(SOLVERS)}.")
+    solver = SOLVERS[solver_name]
+    if solver.max_cities is not None and len(coords) > solver.max_cities:
+        raise ServiceError(400, f"O resolvedor {solver_name} suporta no máximo {solver.max_cities} cidades.")
+
+    num_travelers = payload.get('travelers', 1)
+    if not isinstance(num_travelers, int) or num_travelers < 1:
+        raise ServiceError(400, "'travelers' deve ser um inteiro positivo.")
+    if solver.problem == 'tsp':
+        num_travelers = 1
+    params = payload.get('params', {})
+    if not isinstance(params, dict):
+        raise ServiceError(400, "'params' deve ser um objeto JSON.")
+    time_limit = params.get('time_limit', LIN_KERNIGHAN_TIME)
+    if (isinstance(time_limit, bool) or not isinstance(time_limit, (int, float)) or not np.isfinite(time_limit)
+            or time_limit <= 0):
+        raise ServiceError(400, "'params.time_limit' deve ser um número positivo de segundos.")
+    return coords, num_travelers, solver_name, params
+
+
+def _worker_init(events):
+    _worker_state['events'] = events
+
+
+def _solve_job(job_id, coords, num_travelers, solver_name, params):
+    """
+    Executa uma tarefa em um processo trabalhador. Os eventos de início e os tours intermediários são enviados pela
+    fila compartilhada; o resultado final volta pelo futuro do ProcessPoolExecutor.
+    """
+    events = _worker_state['events']
+    events.put((job_id, {'event': 'started', 'pid': os.getpid()}))
+    last_report = [-INCUMBENT_INTERVAL]
+
+    def report(length, tour):
+        now = time.perf_counter()
+        if now - last_report[0] >= INCUMBENT_INTERVAL:
+            last_report[0] = now
+            routes = [tour + [tour[0]]]
+            events.put((job_id, {'event': 'incumbent', 'length': float(length), 'routes': routes}))
+
+    start_time = time.perf_counter()
+    if solver_name == 'lin_kernighan':
+        # Único resolvedor que melhora o tour continuamente: os tours intermediários são transmitidos ao cliente
+        tour = lin_kernighan(grid_nearest_neighbor_tour(coords), coords=coords,
+                             time_limit=float(params.get('time_limit', LIN_KERNIGHAN_TIME)),
+                             control=SearchControl(callback=report))
+        index = tour.index(0)
+        routes = [tour[index:] + tour[:index] + [0]]
+    else:
+        routes = SOLVERS[solver_name].function(coords, num_travelers)
+    interval = time.perf_counter() - start_time
+
+    routes = [[int(city) for city in route] for route in routes]
+    check_routes(routes, len(coords), SOLVERS[solver_name].problem)
+    dist = distance_function(coords=coords)
+    lengths = [route_length(route, dist) for route in routes]
+    return {'routes': routes, 'lengths': lengths, 'length': sum(lengths), 'makespan': max(lengths), 'time': interval}
+
+
+class SolveService:
+    """
+    Serviço local de resolução de TSP/mTSP: as tarefas rodam em um pool de processos, os eventos de cada tarefa são
+    repassados aos clientes inscritos e os resultados ficam em um cache LRU. Requisições iguais que chegam enquanto
+    uma tarefa está rodando são associadas a ela em vez de criar uma nova.
+    """
+
+    def __init__(self, workers=None, cache_size=CACHE_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = ResultCache(cache_size)
+        self.pending = {}         # Chave -> (futuro do resultado, filas dos clientes inscritos)
+        self.listeners = {}       # Identificador da tarefa -> filas dos clientes inscritos
+        self.next_job = 0
+        self.executor = None
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.manager = multiprocessing.Manager()
+        self.events = self.manager.Queue()
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_worker_init,
+                                            initargs=(self.events,))
+        # Os processos são criados agora, antes de qualquer conexão: processos criados por fork durante uma requisição
+        # herdariam o socket do cliente, e a resposta só terminaria quando eles saíssem
+        self.executor.submit(os.getpid).result()
+        self.reader = threading.Thread(target=self._forward_events, daemon=True)
+        self.reader.start()
+
+    def close(self):
+        self.events.put(None)
+        self.reader.join()
+        self.executor.shutdown(cancel_futures=True)
+        self.manager.shutdown()
+
+    def _forward_events(self):
+        """Lê a fila compartilhada (em uma thread, pois a leitura bloqueia) e entrega os eventos no laço asyncio."""
+        while True:
+            item = self.events.get()
+            if item is None:
+                return
+            self.loop.call_soon_threadsafe(self._dispatch, *item)
+
+    def _dispatch(self, job_id, event):
+        for queue in self.listeners.get(job_id, []):
+            queue.put_nowait(event)
+
+    async def solve(self, coords, num_travelers, solver_name, params, listener=None):
+        """
+        Resolve uma instância, usando o cache ou uma tarefa em andamento quando possível.
+
+        Parâmetros:
+        coords (ndarray): Coordenadas (n, 2).
+        num_travelers (int): Número de viajantes.
+        solver_name (str): Nome do resolvedor em SOLVERS.
+        params (dict): Parâmetros do resolvedor (fazem parte da chave do cache).
+        listener (asyncio.Queue, opcional): Fila que recebe os eventos da tarefa.
+
+        Retorna:
+        dict: Resultado com as rotas, as distâncias, o tempo de resolução, a chave e se veio do cache.
+        """
+        key = request_key(coords, num_travelers, solver_name, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return dict(cached, cached=True)
+
+        if key in self.pending:
+            future, queues = self.pending[key]
+        else:
+            job_id = self.next_job
+            self.next_job += 1
+            queues = self.listeners[job_id] = []
+            future = self.loop.run_in_executor(self.executor, _solve_job, job_id, coords, num_travelers,
+                                               solver_name, params)
+            self.pending[key] = (future, queues)
+            future.add_done_callback(lambda _: self._finish(job_id, key))
+        if listener is not None:
+            queues.append(listener)
+            listener.put_nowait({'event': 'queued', 'key': key})
+
+        result = await asyncio.shield(future)
+        result = dict(result, key=key, solver=solver_name, travelers=num_travelers)
+        self.cache.put(key, result)
+        return dict(result, cached=False)
+
+    def _finish(self, job_id, key):
+        self.pending.pop(key, None)
+        self.listeners.pop(job_id, None)
+
+    async def handle(self, reader, writer):
+        """Atende uma conexão HTTP/1.1 (uma requisição por conexão)."""
+        streaming = False         # Depois do cabeçalho 200 do NDJSON não é possível enviar outra resposta
+        try:
+            method, path, body = await read_request(reader)
+            if path == '/health' and method == 'GET':
+                await write_json(writer, 200, {'status': 'ok', 'workers': self.workers, 'cache': self.cache.stats(),
+                                               'pending': len(self.pending)})
+            elif path == '/solvers' and method == 'GET':
+                await write_json(writer, 200, {name: {'problem': solver.problem, 'max_cities': solver.max_cities,
+                                                      'exact': solver.exact} for name, solver in SOLVERS.items()})
+            elif path == '/solve' and method == 'POST':
+                try:
+                    payload = json.loads(body or b'null')
+                except ValueError:
+                    raise ServiceError(400, "O corpo da requisição não é um JSON válido.")
+                request = parse_request(payload)
+                if payload.get('stream'):
+                    streaming = True
+                    await self.stream_solution(writer, request)
+                else:
+                    await write_json(writer, 200, await self.solve(*request))
+            elif path in ('/health', '/solvers', '/solve'):
+                raise ServiceError(405, f"Método {method} não permitido em {path}.")
+            else:
+                raise ServiceError(404, f"Caminho desconhecido: {path}.")
+        except ConnectionError:
+            pass  # O cliente desconectou: não há a quem responder
+        except ServiceError as error:
+            await write_error(writer, error.status, str(error))
+        except Exception as error:  # Falha do resolvedor: o serviço continua atendendo as demais conexões
+            if not streaming:
+                await write_error(writer, 500, f'{type(error).__name__}: {error}')
+        finally:
+            writer.close()
+
+    async def stream_solution(self, writer, request):
+        """
+        Responde com uma linha JSON por evento (NDJSON): 'queued', 'started', 'progress' (tempo decorrido),
+        'incumbent' (melhor tour até o momento, nos resolvedores que o informam) e, por fim, 'solution' ou 'error'.
+        """
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nConnection: close\r\n\r\n')
+        listener = asyncio.Queue()
+        task = asyncio.ensure_future(self.solve(*request, listener=listener))
+        start_time = time.perf_counter()
+        try:
+            while not task.done():
+                getter = asyncio.ensure_future(listener.get())
+                await asyncio.wait([task, getter], timeout=PROGRESS_INTERVAL, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    event = getter.result()
+                else:
+                    getter.cancel()
+                    event = None if task.done() else {'event': 'progress', 'elapsed': time.perf_counter() - start_time}
+                if event is not None:
+                    writer.write(json.dumps(event).encode() + b'\n')
+                    await writer.drain()
+        except ConnectionError:
+            # Cliente desconectado: a tarefa segue até o fim (o resultado ainda vai para o cache), mas sem ouvinte
+            for _, queues in self.pending.values():
+                if listener in queues:
+                    queues.remove(listener)
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            return
+        try:
+            event = dict(task.result(), event='solution')
+        except Exception as error:
+            event = {'event': 'error', 'error': f'{type(error).__name__}: {error}'}
+        try:
+            writer.write(json.dumps(event).encode() + b'\n')
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+async def read_request(reader):
+    """
+    Lê uma requisição HTTP/1.1 simples (sem chunked encoding).
+
+    Retorna:
+    tuple: (método, caminho, corpo em bytes).
+    """
+    request_line = (await reader.readline()).decode('latin-1').split()
+    if len(request_line) != 3:
+        raise ServiceError(400, "Linha de requisição inválida.")
+    method, path, _ = request_line
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise ServiceError(400, "Cabeçalho Content-Length inválido.")
+    if length < 0:
+        raise ServiceError(400, "Cabeçalho Content-Length inválido.")
+    if length > MAX_BODY:
+        raise ServiceError(413, f"O corpo da requisição excede {MAX_BODY} bytes.")
+    body = await reader.readexactly(length) if length else b''
+    return method, path.split('?', 1)[0], body
+
+
+async def write_error(writer, status, message):
+    """Envia uma resposta de erro, ignorando a falha se o cliente já desconectou."""
+    try:
+        await write_json(writer, status, {'error': message})
+    except ConnectionError:
+        pass
+
+
+async def write_json(writer, status, payload):
+    body = json.dumps(payload).encode()
+    writer.write(f'HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n'
+                 f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body)
+    await writer.drain()
+
+
+async def request(method, path, payload=None, host=HOST, port=PORT, unix_path=None):
+    """
+    Cliente assíncrono mínimo do serviço.
+
+    Parâmetros:
+    method (str): Método HTTP.
+    path (str): Caminho ('/solve', '/solvers' ou '/health').
+    payload (dict, opcional): Corpo JSON.
+    host (str), port (int): Endereço TCP do serviço.
+    unix_path (str, opcional): Socket Unix do serviço, usado no lugar do endereço TCP.
+
+    Retorna:
+    list: Objetos JSON da resposta (um por linha nas respostas em fluxo).
+    """
+    if unix_path is not None:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+                 f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    content = response.split(b'\r\n\r\n', 1)[1]
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+async def serve(host=HOST, port=PORT, unix_path=None, workers=None, cache_size=CACHE_SIZE, ready=None):
+    """
+    Roda o serviço até ser cancelado, em um endereço TCP ou em um socket Unix.
+
+    Parâmetros:
+    ready (asyncio.Future, opcional): Recebe o endereço efetivo quando o servidor começa a aceitar conexões (útil
+        com port=0, que escolhe uma porta livre).
+    """
+    service = SolveService(workers, cache_size)
+    service.start()
+    try:
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(service.handle, unix_path)
+        else:
+            server = await asyncio.start_server(service.handle, host, port)
+        address = server.sockets[0].getsockname()
+        if ready is not None:
+            ready.set_result(address)
+        else:
+            print(f"Serviço de resolução ouvindo em {address}")
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def test_solve_service():
+    async def scenario():
+        ready = asyncio.get_running_loop().create_future()
+        server = asyncio.ensure_future(serve(port=0, workers=2, ready=ready))
+        host, port = await ready
+
+        random_generator = np.random.default_rng(16)
+        coordinates = random_generator.integers(0, 1000, size=(300, 2)).tolist()
+        payload = {'coords': coordinates, 'solver': 'lin_kernighan', 'params': {'time_limit': 3.0}, 'stream': True}
+        for attempt in range(2):
+            start_time = time.time()
+            events = await request('POST', '/solve', payload, host, port)
+            interval = time.time() - start_time
+            solution = events[-1]
+            print(f"Tentativa {attempt + 1}: {[event['event'] for event in events]}")
+            print(f"Distância: {solution['length']:.3f}, em cache: {solution['cached']}, {interval:.3f} segundos")
+
+        # Cliente que desconecta no meio do fluxo: o serviço continua atendendo e a solução vai para o cache
+        payload = dict(payload, params={'time_limit': 2.0})
+        reader, writer = await asyncio.open_connection(host, port)
+        body = json.dumps(payload).encode()
+        writer.write(f'POST /solve HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body)
+        await reader.readline()
+        writer.close()
+        await asyncio.sleep(3.0)
+        solution = (await request('POST', '/solve', dict(payload, stream=False), host, port))[0]
+        print(f"Depois da desconexão: em cache: {solution['cached']}")
+
+        # Erros do cliente respondem 400, inclusive os detectados só na leitura do cabeçalho
+        answer = await request('POST', '/solve', dict(payload, params={'time_limit': 'abc'}), host, port)
+        print(f"time_limit inválido: {answer[0]}")
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(f'POST /solve HTTP/1.1\r\nHost: {host}\r\nContent-Length: abc\r\n\r\n'.encode())
+        print(f"Content-Length inválido: {(await reader.readline()).decode().strip()}")
+        writer.close()
+
+        payload = {'coords': coordinates, 'travelers': 4, 'solver': 'mtsp_split'}
+        solution = (await request('POST', '/solve', payload, host, port))[0]
+        print(f"mTSP com 4 viajantes: maior rota {solution['makespan']:.3f}, total {solution['length']:.3f}")
+        print(f"Estado do serviço: {(await request('GET', '/health', None, host, port))[0]}")
+        server.cancel()
+        await asyncio.gather(server, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def parse_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP/JSON local para resolver instâncias de TSP e mTSP.")
+    parser.add_argument('--host', default=HOST, help="Endereço TCP do serviço.")
+    parser.add_argument('--port', type=int, default=PORT, help="Porta TCP do serviço.")
+    parser.add_argument('--unix', help="Socket Unix usado no lugar do endereço TCP.")
+    parser.add_argument('--workers', type=int, help="Número de processos trabalhadores (padrão: número de núcleos).")
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help="Número de resultados mantidos em cache.")
+    parser.add_argument('--demo', action='store_true', help="Executa uma demonstração com um servidor temporário.")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    options = parse_arguments(arguments)
+    if options.demo:
+        test_solve_service()
+        return
+    try:
+        asyncio.run(serve(options.host, options.port, options.unix, options.workers, options.cache_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
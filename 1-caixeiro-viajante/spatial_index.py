@@ -0,0 +1,353 @@
+import heapq
+import math
+import random
+import time
+
+import numpy as np
+
+from tsp_distances import as_coordinate_array
+
+POINTS_PER_CELL = 2       # Ocupação média das células da grade
+REBUILD_FRACTION = 0.25   # A grade é reconstruída quando restam menos que esta fração dos pontos indexados
+GROWTH_FACTOR = 2         # A grade é reconstruída quando passa a ter este múltiplo dos pontos indexados
+BLOCK_POINTS = 128        # Pontos de cada bloco da partição espacial usada no cálculo dos vizinhos mais próximos
+MARGIN_FACTOR = 1.5       # Margem inicial ao redor de um bloco, em raios esperados do k-ésimo vizinho
+
+
+class GridIndex:
+    """
+    Índice espacial em grade uniforme com remoção, para consultas do ponto não visitado mais próximo.
+
+    Cada célula guarda uma lista de pontos; a remoção troca o ponto com o último da célula (O(1)) e a consulta percorre
+    anéis de células ao redor do ponto de consulta até que nenhum anel mais distante possa conter um ponto mais
+    próximo. Quando muitos pontos já foram removidos a grade fica esparsa e as consultas percorrem muitas células
+    vazias, então o índice é reconstruído com células maiores sobre os pontos restantes.
+    """
+
+    def __init__(self, coords, indices=None, points_per_cell=POINTS_PER_CELL):
+        points = as_coordinate_array(coords)
+        self.xs, self.ys = points[:, 0].tolist(), points[:, 1].tolist()
+        self.points_per_cell = points_per_cell
+        self.slot = [-1] * len(points)
+        self._build(range(len(points)) if indices is None else indices)
+
+    def _build(self, indices):
+        indices = list(indices)
+        self.size = len(indices)
+        self.built_size = max(self.size, 1)
+        xs = [self.xs[i] for i in indices] or [0.0]
+        ys = [self.ys[i] for i in indices] or [0.0]
+        self.min_x, self.min_y = min(xs), min(ys)
+        width = max(max(xs) - self.min_x, max(ys) - self.min_y, 1e-9)
+        cells_per_side = max(1, int(math.sqrt(self.size / self.points_per_cell)))
+        self.cell_size = width / cells_per_side * (1 + 1e-9)
+        self.grid_x = max(1, int((max(xs) - self.min_x) / self.cell_size) + 1)
+        self.grid_y = max(1, int((max(ys) - self.min_y) / self.cell_size) + 1)
+        self.cells = [[] for _ in range(self.grid_x * self.grid_y)]
+        for i in indices:
+            cell = self._cell(self.xs[i], self.ys[i])
+            self.slot[i] = len(self.cells[cell])
+            self.cells[cell].append(i)
+
+    def _cell_coordinates(self, x, y):
+        cx = min(max(int((x - self.min_x) / self.cell_size), 0), self.grid_x - 1)
+        cy = min(max(int((y - self.min_y) / self.cell_size), 0), self.grid_y - 1)
+        return cx, cy
+
+    def _cell(self, x, y):
+        cx, cy = self._cell_coordinates(x, y)
+        return cy * self.grid_x + cx
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, i):
+        return self.slot[i] >= 0
+
+    def remove(self, i):
+        """Remove o ponto i do índice."""
+        if self.slot[i] < 0:
+            raise ValueError(f"O ponto {i} não está no índice.")
+        cell = self.cells[self._cell(self.xs[i], self.ys[i])]
+        position = self.slot[i]
+        last = cell.pop()
+        if last != i:
+            cell[position] = last
+            self.slot[last] = position
+        self.slot[i] = -1
+        self.size -= 1
+        if 0 < self.size < REBUILD_FRACTION * self.built_size:
+            self._build(self.remaining())
+
+    def add(self, x, y):
+        """Acrescenta um novo ponto (x, y) ao índice e retorna o seu índice."""
+        i = len(self.xs)
+        self.xs.append(float(x))
+        self.ys.append(float(y))
+        self.slot.append(-1)
+        self.insert(i)
+        return i
+
+    def insert(self, i):
+        """Devolve ao índice o ponto i (removido antes ou acrescentado por add)."""
+        if self.slot[i] >= 0:
+            return
+        cell = self.cells[self._cell(self.xs[i], self.ys[i])]
+        self.slot[i] = len(cell)
+        cell.append(i)
+        self.size += 1
+        if self.size > GROWTH_FACTOR * self.built_size:
+            self._build(self.remaining())
+
+    def _unexplored_squared(self, x, y, cx, cy, radius):
+        """
+        Quadrado da distância mínima de (x, y) até as células da grade fora do bloco de anéis 0..radius-1 ao redor de
+        (cx, cy). Os lados do bloco que já alcançaram a borda da grade não têm células além deles e não contam, e a
+        distância de uma consulta fora da área da grade até essa área entra no limite, então consultas externas
+        (cuja célula é a da borda mais próxima) também param assim que o melhor ponto é comprovado.
+        """
+        size = self.cell_size
+        gap_x = max(self.min_x - x, x - (self.min_x + self.grid_x * size), 0.0)
+        gap_y = max(self.min_y - y, y - (self.min_y + self.grid_y * size), 0.0)
+        sides_x, sides_y = [], []
+        if cx - radius + 1 > 0:
+            sides_x.append(x - (self.min_x + (cx - radius + 1) * size))
+        if cx + radius - 1 < self.grid_x - 1:
+            sides_x.append(self.min_x + (cx + radius) * size - x)
+        if cy - radius + 1 > 0:
+            sides_y.append(y - (self.min_y + (cy - radius + 1) * size))
+        if cy + radius - 1 < self.grid_y - 1:
+            sides_y.append(self.min_y + (cy + radius) * size - y)
+        bound = math.inf
+        if sides_x:
+            bound = max(min(sides_x), 0.0) ** 2 + gap_y * gap_y
+        if sides_y:
+            bound = min(bound, max(min(sides_y), 0.0) ** 2 + gap_x * gap_x)
+        return bound
+
+    def remaining(self):
+        """Retorna os índices dos pontos que ainda estão no índice."""
+        return [i for cell in self.cells for i in cell]
+
+    def nearest(self, x, y):
+        """
+        Retorna o índice do ponto mais próximo de (x, y) que ainda está no índice, ou -1 se o índice estiver vazio.
+        """
+        if self.size == 0:
+            return -1
+        xs, ys, cells, grid_x, grid_y = self.xs, self.ys, self.cells, self.grid_x, self.grid_y
+        cx, cy = self._cell_coordinates(x, y)
+        best, best_squared = -1, math.inf
+        max_radius = max(cx, grid_x - 1 - cx, cy, grid_y - 1 - cy)
+        for radius in range(max_radius + 1):
+            # Distância do ponto de consulta até a borda do bloco de células já percorrido: os pontos deste anel e dos
+            # seguintes estão pelo menos a essa distância
+            if best >= 0:
+                if best_squared <= self._unexplored_squared(x, y, cx, cy, radius):
+                    break
+            y_low, y_high = cy - radius, cy + radius
+            for gy in range(max(y_low, 0), min(y_high, grid_y - 1) + 1):
+                if gy == y_low or gy == y_high:
+                    columns = range(max(cx - radius, 0), min(cx + radius, grid_x - 1) + 1)
+                else:
+                    columns = [gx for gx in (cx - radius, cx + radius) if 0 <= gx < grid_x]
+                row = gy * grid_x
+                for gx in columns:
+                    for i in cells[row + gx]:
+                        dx = xs[i] - x
+                        dy = ys[i] - y
+                        squared = dx * dx + dy * dy
+                        if squared < best_squared:
+                            best, best_squared = i, squared
+        return best
+
+    def k_nearest(self, x, y, k):
+        """
+        Retorna os índices dos k pontos do índice mais próximos de (x, y), ordenados pela distância. Percorre os mesmos
+        anéis de células de nearest, parando quando o k-ésimo melhor ponto está mais perto que o próximo anel.
+        """
+        xs, ys, cells, grid_x, grid_y = self.xs, self.ys, self.cells, self.grid_x, self.grid_y
+        cx, cy = self._cell_coordinates(x, y)
+        heap = []  # (-distância ao quadrado, índice) dos k melhores pontos
+        max_radius = max(cx, grid_x - 1 - cx, cy, grid_y - 1 - cy)
+        for radius in range(max_radius + 1):
+            if len(heap) == k:
+                if -heap[0][0] <= self._unexplored_squared(x, y, cx, cy, radius):
+                    break
+            y_low, y_high = cy - radius, cy + radius
+            for gy in range(max(y_low, 0), min(y_high, grid_y - 1) + 1):
+                if gy == y_low or gy == y_high:
+                    columns = range(max(cx - radius, 0), min(cx + radius, grid_x - 1) + 1)
+                else:
+                    columns = [gx for gx in (cx - radius, cx + radius) if 0 <= gx < grid_x]
+                row = gy * grid_x
+                for gx in columns:
+                    for i in cells[row + gx]:
+                        dx = xs[i] - x
+                        dy = ys[i] - y
+                        squared = dx * dx + dy * dy
+                        if len(heap) < k:
+                            heapq.heappush(heap, (-squared, i))
+                        elif squared < -heap[0][0]:
+                            heapq.heapreplace(heap, (-squared, i))
+        return [i for _, i in sorted(heap, reverse=True)]
+
+
+def grid_nearest_neighbor_tour(coords, start=0, prefix=None):
+    """
+    Constrói um tour pelo vizinho mais próximo diretamente sobre as coordenadas, sem matriz de distâncias.
+
+    Cada passo consulta o índice em grade pelo ponto não visitado mais próximo da cidade atual e o remove do índice,
+    em vez de percorrer a lista de cidades não visitadas, de modo que a construção é próxima de O(n log n) para pontos
+    bem distribuídos e escala para 10^5-10^6 cidades.
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades.
+    start (int): Cidade inicial (ignorada quando prefix é informado).
+    prefix (lista, opcional): Início fixo do tour, por exemplo cidades sorteadas como em
+        nearest_neighbor_algorithm_estocastic_2; o vizinho mais próximo continua a partir da última cidade.
+
+    Retorna:
+    list: Tour com todas as cidades.
+    """
+    index = GridIndex(coords)
+    tour = list(prefix) if prefix else [start]
+    for city in tour:
+        index.remove(city)
+    xs, ys = index.xs, index.ys
+    while len(index):
+        city = index.nearest(xs[tour[-1]], ys[tour[-1]])
+        index.remove(city)
+        tour.append(city)
+    return tour
+
+
+def grid_nearest_neighbor_tour_stochastic(coords, percentage=0, seed=None):
+    """
+    Versão estocástica do vizinho mais próximo sobre a grade: começa em uma cidade aleatória e, opcionalmente, sorteia
+    uma porcentagem das cidades como início do tour (como nearest_neighbor_algorithm_estocastic_2).
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades.
+    percentage (float): Porcentagem (0 a 100) de cidades escolhidas aleatoriamente.
+    seed (int, opcional): Semente do gerador aleatório.
+
+    Retorna:
+    list: Tour com todas as cidades.
+    """
+    if percentage < 0 or percentage > 100:
+        raise ValueError("percentage must be between 0 and 100")
+    generator = random.Random(seed)
+    n_cities = len(coords)
+    n_random_cities = max(1, math.floor(n_cities * percentage / 100))
+    return grid_nearest_neighbor_tour(coords, prefix=generator.sample(range(n_cities), n_random_cities))
+
+
+def spatial_blocks(points, block_points=BLOCK_POINTS):
+    """
+    Partição sort-tile-recursive: as cidades são divididas em faixas verticais com o mesmo número de pontos e cada
+    faixa em blocos de block_points pontos consecutivos em y, de modo que todos os blocos têm o mesmo tamanho mesmo em
+    instâncias com aglomerados.
+
+    Retorna:
+    tuple: (ordem das cidades, caixas (n_blocos, 4) com xmin, ymin, xmax, ymax de cada bloco).
+    """
+    n = len(points)
+    n_blocks = -(-n // block_points)
+    slabs = max(1, int(np.ceil(np.sqrt(n_blocks))))
+    per_slab = -(-n_blocks // slabs) * block_points
+    slab = np.empty(n, dtype=np.int64)
+    slab[np.argsort(points[:, 0], kind='stable')] = np.arange(n) // per_slab
+    order = np.lexsort((points[:, 1], slab))
+    ordered = points[order]
+    starts = np.arange(0, n, block_points)
+    boxes = np.column_stack((np.minimum.reduceat(ordered, starts), np.maximum.reduceat(ordered, starts)))
+    return order, boxes
+
+
+def nearest_neighbors(coords, k, block_points=BLOCK_POINTS):
+    """
+    Calcula os k vizinhos mais próximos de cada cidade sem a matriz de distâncias e sem a varredura O(n²) das linhas.
+
+    Para cada bloco da partição espacial, as distâncias são calculadas apenas até os pontos dentro da caixa do bloco
+    ampliada por uma margem. O resultado de uma cidade é exato quando o seu k-ésimo vizinho está mais perto do que a
+    borda da caixa ampliada; as cidades que não passam nesse teste são recalculadas com a margem dobrada. Tempo e
+    memória são proporcionais a n * k para pontos com densidade local regular.
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades.
+    k (int): Número de vizinhos por cidade.
+    block_points (int): Tamanho dos blocos.
+
+    Retorna:
+    ndarray: Array (n, k) com os índices dos vizinhos de cada cidade, ordenados pela distância.
+    """
+    points = as_coordinate_array(coords)
+    n = len(points)
+    k = min(k, n - 1)
+    neighbors = np.empty((n, max(k, 0)), dtype=np.int64)
+    if k <= 0:
+        return neighbors
+    order, boxes = spatial_blocks(points, block_points)
+    block_index = np.arange(len(boxes))
+    for b, (x0, y0, x1, y1) in enumerate(boxes):
+        block = order[b * block_points:(b + 1) * block_points]
+        pending = np.arange(len(block))  # Posições (no bloco) das cidades ainda sem resultado exato
+        area = max((x1 - x0) * (y1 - y0), 1e-12)
+        margin = MARGIN_FACTOR * np.sqrt(area * k / (np.pi * len(block)))
+        while len(pending):
+            low_x, low_y, high_x, high_y = x0 - margin, y0 - margin, x1 + margin, y1 + margin
+            selected = block_index[(boxes[:, 2] >= low_x) & (boxes[:, 0] <= high_x) &
+                                   (boxes[:, 3] >= low_y) & (boxes[:, 1] <= high_y)]
+            others = [order[c * block_points:(c + 1) * block_points] for c in selected if c != b]
+            others = np.concatenate(others) if others else block[:0]
+            inside = points[others]
+            others = others[(inside[:, 0] >= low_x) & (inside[:, 0] <= high_x) &
+                            (inside[:, 1] >= low_y) & (inside[:, 1] <= high_y)]
+            candidates = np.concatenate((block, others))  # As cidades do bloco ficam nas primeiras posições
+            complete = len(candidates) == n
+            if len(candidates) <= k and not complete:
+                margin *= 2
+                continue
+            query = points[block[pending]]
+            dx = query[:, 0, None] - points[None, candidates, 0]
+            dy = query[:, 1, None] - points[None, candidates, 1]
+            squared = dx * dx + dy * dy
+            squared[np.arange(len(pending)), pending] = np.inf
+            nearest = np.argpartition(squared, k - 1, axis=1)[:, :k]
+            nearest_squared = np.take_along_axis(squared, nearest, axis=1)
+            sorted_order = nearest_squared.argsort(axis=1)
+            nearest = np.take_along_axis(nearest, sorted_order, axis=1)
+            kth = np.sqrt(np.take_along_axis(nearest_squared, sorted_order[:, -1:], axis=1)[:, 0])
+            bound = np.minimum.reduce([query[:, 0] - low_x, high_x - query[:, 0], query[:, 1] - low_y,
+                                       high_y - query[:, 1]])
+            exact = (kth <= bound) | complete
+            neighbors[block[pending[exact]]] = candidates[nearest[exact]]
+            pending = pending[~exact]
+            margin *= 2
+    return neighbors
+
+
+def test_grid_nearest_neighbor_tour():
+    for n_cities in [1000, 100000]:
+        random_generator = np.random.default_rng(11)
+        coordinates = random_generator.uniform(0, 1000000, size=(n_cities, 2))
+
+        start_time = time.time()
+        tour = grid_nearest_neighbor_tour(coordinates)
+        interval = time.time() - start_time
+
+        ordered = coordinates[tour]
+        length = np.sqrt(((ordered - np.roll(ordered, -1, axis=0)) ** 2).sum(axis=1)).sum()
+        print(f"Número de cidades:  {n_cities}")
+        print(f"Distância do tour:  {length:.3f}")
+        print(f"Tempo de execução:  {interval:.3f} segundos\n")
+        assert sorted(tour) == list(range(n_cities))
+
+
+def main():
+    test_grid_nearest_neighbor_tour()
+
+
+if __name__ == "__main__":
+    main()
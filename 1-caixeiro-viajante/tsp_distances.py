@@ -0,0 +1,306 @@
+from collections import OrderedDict
+import hashlib
+
+import numpy as np
+
+DENSE_LIMIT = 20000      # Acima deste número de cidades a matriz não é materializada (linhas sob demanda)
+BLOCK_ELEMENTS = 1 << 22  # Número de elementos calculados por bloco de linhas na construção da matriz densa
+ROW_CACHE_SIZE = 1024    # Número de linhas mantidas em cache pela matriz preguiçosa
+INSTANCE_CACHE_SIZE = 4  # Número de instâncias cujas matrizes ficam em cache
+EUC_2D = 1               # Escala da convenção EUC_2D do TSPLIB: distâncias arredondadas para o inteiro mais próximo
+INT32_LIMIT = 2 ** 30    # Maior distância inteira aceita em int32 (a soma de duas distâncias não transborda)
+
+_instance_cache = OrderedDict()
+
+
+def as_coordinate_array(coords, dtype=np.float64):
+    """
+    Converte as coordenadas das cidades para um array NumPy de formato (n, 2).
+
+    Parâmetros:
+    coords (lista ou ndarray): Lista de tuplas (x, y) ou array de formato (n, 2).
+    dtype (tipo NumPy): Tipo dos elementos do array retornado.
+
+    Retorna:
+    ndarray: Array de formato (n, 2) com as coordenadas das cidades.
+    """
+    points = np.asarray(coords, dtype=dtype)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError("As coordenadas devem ter o formato (n, 2).")
+    return points
+
+
+def instance_key(coords):
+    """
+    Calcula uma chave que identifica unicamente uma instância a partir das suas coordenadas.
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades.
+
+    Retorna:
+    str: Hash SHA-1 dos bytes das coordenadas em float64.
+    """
+    points = np.ascontiguousarray(as_coordinate_array(coords))
+    return hashlib.sha1(points.tobytes()).hexdigest()
+
+
+def round_distances(distances, scale, dtype=np.int32):
+    """
+    Converte distâncias euclidianas para inteiros em ponto fixo: nint(distância * scale), como a função nint do TSPLIB
+    (com scale=EUC_2D, distâncias EUC_2D; com scale=1000, milésimos de unidade).
+
+    Parâmetros:
+    distances (ndarray ou float): Distâncias reais.
+    scale (int): Fator de escala.
+    dtype (tipo NumPy): Tipo inteiro do resultado (int32 aceita distâncias até INT32_LIMIT).
+
+    Retorna:
+    ndarray: Distâncias arredondadas.
+    """
+    rounded = np.floor(np.multiply(distances, scale) + 0.5)
+    limit = INT32_LIMIT if np.dtype(dtype).itemsize <= 4 else 2 ** 52
+    if np.max(rounded, initial=0) > limit:
+        raise ValueError(f"As distâncias com escala {scale} não cabem em {np.dtype(dtype).name}.")
+    return rounded.astype(dtype)
+
+
+def distance_rows(points, rows, dtype=np.float64, scale=None):
+    """
+    Calcula as linhas da matriz de distâncias euclidianas para um subconjunto de cidades.
+
+    Parâmetros:
+    points (ndarray): Array (n, 2) com as coordenadas das cidades.
+    rows (ndarray ou slice): Índices das cidades de origem.
+    dtype (tipo NumPy): Tipo dos elementos do bloco retornado.
+    scale (int, opcional): Se informado, as distâncias são arredondadas em ponto fixo (ver round_distances).
+
+    Retorna:
+    ndarray: Bloco (len(rows), n) com as distâncias das cidades de origem para todas as cidades.
+    """
+    origin = points[rows]
+    dx = origin[:, 0, None] - points[None, :, 0]
+    dy = origin[:, 1, None] - points[None, :, 1]
+    if scale is not None:
+        return round_distances(np.sqrt(dx * dx + dy * dy), scale, dtype)
+    return np.sqrt(dx * dx + dy * dy).astype(dtype, copy=False)
+
+
+def distance_matrix(coords, dtype=np.float64, scale=None):
+    """
+    Constrói a matriz densa de distâncias euclidianas usando broadcasting do NumPy.
+
+    As distâncias são sempre calculadas em float64 e convertidas para o tipo pedido, processando blocos de linhas para
+    que os arrays temporários não ultrapassem BLOCK_ELEMENTS elementos.
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades.
+    dtype (tipo NumPy): np.float64 (padrão), np.float32 para reduzir a memória pela metade ou np.int32 com scale.
+    scale (int, opcional): Escala das distâncias inteiras em ponto fixo (EUC_2D para a convenção do TSPLIB).
+
+    Retorna:
+    ndarray: Matriz (n, n) de distâncias.
+    """
+    points = as_coordinate_array(coords)
+    n = len(points)
+    matrix = np.empty((n, n), dtype=dtype)
+    block = max(1, BLOCK_ELEMENTS // max(n, 1))
+    for start in range(0, n, block):
+        end = min(start + block, n)
+        matrix[start:end] = distance_rows(points, slice(start, end), dtype, scale)
+    return matrix
+
+
+class LazyDistanceMatrix:
+    """
+    Matriz de distâncias que calcula as linhas sob demanda, para instâncias grandes demais para serem materializadas.
+
+    Suporta os acessos distances[i][j], distances[i, j] e distances.row(i), mantendo em cache as últimas linhas usadas.
+    Com scale, as distâncias são inteiras em ponto fixo, como em distance_matrix.
+    """
+
+    def __init__(self, coords, dtype=np.float64, cache_size=ROW_CACHE_SIZE, scale=None):
+        self.points = as_coordinate_array(coords)
+        self.dtype = np.dtype(dtype)
+        self.cache_size = cache_size
+        self.scale = scale
+        self._rows = OrderedDict()
+
+    @property
+    def shape(self):
+        n = len(self.points)
+        return n, n
+
+    def __len__(self):
+        return len(self.points)
+
+    def row(self, i):
+        """Retorna a linha i da matriz (distâncias da cidade i para todas as cidades)."""
+        i = int(i)
+        row = self._rows.get(i)
+        if row is not None:
+            self._rows.move_to_end(i)
+            return row
+        row = distance_rows(self.points, slice(i, i + 1), self.dtype, self.scale)[0]
+        self._rows[i] = row
+        if len(self._rows) > self.cache_size:
+            self._rows.popitem(last=False)
+        return row
+
+    def distance(self, i, j):
+        """Retorna a distância entre as cidades i e j sem materializar a linha."""
+        dx, dy = self.points[i] - self.points[j]
+        if self.scale is not None:
+            return round_distances(np.sqrt(dx * dx + dy * dy), self.scale, self.dtype)[()]
+        return self.dtype.type(np.sqrt(dx * dx + dy * dy))
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            i, j = key
+            if np.ndim(i) == 0:
+                return self.distance(i, j) if np.ndim(j) == 0 else self.row(i)[j]
+            # Pares (i[k], j[k]) calculados diretamente a partir das coordenadas
+            delta = self.points[np.asarray(i)] - self.points[np.asarray(j)]
+            if self.scale is not None:
+                return round_distances(np.sqrt((delta * delta).sum(axis=-1)), self.scale, self.dtype)
+            return np.sqrt((delta * delta).sum(axis=-1)).astype(self.dtype, copy=False)
+        return self.row(key)
+
+    def to_dense(self):
+        """Materializa a matriz completa."""
+        return distance_matrix(self.points, self.dtype, self.scale)
+
+
+def tour_lengths(tours, coords=None, distances=None, closed=True, scale=None):
+    """
+    Calcula o comprimento de um tour ou de um lote de tours com indexação avançada do NumPy, sem chamadas Python por
+    aresta.
+
+    Os tours de um lote (k, n) são processados em blocos de linhas para que os arrays temporários não ultrapassem
+    BLOCK_ELEMENTS elementos, então milhões de tours candidatos podem ser avaliados de uma vez.
+
+    Parâmetros:
+    tours (lista ou ndarray): Tour (n,) ou lote de tours (k, n) com índices de cidades.
+    coords (lista ou ndarray, opcional): Coordenadas das cidades.
+    distances (ndarray ou LazyDistanceMatrix, opcional): Matriz de distâncias, usada quando as coordenadas não são
+        informadas.
+    closed (bool): Se a aresta da última cidade de volta à primeira é incluída.
+    scale (int, opcional): Com coordenadas, arredonda cada aresta em ponto fixo (ver round_distances).
+
+    Retorna:
+    float, int ou ndarray: Comprimento do tour, ou array (k,) com o comprimento de cada tour do lote. Com distâncias
+    inteiras (matriz inteira ou scale), os comprimentos são inteiros exatos.
+    """
+    if coords is None and distances is None:
+        raise ValueError("Informe as coordenadas ou a matriz de distâncias.")
+    if coords is None and isinstance(distances, LazyDistanceMatrix):
+        coords, scale = distances.points, distances.scale
+    tours = np.asarray(tours, dtype=np.intp)
+    batch = np.atleast_2d(tours)
+    k, n = batch.shape
+    integer = scale is not None if coords is not None else np.issubdtype(np.asarray(distances).dtype, np.integer)
+    lengths = np.zeros(k, dtype=np.int64 if integer else np.float64)
+    if coords is not None:
+        points = as_coordinate_array(coords)
+        xs, ys = points[:, 0], points[:, 1]
+    else:
+        matrix = np.asarray(distances)
+    block = max(1, BLOCK_ELEMENTS // max(n, 1))
+    for start in range(0, k if n > 1 else 0, block):
+        rows = batch[start:start + block]
+        origin, destination = (rows, np.roll(rows, -1, axis=1)) if closed else (rows[:, :-1], rows[:, 1:])
+        if coords is not None:
+            dx = xs[origin] - xs[destination]
+            dy = ys[origin] - ys[destination]
+            edges = np.sqrt(dx * dx + dy * dy)
+            if scale is not None:
+                edges = round_distances(edges, scale, np.int64)
+            lengths[start:start + block] = edges.sum(axis=1)
+        else:
+            lengths[start:start + block] = matrix[origin, destination].sum(axis=1, dtype=lengths.dtype)
+    if tours.ndim == 1:
+        return int(lengths[0]) if integer else float(lengths[0])
+    return lengths
+
+
+def get_distances(coords, dtype=np.float64, max_dense=DENSE_LIMIT, scale=None):
+    """
+    Retorna a matriz de distâncias de uma instância, calculando-a apenas uma vez por instância.
+
+    As matrizes ficam em um cache indexado pelo hash das coordenadas, de modo que todos os resolvedores chamados sobre a
+    mesma instância compartilham a mesma matriz. Instâncias com mais de max_dense cidades recebem uma
+    LazyDistanceMatrix, que calcula as linhas sob demanda.
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades.
+    dtype (tipo NumPy): Tipo dos elementos da matriz.
+    max_dense (int): Número máximo de cidades para construir a matriz densa.
+    scale (int, opcional): Escala das distâncias inteiras em ponto fixo (ver integer_distances).
+
+    Retorna:
+    ndarray ou LazyDistanceMatrix: Matriz (n, n) de distâncias.
+    """
+    key = (instance_key(coords), np.dtype(dtype).str, len(coords) > max_dense, scale)
+    distances = _instance_cache.get(key)
+    if distances is not None:
+        _instance_cache.move_to_end(key)
+        return distances
+
+    if len(coords) > max_dense:
+        distances = LazyDistanceMatrix(coords, dtype, scale=scale)
+    else:
+        distances = distance_matrix(coords, dtype, scale)
+        distances.flags.writeable = False  # A matriz é compartilhada entre os resolvedores
+
+    _instance_cache[key] = distances
+    if len(_instance_cache) > INSTANCE_CACHE_SIZE:
+        _instance_cache.popitem(last=False)
+    return distances
+
+
+def integer_distances(coords, scale=EUC_2D, max_dense=DENSE_LIMIT):
+    """
+    Matriz de distâncias inteiras int32: nint(distância * scale). Com scale=EUC_2D é a métrica EUC_2D do TSPLIB; com
+    escalas maiores (10, 1000, ...) é uma aproximação em ponto fixo da distância euclidiana.
+
+    A matriz ocupa metade da memória da matriz float64 e os comprimentos dos tours são somas inteiras exatas e
+    reprodutíveis, independentes da ordem das somas. O Held-Karp, a enumeração exata e a busca local trabalham
+    diretamente com essa matriz (tabelas int32 e inteiros Python em vez de floats).
+
+    Parâmetros:
+    coords (lista ou ndarray): Coordenadas das cidades.
+    scale (int): Fator de escala.
+    max_dense (int): Número máximo de cidades para construir a matriz densa.
+
+    Retorna:
+    ndarray ou LazyDistanceMatrix: Matriz (n, n) de distâncias int32.
+    """
+    return get_distances(coords, np.int32, max_dense, scale)
+
+
+def clear_distance_cache():
+    """Esvazia o cache de matrizes de distâncias."""
+    _instance_cache.clear()
+
+
+def test_distance_matrix():
+    coordinates = [(0, 0), (3, 4), (6, 8), (0, 8)]
+    distances = get_distances(coordinates)
+    lazy = LazyDistanceMatrix(coordinates)
+
+    print("Coordenadas:           ", coordinates)
+    print("Matriz de distâncias:\n", distances)
+    print("Linha 1 (preguiçosa):  ", lazy.row(1))
+    print("Mesma matriz em cache: ", get_distances(coordinates) is distances)
+    print("float32 == float64:    ", np.allclose(distance_matrix(coordinates, np.float32), distances))
+    print("Comprimento do tour:   ", tour_lengths([0, 1, 2, 3], coordinates))
+    print("Lote de tours:         ", tour_lengths([[0, 1, 2, 3], [0, 2, 1, 3]], distances=distances))
+    print("EUC_2D (int32):\n", integer_distances(coordinates))
+    print("Ponto fixo (x1000):    ", tour_lengths([0, 1, 2, 3], distances=integer_distances(coordinates, 1000)))
+
+
+def main():
+    test_distance_matrix()
+
+
+if __name__ == "__main__":
+    main()
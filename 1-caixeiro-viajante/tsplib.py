@@ -0,0 +1,321 @@
+from collections import namedtuple
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+
+from instance_loader import cache_path, write_cache
+from tsp_distances import integer_distances, round_distances, tour_lengths, BLOCK_ELEMENTS, DENSE_LIMIT, EUC_2D, \
+    INT32_LIMIT
+
+EARTH_RADIUS = 6378.388   # Raio da Terra (km) usado pela métrica GEO do TSPLIB
+COORDINATE_TYPES = ('EUC_2D', 'CEIL_2D', 'ATT', 'GEO')  # Métricas calculadas a partir de NODE_COORD_SECTION
+MATRIX_FORMATS = {        # Formato EXPLICIT -> (triângulo na ordem das linhas, inclui a diagonal)
+    'UPPER_ROW': ('upper', False), 'LOWER_COL': ('upper', False),
+    'LOWER_ROW': ('lower', False), 'UPPER_COL': ('lower', False),
+    'UPPER_DIAG_ROW': ('upper', True), 'LOWER_DIAG_COL': ('upper', True),
+    'LOWER_DIAG_ROW': ('lower', True), 'UPPER_DIAG_COL': ('lower', True),
+}
+KEYWORD_LINE = re.compile(r'^[ \t]*([A-Z][A-Z0-9_]*)[ \t]*(?::[ \t]*(.*?))?[ \t\r]*$', re.MULTILINE)
+
+TsplibInstance = namedtuple('TsplibInstance', ['name', 'dimension', 'edge_weight_type', 'coords', 'distances',
+                                               'header', 'path'])
+
+
+def parse_sections(text):
+    """
+    Separa um arquivo TSPLIB em cabeçalho ('CHAVE : valor') e seções de dados (NODE_COORD_SECTION, ...). Apenas as
+    linhas que começam por uma letra são examinadas pela expressão regular; os dados de cada seção ficam em um único
+    bloco de texto, convertido de uma vez pelo NumPy.
+
+    Retorna:
+    tuple: (dicionário do cabeçalho, dicionário seção -> texto dos dados).
+    """
+    header, sections = {}, {}
+    keywords = list(KEYWORD_LINE.finditer(text))
+    for index, match in enumerate(keywords):
+        key, value = match.group(1), match.group(2)
+        if key == 'EOF':
+            break
+        if key.endswith('_SECTION'):
+            end = keywords[index + 1].start() if index + 1 < len(keywords) else len(text)
+            sections[key] = text[match.end():end]
+        elif value is not None:
+            header[key] = value.strip()
+    return header, sections
+
+
+def parse_numbers(text, count=None, section=''):
+    """Converte o texto de uma seção em um array float64, conferindo a quantidade de números lidos."""
+    values = np.fromstring(text, dtype=np.float64, sep=' ')
+    if count is not None and len(values) != count:
+        raise ValueError(f"A seção {section} deveria ter {count} números, mas tem {len(values)}.")
+    return values
+
+
+def compact_integers(values):
+    """Converte valores inteiros para int32 (ou int64, se não couberem); valores fracionários continuam em float64."""
+    if not np.array_equal(values, np.round(values)):
+        return values
+    return values.astype(np.int32 if np.abs(values).max(initial=0) < INT32_LIMIT else np.int64)
+
+
+def explicit_matrix(values, dimension, edge_weight_format):
+    """
+    Monta a matriz (n, n) simétrica de uma seção EDGE_WEIGHT_SECTION nos formatos FULL_MATRIX, UPPER_ROW, LOWER_ROW,
+    UPPER_DIAG_ROW, LOWER_DIAG_ROW e nos equivalentes por coluna.
+    """
+    if edge_weight_format == 'FULL_MATRIX':
+        if len(values) != dimension * dimension:
+            raise ValueError(f"FULL_MATRIX deveria ter {dimension * dimension} números, mas tem {len(values)}.")
+        return values.reshape(dimension, dimension)
+    if edge_weight_format not in MATRIX_FORMATS:
+        raise ValueError(f"Formato EDGE_WEIGHT_FORMAT não suportado: {edge_weight_format}.")
+    triangle, diagonal = MATRIX_FORMATS[edge_weight_format]
+    offset = 0 if diagonal else 1
+    rows, cols = np.triu_indices(dimension, offset) if triangle == 'upper' else np.tril_indices(dimension, -offset)
+    if len(values) != len(rows):
+        raise ValueError(f"{edge_weight_format} deveria ter {len(rows)} números, mas tem {len(values)}.")
+    matrix = np.zeros((dimension, dimension), dtype=values.dtype)
+    matrix[rows, cols] = values
+    matrix[cols, rows] = values
+    return matrix
+
+
+def read_tsplib(file_path, cache=True):
+    """
+    Lê uma instância TSPLIB (.tsp) com coordenadas (EUC_2D, CEIL_2D, ATT, GEO) ou matriz explícita (EXPLICIT).
+
+    As seções de dados são convertidas em lote pelo NumPy. As coordenadas são gravadas no mesmo cache binário .npy das
+    instâncias mTSP (instance_loader), então as leituras seguintes de instâncias grandes são imediatas.
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo .tsp.
+    cache (bool): Se o cache binário das coordenadas deve ser usado e gravado.
+
+    Retorna:
+    TsplibInstance: Nome, dimensão, tipo de métrica, coordenadas (n, 2) ou None, matriz explícita ou None, cabeçalho e
+    caminho do arquivo.
+    """
+    path = cache_path(file_path, np.float64) if cache else None
+    with open(file_path) as file:
+        text = file.read() if path is None or not os.path.exists(path) else file.read(1 << 16)
+    header, sections = parse_sections(text)
+    if 'DIMENSION' not in header:
+        raise ValueError(f"O arquivo '{file_path}' não informa DIMENSION.")
+    dimension = int(header['DIMENSION'])
+    edge_weight_type = header.get('EDGE_WEIGHT_TYPE', 'EUC_2D')
+    name = header.get('NAME', os.path.splitext(os.path.basename(file_path))[0])
+
+    if edge_weight_type == 'EXPLICIT':
+        values = compact_integers(parse_numbers(sections.get('EDGE_WEIGHT_SECTION', ''), section='EDGE_WEIGHT_SECTION'))
+        distances = explicit_matrix(values, dimension, header.get('EDGE_WEIGHT_FORMAT', 'FULL_MATRIX'))
+        coords = None
+        if 'DISPLAY_DATA_SECTION' in sections:
+            coords = parse_numbers(sections['DISPLAY_DATA_SECTION'], 3 * dimension,
+                                   'DISPLAY_DATA_SECTION').reshape(-1, 3)[:, 1:]
+        return TsplibInstance(name, dimension, edge_weight_type, coords, distances, header, file_path)
+
+    if edge_weight_type not in COORDINATE_TYPES:
+        raise ValueError(f"EDGE_WEIGHT_TYPE não suportado: {edge_weight_type}.")
+    if path is not None and os.path.exists(path):
+        coords = np.load(path, mmap_mode='r')
+    else:
+        values = parse_numbers(sections.get('NODE_COORD_SECTION', ''), 3 * dimension, 'NODE_COORD_SECTION')
+        values = values.reshape(-1, 3)
+        coords = np.empty((dimension, 2))
+        coords[values[:, 0].astype(np.int64) - 1] = values[:, 1:]  # Índices do TSPLIB começam em 1
+        if path is not None:
+            write_cache(path, coords)
+    return TsplibInstance(name, dimension, edge_weight_type, coords, None, header, file_path)
+
+
+def edge_weights(coords, i, j, edge_weight_type='EUC_2D'):
+    """
+    Distâncias inteiras do TSPLIB entre as cidades i e j (arrays com broadcasting).
+
+    EUC_2D arredonda a distância euclidiana (nint), CEIL_2D arredonda para cima, ATT é a pseudo-euclidiana das
+    instâncias att e GEO é a distância geográfica com coordenadas em graus.minutos. Os graus de GEO são truncados,
+    como no Concorde e no LKH (a especificação escreve nint, o que erra as coordenadas com minutos >= 30).
+
+    Retorna:
+    ndarray: Distâncias int64.
+    """
+    points = np.asarray(coords, dtype=np.float64)
+    if edge_weight_type == 'GEO':
+        degrees = np.trunc(points)
+        radians = np.pi * (degrees + 5.0 * (points - degrees) / 3.0) / 180.0
+        latitude, longitude = radians[:, 0], radians[:, 1]
+        q1 = np.cos(longitude[i] - longitude[j])
+        q2 = np.cos(latitude[i] - latitude[j])
+        q3 = np.cos(latitude[i] + latitude[j])
+        angle = np.arccos(np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0))
+        weights = (EARTH_RADIUS * angle + 1.0).astype(np.int64)
+        return np.where(np.asarray(i) == np.asarray(j), 0, weights)
+    dx = points[i, 0] - points[j, 0]
+    dy = points[i, 1] - points[j, 1]
+    squared = dx * dx + dy * dy
+    if edge_weight_type == 'EUC_2D':
+        return round_distances(np.sqrt(squared), EUC_2D, np.int64)
+    if edge_weight_type == 'CEIL_2D':
+        return np.ceil(np.sqrt(squared)).astype(np.int64)
+    if edge_weight_type == 'ATT':
+        real = np.sqrt(squared / 10.0)
+        rounded = np.floor(real + 0.5)
+        return (rounded + (rounded < real)).astype(np.int64)
+    raise ValueError(f"EDGE_WEIGHT_TYPE não suportado: {edge_weight_type}.")
+
+
+def tsplib_distances(instance, max_dense=DENSE_LIMIT):
+    """
+    Matriz de distâncias inteiras da instância, na métrica do arquivo. A matriz densa é montada em blocos de linhas
+    (int32); instâncias EUC_2D maiores que max_dense recebem a matriz preguiçosa de integer_distances.
+
+    Retorna:
+    ndarray ou LazyDistanceMatrix: Matriz (n, n) de distâncias.
+    """
+    if instance.distances is not None:
+        return instance.distances
+    n = instance.dimension
+    if instance.edge_weight_type == 'EUC_2D':
+        return integer_distances(instance.coords, EUC_2D, max_dense)
+    if n > max_dense:
+        raise ValueError(f"A matriz {instance.edge_weight_type} de {n} cidades é grande demais; use tsplib_tour_length "
+                         f"ou edge_weights sobre as coordenadas.")
+    matrix = np.empty((n, n), dtype=np.int32)
+    block = max(1, BLOCK_ELEMENTS // max(n, 1))
+    columns = np.arange(n)[None, :]
+    for start in range(0, n, block):
+        rows = np.arange(start, min(start + block, n))[:, None]
+        matrix[start:start + block] = edge_weights(instance.coords, rows, columns, instance.edge_weight_type)
+    return matrix
+
+
+def tsplib_tour_length(instance, tour):
+    """Comprimento inteiro de um tour fechado na métrica da instância, sem montar a matriz de distâncias."""
+    tour = np.asarray(tour, dtype=np.intp)
+    if instance.distances is not None:
+        return tour_lengths(tour, distances=instance.distances)
+    return int(edge_weights(instance.coords, tour, np.roll(tour, -1), instance.edge_weight_type).sum())
+
+
+def write_tsplib(file_path, coords=None, distances=None, name=None, comment=None, edge_weight_type='EUC_2D'):
+    """
+    Grava uma instância no formato TSPLIB: NODE_COORD_SECTION a partir das coordenadas ou, se apenas a matriz for
+    informada, EDGE_WEIGHT_SECTION no formato FULL_MATRIX. Os dados são gravados em lote por np.savetxt.
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo .tsp.
+    coords (lista ou ndarray, opcional): Coordenadas das cidades.
+    distances (ndarray, opcional): Matriz (n, n) de distâncias, gravada quando as coordenadas não são informadas.
+    name (str, opcional): Nome da instância; por padrão o nome do arquivo.
+    comment (str, opcional): Comentário do cabeçalho.
+    edge_weight_type (str): Métrica das coordenadas (EUC_2D, CEIL_2D, ATT ou GEO).
+    """
+    if coords is None and distances is None:
+        raise ValueError("Informe as coordenadas ou a matriz de distâncias.")
+    name = name or os.path.splitext(os.path.basename(file_path))[0]
+    data = np.asarray(coords if coords is not None else distances)
+    lines = [f'NAME : {name}', 'TYPE : TSP']
+    if comment:
+        lines.append(f'COMMENT : {comment}')
+    lines.append(f'DIMENSION : {len(data)}')
+    if coords is not None:
+        lines += [f'EDGE_WEIGHT_TYPE : {edge_weight_type}', 'NODE_COORD_SECTION']
+        integral = np.array_equal(data, np.round(data))
+        data = np.column_stack((np.arange(1, len(data) + 1), data))
+        fmt = ['%d', '%d', '%d'] if integral else ['%d', '%.10g', '%.10g']
+    else:
+        lines += ['EDGE_WEIGHT_TYPE : EXPLICIT', 'EDGE_WEIGHT_FORMAT : FULL_MATRIX', 'EDGE_WEIGHT_SECTION']
+        fmt = '%d' if np.issubdtype(data.dtype, np.integer) else '%.10g'
+    with open(file_path, 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+        np.savetxt(file, data, fmt=fmt)
+        file.write('EOF\n')
+
+
+def read_tour(file_path):
+    """
+    Lê um arquivo .tour do TSPLIB.
+
+    Retorna:
+    list: Tours da TOUR_SECTION (cada um terminado por -1 no arquivo), com cidades numeradas a partir de 0.
+    """
+    with open(file_path) as file:
+        header, sections = parse_sections(file.read())
+    values = parse_numbers(sections.get('TOUR_SECTION', ''), section='TOUR_SECTION').astype(np.int64)
+    tours = np.split(values, np.flatnonzero(values == -1) + 1)
+    tours = [tour[tour != -1] - 1 for tour in tours]
+    tours = [tour.tolist() for tour in tours if len(tour)]
+    if 'DIMENSION' in header and any(len(tour) != int(header['DIMENSION']) for tour in tours):
+        raise ValueError(f"Os tours de '{file_path}' não têm DIMENSION cidades.")
+    return tours
+
+
+def write_tour(file_path, tour, name=None, comment=None):
+    """
+    Grava um tour no formato .tour do TSPLIB (cidades numeradas a partir de 1, terminado por -1).
+
+    Parâmetros:
+    file_path (str): Caminho do arquivo .tour.
+    tour (lista ou ndarray): Tour aberto ou fechado com cidades numeradas a partir de 0.
+    name (str, opcional): Nome do tour; por padrão o nome do arquivo.
+    comment (str, opcional): Comentário do cabeçalho (por exemplo, o comprimento do tour).
+    """
+    tour = np.asarray(tour, dtype=np.int64)
+    if len(tour) > 1 and tour[0] == tour[-1]:
+        tour = tour[:-1]
+    lines = [f'NAME : {name or os.path.splitext(os.path.basename(file_path))[0]}', 'TYPE : TOUR']
+    if comment:
+        lines.append(f'COMMENT : {comment}')
+    lines += [f'DIMENSION : {len(tour)}', 'TOUR_SECTION']
+    with open(file_path, 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+        np.savetxt(file, tour + 1, fmt='%d')
+        file.write('-1\nEOF\n')
+
+
+def test_tsplib():
+    with tempfile.TemporaryDirectory() as directory:
+        n_cities = 200000
+        random_generator = np.random.default_rng(19)
+        coordinates = random_generator.integers(0, 1000000, size=(n_cities, 2))
+        file_path = os.path.join(directory, f'random{n_cities}.tsp')
+        write_tsplib(file_path, coordinates, comment='Pontos uniformes')
+
+        for description in ['Texto', 'Cache']:
+            start_time = time.time()
+            instance = read_tsplib(file_path)
+            interval = time.time() - start_time
+            print(f"{description}: {instance.name}, {instance.dimension} cidades ({instance.edge_weight_type}), "
+                  f"{interval:.3f} segundos")
+            assert np.array_equal(instance.coords, coordinates)
+
+        tour = random_generator.permutation(n_cities)
+        tour_path = os.path.join(directory, f'random{n_cities}.tour')
+        length = tsplib_tour_length(instance, tour)
+        write_tour(tour_path, tour, comment=f'Comprimento {length}')
+        assert read_tour(tour_path)[0] == tour.tolist()
+        print(f"Tour aleatório: {length} (EUC_2D), gravado e lido de {tour_path}")
+
+        # Matriz explícita em UPPER_ROW (o exemplo de 5 cidades) e a mesma instância com as métricas ATT e GEO
+        explicit_path = os.path.join(directory, 'explicit5.tsp')
+        with open(explicit_path, 'w') as file:
+            file.write('NAME : explicit5\nTYPE : TSP\nDIMENSION : 5\nEDGE_WEIGHT_TYPE : EXPLICIT\n'
+                       'EDGE_WEIGHT_FORMAT : UPPER_ROW\nEDGE_WEIGHT_SECTION\n3 4 2 7\n4 6 3\n5 8\n6\nEOF\n')
+        explicit = read_tsplib(explicit_path)
+        print(f"UPPER_ROW:\n{explicit.distances}\nTour 0-1-2-3-4: {tsplib_tour_length(explicit, [0, 1, 2, 3, 4])}")
+        points = [(38.24, 20.42), (39.57, 26.15), (40.56, 25.32), (36.26, 23.12), (33.48, 10.54)]
+        for edge_weight_type in ['ATT', 'GEO']:
+            instance = TsplibInstance('exemplo', 5, edge_weight_type, np.array(points), None, {}, None)
+            print(f"{edge_weight_type}: linha 0 = {tsplib_distances(instance)[0].tolist()}")
+
+
+def main():
+    test_tsplib()
+
+
+if __name__ == "__main__":
+    main()